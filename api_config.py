@@ -12,5 +12,7 @@ def get_api_config():
         raise ValueError("API 설정이 없습니다. .env 파일을 확인해주세요.")
     
     return {
-        "api_key": OPENAI_API_KEY
+        "api_key": OPENAI_API_KEY,
+        # 프록시/로컬 대체 서버 사용 시 (없으면 OpenAI 기본 주소)
+        "base_url": os.getenv("OPENAI_BASE_URL")
     } 
\ No newline at end of file
@@ -1,22 +1,36 @@
 import streamlit as st
-import pandas as pd
-from pathlib import Path
-import json
 from datetime import datetime
-from reels_extraction import download_video, extract_reels_info
+from reels_extraction import PIPELINE_STAGES
+from visual_analysis import format_visual_summary
+from reels_analysis import normalize_instagram_url
+from job_queue import submit_job, get_job, get_job_store, is_job_stalled, JOB_POLL_INTERVAL, JOB_WATCH_TIMEOUT
+from batch_benchmark import read_urls, empty_video_analysis
+from concurrency import get_limits
+from results_store import get_results_store
+from transcription import warm_up_transcription_backend
 import os
+import sqlite3
 from dotenv import load_dotenv
-from api_config import get_api_config
-import requests
-import openai
-import re
-import instaloader
+from post_cache import get_post_metadata
+from lazy_imports import lazy_import
 import time
-from urllib.parse import urlparse
+import threading
+
+# 배치/지난 분석 표를 그릴 때만 필요
+pd = lazy_import("pandas")
 
 # .env 파일 로드
 load_dotenv()
 
+@st.cache_resource
+def start_transcription_warm_up():
+    """로컬 전사 모델을 첫 분석 요청 전에 백그라운드에서 미리 로드합니다 (재실행과 관계없이 프로세스당 한 번)."""
+    thread = threading.Thread(target=warm_up_transcription_backend, name="transcription-warmup", daemon=True)
+    thread.start()
+    return thread
+
+start_transcription_warm_up()
+
 # API 설정
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
@@ -218,44 +232,19 @@ st.markdown("""
     <div class="brand-logo">HANSHIN GROUP</div>
 """, unsafe_allow_html=True)
 
-def normalize_instagram_url(url):
-    """
-    입력된 인스타그램 URL을 '/p/{ID}/' 형식으로 변환합니다.
-    쿼리 파라미터와 기타 불필요한 부분을 제거합니다.
-    """
-    try:
-        from urllib.parse import urlparse
-
-        parsed_url = urlparse(url)
-        path_parts = parsed_url.path.strip('/').split('/')
-
-        if len(path_parts) >= 2:
-            if path_parts[0] in ['reel', 'tv', 'p']:
-                shortcode = path_parts[1]
-                normalized_url = f"https://www.instagram.com/p/{shortcode}/"
-                return normalized_url
-        return url  # 변경이 필요 없는 다른 형식의 URL
-
-    except Exception as e:
-        st.error(f"URL 정규화 중 오류 발생: {str(e)}")
-        return url
-
 def get_video_url(url):
     try:
         normalized_url = normalize_instagram_url(url)
-        # Instaloader 인스턴스 생성
-        L = instaloader.Instaloader()
-        
         # URL에서 숏코드 추출
         shortcode = normalized_url.split("/p/")[1].strip("/")
         
-        # 게시물 정보 가져오기
-        post = instaloader.Post.from_shortcode(L.context, shortcode)
+        # 게시물 정보 가져오기 (숏코드 캐시 사용 - 재실행 시 Instagram 재조회 없음)
+        metadata = get_post_metadata(shortcode)
         
         # 비디오 URL 반환
-        return post.video_url if post.is_video else None
+        return metadata['video_url'] if metadata['is_video'] else None
         
-    except Exception as e:
+    except Exception:
         return None
 
 def create_input_form():
@@ -272,7 +261,11 @@ def create_input_form():
     
     # URL을 세션 상태로 관리
     if 'url' not in st.session_state:
-        st.session_state.url = ''
+        # ?job=<작업 ID>로 들어오면 그 작업의 URL로 시작
+        shared_job = get_job(st.query_params["job"]) if "job" in st.query_params else None
+        st.session_state.url = shared_job["url"] if shared_job else ''
+        if shared_job:
+            st.session_state.loaded_url = shared_job["url"]
     
     # URL 입력 필드 (불필요한 컨테이너 제거)
     url = st.text_input("✨ 릴스 URL을 입력해주세요", value=st.session_state.url)
@@ -290,9 +283,16 @@ def create_input_form():
             'font': ''
         }
     
-    # URL이 입력되었거나 URL 입력 버튼이 클릭되었을 때 처리
-    if url and (url_submit or True):
-        video_url = get_video_url(url)
+    # URL 입력 버튼을 눌렀을 때만 게시물을 조회하고, 이후 재실행에서는 조회한 동영상 주소를 재사용
+    if url and url_submit:
+        st.session_state.loaded_url = url
+        st.session_state.loaded_video_url = get_video_url(url)
+    elif url and url == st.session_state.get("loaded_url") and "loaded_video_url" not in st.session_state:
+        # 공유 링크(?job=)로 들어온 경우
+        st.session_state.loaded_video_url = get_video_url(url)
+    
+    if url and url == st.session_state.get("loaded_url"):
+        video_url = st.session_state.loaded_video_url
         if video_url:
             col1, col2 = st.columns([1, 1])
             
@@ -415,26 +415,31 @@ def create_input_form():
                     st.warning("URL을 입력해주세요.")
                     return None
                 
-                with st.spinner("분석 중... (약 2분 소요)"):
-                    # 캐시된 결과 확인
-                    results = get_cached_analysis(url, {
-                        "url": url,
-                        "video_analysis": {
-                            "intro_copy": st.session_state.form_data['video_intro_copy'],
-                            "intro_structure": st.session_state.form_data['video_intro_structure'],
-                            "narration": st.session_state.form_data['narration'],
-                            "music": st.session_state.form_data['music'],
-                            "font": st.session_state.form_data['font']
-                        },
-                        "content_info": {
-                            "topic": topic
-                        }
-                    })
-                    
-                    if results:
-                        display_analysis_results(results["analysis"], results["reels_info"])
-                    
-                    return None
+                # 파이프라인은 작업 큐에서 실행 (같은 작업이 진행 중이면 합류)
+                job_id = submit_job(url, {
+                    "url": url,
+                    "video_analysis": {
+                        "intro_copy": st.session_state.form_data['video_intro_copy'],
+                        "intro_structure": st.session_state.form_data['video_intro_structure'],
+                        "narration": st.session_state.form_data['narration'],
+                        "music": st.session_state.form_data['music'],
+                        "font": st.session_state.form_data['font']
+                    },
+                    "content_info": {
+                        "topic": topic
+                    }
+                })
+                st.session_state.job_id = job_id
+                # 새로고침하거나 링크를 공유해도 같은 작업을 이어서 볼 수 있도록
+                st.query_params["job"] = job_id
+                watch_job(job_id)
+                return None
+            
+            # 재실행/새로고침 시 이 URL의 진행 중이거나 끝난 작업을 다시 표시
+            active_job_id = st.session_state.get("job_id") or st.query_params.get("job")
+            active_job = get_job(active_job_id) if active_job_id else None
+            if active_job and normalize_instagram_url(active_job["url"]) == normalize_instagram_url(url):
+                watch_job(active_job_id)
         else:
             st.error("Instagram URL에서 동영상을 찾을 수 없습니다.")
     
@@ -452,142 +457,18 @@ def create_input_form():
         }
     }
 
-@st.cache_data(ttl=3600)
-def analyze_with_gpt4(info, input_data):
-    try:
-        api_config = get_api_config()
-        client = openai.OpenAI(api_key=api_config["api_key"])
-        
-        messages = [
-            {
-                "role": "system",
-                "content": """
-                당신은 릴스 분석 전문가입니다. 다음 형식으로 분석 결과를 제공해주세요. 
-                각 항목에 대해 ✅/❌를 표시하고, 그 판단의 근거가 되는 스크립트나 캡션의 구체적인 내용을 인용해주세요. 
-                여기서 모수란 이 내용이 얼마나 많은 사람들의 관심을 끌 수 있는지에 대한 것입니다.
-                문제 해결이란 시청자가 갖고 있는 문제를 해결해줄 수 있는지에 대한 것입니다:
-
-                # 1. 주제: 
-                - **설명: (이 영상의 주제에 대한 내용)**
-                - ✅/❌ **공유 및 저장**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **모수**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **문제해결**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **욕망충족**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **흥미유발**: 스크립트/캡션 중 해당 내용
-
-                # 2. 초반 3초
-                ## 카피라이팅 :
-                - **설명: (이 영상의 초반 3초 카피라이팅에 대한 내용)**
-                - ✅/❌ **구체적 수치**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **뇌 충격**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **이익, 손해 강조**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **권위 강조**: 스크립트/캡션 중 해당 내용
-
-                ## 영상 구성 : 
-                - **설명: (이 영상의 초반 3초 영상 구성에 대한 내용)**
-                - ✅/❌ **상식 파괴**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **결과 먼저**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **부정 강조**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **공감 유도**: 스크립트/캡션 중 해당 내용
-
-                # 3. 내용 구성: 
-                - **설명: (이 영상의 스크립트/캡션의 전체적인 내용 구성에 대한 내용)**
-                - ✅/❌ **문제해결**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **호기심 유발**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **행동 유도**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **스토리**: 스크립트/캡션 중 해당 내용
-                - ✅/❌ **제안**: 스크립트/캡션 중 해당 내용
-
-                # 4. 개선할 점:
-                - ❌ **(항목명)**: 개선할 점 설명 추가 ex. 스크립트/캡션 예시
-                
-                # 5. 적용할 점:
-                - ✅ **(항목명)**: 적용할 점 설명 추가 ex. 스크립트/캡션 중 해당 내용
+# 분석 결과 섹션 제목 (GPT 출력 형식)
+ANALYSIS_SECTION_HEADINGS = [
+    "# 1. 주제:",
+    "# 2. 초반 3초",
+    "# 3. 내용 구성:",
+    "# 4. 개선할 점:",
+    "# 5. 적용할 점:",
+    "# 6. 벤치마킹 적용 기획:",
+]
+PLANNING_HEADING = "# 6. 벤치마킹 적용 기획:"
 
-                # 6. 벤치마킹 적용 기획:
-                {f'''
-                - 입력하신 주제 "{input_data["content_info"]["topic"]}"에 대한 벤치마킹 적용 기획입니다.
-                - 위에서 체크(✅)된 항목들을 모두 반영하여 벤치마킹한 내용입니다.
-                
-                [시스템 참고용 - 출력하지 말 것]
-                - 스크립트: {info['refined_transcript']}
-                - 캡션: {info['caption']}
-                
-                위 스크립트와 캡션을 최대한 유사하게 벤치마킹하여 다음과 같이 작성했습니다:
-                
-                ## 🎙️ 1. 스크립트 예시:
-                [원본 스크립트의 문장 구조, 호흡, 강조점을 거의 그대로 활용하되 새로운 주제에 맞게 변경.
-                예를 들어 원본이 "이것 하나만 있으면 ~~" 구조라면, 새로운 주제도 동일한 구조 사용]
-
-                ## ✏️ 2. 캡션 예시:
-                [원본 캡션의 구조를 거의 그대로 활용.
-                예를 들어 원본이 "✨꿀팁 공개✨" 시작이라면, 새로운 캡션도 동일한 구조 사용.
-                이모지, 해시태그 스타일도 원본과 동일하게 구성]
-
-                ## 🎬 3. 영상 기획:
-                원본 영상의 구성을 최대한 유사하게 벤치마킹하되, 다음 요소들을 추가/보완했습니다:
-
-                1. **🎯 도입부** (3초):
-                   - 💥 **뇌 충격을 주는 구체적 수치 활용** (스크립트/캡션 예시 내용)
-                   - 🔄 **상식을 깨는 내용으로 시작** (스크립트/캡션 예시 내용)
-                   - ⭐ **결과를 먼저 보여주는 방식 적용** (스크립트/캡션 예시 내용)
-                   
-                2. **📝 전개**:
-                   - **문제 해결형 구조 적용:**
-                     * ❓ **명확한 문제 제시** (스크립트/캡션 예시 내용)
-                     * ✅ **구체적인 해결책 제시** (스크립트/캡션 예시 내용)
-                   - **시청 지속성 확보:**
-                     * 🎙️ **나레이션과 영상의 일치성 유지** (스크립트/캡션 예시 내용)
-                     * 🎵 **트렌디한 BGM 활용** (스크립트/캡션 예시 내용)
-                     * 📹 **고화질 영상 품질 유지** (스크립트/캡션 예시 내용)
-                   
-                3. **🔚 마무리**:
-                   - **행동 유도 요소 포함:**
-                     * 💾 **저장/공유 유도 멘트** (스크립트/캡션 예시 내용)
-                     * 👥 **팔로우 제안** (스크립트/캡션 예시 내용)
-                   - **캡션 최적화:**
-                     * 🎣 **첫 줄 후킹** (스크립트/캡션 예시 내용)
-                     * 📑 **단락 구분으로 가독성 확보** (스크립트/캡션 예시 내용)
-                     * 📊 **구체적 수치/권위 요소 포함** (스크립트/캡션 예시 내용)
-                ''' if input_data["content_info"]["topic"] else "주제가 입력되지 않았습니다. 구체적인 기획을 위해 주제를 입력해주세요."}
-                """
-            },
-            {
-                "role": "user",
-                "content": f"""
-                다음 릴스를 분석하고, 입력된 주제에 맞게 벤치마킹 기획을 해주세요:
-                
-                스크립트: {info['refined_transcript']}
-                캡션: {info['caption']}
-                
-                사용자 입력 정보:
-                - 초반 3초 카피라이팅: {input_data['video_analysis']['intro_copy']}
-                - 초반 3초 영상 구성: {input_data['video_analysis']['intro_structure']}
-                - 나레이션: {input_data['video_analysis']['narration']}
-                - 음악: {input_data['video_analysis']['music']}
-                - 폰트: {input_data['video_analysis']['font']}
-                
-                벤치마킹할 새로운 주제: {input_data['content_info']['topic']}
-                
-                위 릴스의 장점과 특징을 분석한 후, 새로운 주제에 맞게 벤치마킹하여 구체적인 스크립트, 캡션, 영상 기획을 제시해주세요.
-                """
-            }
-        ]
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            temperature=0,
-            max_tokens=10000
-        )
-        
-        return response.choices[0].message.content.strip()
-        
-    except Exception as e:
-        st.error(f"분석 중 오류 발생: {str(e)}")
-        return f"분석 중 오류 발생: {str(e)}"
-
-def display_analysis_results(results, reels_info):
+def display_result_styles():
     st.markdown("""
         <style>
         .benchmark-analysis-title {
@@ -604,6 +485,7 @@ def display_analysis_results(results, reels_info):
         </style>
     """, unsafe_allow_html=True)
 
+def display_reels_info(reels_info):
     # 1. 릴스 정보
     st.markdown('<div class="benchmark-analysis-title">📊 분석 결과</div>', unsafe_allow_html=True)
     
@@ -631,31 +513,83 @@ def display_analysis_results(results, reels_info):
     with col2:
         st.markdown('<div class="info-title">✍️ 캡션</div>', unsafe_allow_html=True)
         st.write(reels_info["caption"])
+    if reels_info.get("visual"):
+        with st.expander("🖼️ 화면 분석 (영상 프레임에서 자동 추출)"):
+            st.text(format_visual_summary(reels_info["visual"]))
     
     # 3. GPT 분석 결과
     st.markdown('<div class="benchmark-analysis-title">🤖 벤치마킹 템플릿 분석</div>', unsafe_allow_html=True)
-    
-    # 벤치마킹 기획 섹션을 분리
-    analysis_parts = results.split("# 6. 벤치마킹 적용 기획:")
-    main_analysis = analysis_parts[0]  # 메인 분석 부분
-    
+
+def decorate_analysis_text(text):
     # GPT 분석 결과를 마크다운으로 변환하여 이모티콘 추가
-    analysis_text = main_analysis.replace("# 1. 주제:", "# 🎯 1. 주제:")
+    analysis_text = text.replace("# 1. 주제:", "# 🎯 1. 주제:")
     analysis_text = analysis_text.replace("# 2. 초반 3초", "# ⚡ 2. 초반 3초")
     analysis_text = analysis_text.replace("## 카피라이팅 :", "## ✍️ 카피라이팅 :")
     analysis_text = analysis_text.replace("## 영상 구성 :", "## 🎬 영상 구성 :")
     analysis_text = analysis_text.replace("# 3. 내용 구성:", "# 📋 3. 내용 구성:")
     analysis_text = analysis_text.replace("# 4. 개선할 점:", "# 🔍 4. 개선할 점:")
     analysis_text = analysis_text.replace("# 5. 적용할 점:", "# ✨ 5. 적용할 점:")
-    
-    # 메인 분석 결과 표시
-    st.markdown(analysis_text)
-    
-    # 벤치마킹 기획 섹션 표시 (있는 경우에만)
-    if len(analysis_parts) > 1:
-        st.markdown('<div class="benchmark-analysis-title">📝 벤치마킹 기획</div>', unsafe_allow_html=True)
-        planning_section = analysis_parts[1].strip()
-        st.markdown(planning_section)
+    return analysis_text
+
+def completed_sections_end(text):
+    """마지막으로 등장한 섹션 제목의 시작 위치 - 그 앞까지는 완성된 섹션입니다."""
+    end = 0
+    for heading in ANALYSIS_SECTION_HEADINGS[1:]:
+        position = text.find(heading)
+        if position > end:
+            end = position
+    return end
+
+class AnalysisStreamView:
+    """스트리밍되는 분석 결과를 섹션 제목 단위로 점진적으로 그립니다.
+
+    다음 섹션 제목이 도착해 완성된 섹션만 다시 그리므로 토큰마다 전체를 갱신하지 않습니다.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._rendered_end = 0
+        self._placeholders = None
+
+    def show_reels_info(self, reels_info):
+        display_result_styles()
+        display_reels_info(reels_info)
+        self._placeholders = {
+            "main": st.empty(),
+            "planning_title": st.empty(),
+            "planning": st.empty(),
+            "writing": st.empty(),
+        }
+        self._placeholders["writing"].caption("✍️ 분석 내용을 작성하고 있습니다...")
+
+    def feed(self, delta):
+        self._text += delta
+        end = completed_sections_end(self._text)
+        if self._placeholders and end > self._rendered_end:
+            self._rendered_end = end
+            self._render(self._text[:end])
+
+    def finish(self, analysis):
+        if self._placeholders:
+            self._render(analysis)
+            self._placeholders["writing"].empty()
+
+    def _render(self, text):
+        # 벤치마킹 기획 섹션을 분리
+        analysis_parts = text.split(PLANNING_HEADING)
+        
+        # 메인 분석 결과 표시
+        self._placeholders["main"].markdown(decorate_analysis_text(analysis_parts[0]))
+        
+        # 벤치마킹 기획 섹션 표시 (있는 경우에만)
+        if len(analysis_parts) > 1:
+            self._placeholders["planning_title"].markdown('<div class="benchmark-analysis-title">📝 벤치마킹 기획</div>', unsafe_allow_html=True)
+            self._placeholders["planning"].markdown(analysis_parts[1].strip())
+
+def display_analysis_results(results, reels_info):
+    view = AnalysisStreamView()
+    view.show_reels_info(reels_info)
+    view.finish(results)
 
 def display_progress():
     st.markdown("""
@@ -683,68 +617,236 @@ def display_progress():
     """, unsafe_allow_html=True)
     return st.empty()
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def get_cached_analysis(url, input_data):
-    try:
-        progress_placeholder = display_progress()
-        start_time = time.time()
+# 단계별 진행률 (%) - 실제 파이프라인 이벤트 기준
+STAGE_PROGRESS = {
+    "metadata": 20,
+    "audio": 35,
+    "transcript": 55,
+    "visual": 60,
+    "refinement": 70,
+}
+# AI 분석 스트리밍 구간 (70% → 99%), 예상 출력 길이 기준
+ANALYSIS_PROGRESS_RANGE = (70, 99)
+EXPECTED_ANALYSIS_CHARS = 4000
+
+def stage_progress(stage, detail):
+    """파이프라인 이벤트를 진행률(%)과 상태 문구로 변환합니다."""
+    if stage == "analysis":
+        start, end = ANALYSIS_PROGRESS_RANGE
+        ratio = min(detail.get("chars", 0) / EXPECTED_ANALYSIS_CHARS, 1.0)
+        return int(start + (end - start) * ratio), PIPELINE_STAGES["analysis"]
+    return STAGE_PROGRESS.get(stage, 0), PIPELINE_STAGES.get(stage, "🔄 분석 진행 중...")
+
+def watch_job(job_id):
+    """작업 상태를 폴링하며 진행률, 릴스 정보, 작성 중인 분석을 그립니다.
+
+    파이프라인은 작업 큐 워커에서 돌기 때문에 이 스크립트가 재실행되거나 세션이 끊겨도 작업은 계속되고,
+    다시 호출하면 저장된 상태부터 이어서 표시합니다. JOB_WATCH_TIMEOUT이 지나면 폴링을 멈추고 안내만 남깁니다.
+    """
+    progress_placeholder = display_progress()
+    
+    def update_progress(progress, status):
+        progress_placeholder.markdown(f"""
+            <div class="step-container">
+                <div class="progress-label">{status}</div>
+            </div>
+        """, unsafe_allow_html=True)
+        progress_placeholder.progress(progress)
+    
+    view = AnalysisStreamView()
+    info_shown = False
+    shown_text = ""
+    progress = 0
+    deadline = time.monotonic() + JOB_WATCH_TIMEOUT
+    while True:
+        job = get_job(job_id)
+        if job is None:
+            progress_placeholder.empty()
+            st.warning("분석 작업을 찾을 수 없습니다. 다시 분석을 시작해주세요.")
+            st.session_state.pop("job_id", None)
+            return None
         
-        def update_progress(current_time):
-            progress = min(int((current_time - start_time) / 10) * 10, 100)  # 10초마다 10%씩 증가
-            status = "🔄 분석 진행 중..." if progress < 100 else "✨ 분석 완료!"
-            progress_placeholder.markdown(f"""
-                <div class="step-container">
-                    <div class="progress-label">{status}</div>
-                </div>
-            """, unsafe_allow_html=True)
-            progress_placeholder.progress(progress)
-            return progress
+        if job["reels_info"] and not info_shown:
+            view.show_reels_info(job["reels_info"])
+            info_shown = True
+        partial = job["partial"] or ""
+        if len(partial) > len(shown_text):
+            view.feed(partial[len(shown_text):])
+            shown_text = partial
         
-        # 주기적으로 진행 상태 업데이트
-        while True:
-            current_time = time.time()
-            progress = update_progress(current_time)
-            if progress >= 100:
-                break
-            time.sleep(1)  # 1초마다 업데이트
-            
-        # 메인 처리 로직
-        video_path = download_video(url)
-        if not video_path:
-            st.error("영상 다운로드에 실패했습니다. URL을 확인해주세요.")
+        if job["status"] == "done":
+            update_progress(100, "✨ 분석 완료!")
+            progress_placeholder.empty()
+            view.finish(job["analysis"])
+            return {"analysis": job["analysis"], "reels_info": job["reels_info"]}
+        if job["status"] == "error":
+            progress_placeholder.empty()
+            st.error(job["error"])
             return None
         
-        reels_info = extract_reels_info(url, input_data['video_analysis'])
-        if isinstance(reels_info, str):
-            st.error(f"정보 추출 실패: {reels_info}")
+        if time.monotonic() > deadline:
+            progress_placeholder.empty()
+            st.info("분석이 예상보다 오래 걸리고 있습니다. 작업은 계속 진행되니 잠시 후 새로고침해서 결과를 확인해주세요.")
             return None
         
-        analysis = analyze_with_gpt4(reels_info, input_data)
-        if "error" in analysis:
-            st.error(f"AI 분석 실패: {analysis['error']}")
-            return None
+        if job["status"] == "queued":
+            status = f"⏳ 대기 중... (앞선 작업 {get_job_store().queue_position(job_id)}개)"
+        elif is_job_stalled(job):
+            status = "⚠️ 작업 응답이 없어 다시 시작을 기다리는 중..."
+        else:
+            stage_percent, status = stage_progress(job["stage"], {"chars": job["chars"]}) if job["stage"] else (0, "🔄 분석 진행 중...")
+            progress = max(progress, stage_percent)
+        update_progress(progress, status)
+        time.sleep(JOB_POLL_INTERVAL)
+
+def batch_results_dataframe(results):
+    """배치 결과를 CSV 내보내기용 표로 변환합니다."""
+    rows = []
+    for result in results:
+        info = result.get("reels_info") or {}
+        rows.append({
+            "url": result["url"],
+            "status": result["status"],
+            "attempts": result["attempts"],
+            "elapsed": result["elapsed"],
+            "owner": info.get("owner", ""),
+            "date": info.get("date", ""),
+            "view_count": info.get("view_count", ""),
+            "likes": info.get("likes", ""),
+            "comments": info.get("comments", ""),
+            "transcript": info.get("refined_transcript", ""),
+            "caption": info.get("caption", ""),
+            "analysis": result.get("analysis", ""),
+            "error": result.get("error", ""),
+        })
+    return pd.DataFrame(rows)
+
+def job_to_batch_result(job):
+    """작업 상태를 배치 결과 행(batch_benchmark.analyze_one과 같은 형태)으로 바꿉니다."""
+    result = {"url": job["url"], "status": "ok" if job["status"] == "done" else "error", "attempts": 1, "elapsed": 0}
+    if job["started_at"] and job["finished_at"]:
+        started = datetime.strptime(job["started_at"], '%Y-%m-%d %H:%M:%S')
+        finished = datetime.strptime(job["finished_at"], '%Y-%m-%d %H:%M:%S')
+        result["elapsed"] = (finished - started).total_seconds()
+    if job["status"] == "done":
+        result.update(reels_info=job["reels_info"], analysis=job["analysis"])
+    else:
+        result["error"] = job["error"]
+    return result
+
+def watch_batch(job_ids):
+    """배치로 제출한 작업들을 폴링하며, 릴스가 끝날 때마다 결과를 바로 표시합니다.
+
+    배치는 작업 큐에서 실행되므로 스크립트가 재실행되어도 결과가 사라지지 않고, 다시 호출하면 이어서 표시합니다.
+    JOB_WATCH_TIMEOUT이 지나면 끝난 결과까지만 내보내고 폴링을 멈춥니다.
+    """
+    display_progress()
+    progress_bar = st.progress(0)
+    status_placeholder = st.empty()
+    
+    results = {}
+    deadline = time.monotonic() + JOB_WATCH_TIMEOUT
+    while len(results) < len(job_ids):
+        for job_id in job_ids:
+            if job_id in results:
+                continue
+            job = get_job(job_id)
+            if job is None:
+                results[job_id] = {"url": "-", "status": "error", "attempts": 0, "elapsed": 0, "error": "작업을 찾을 수 없습니다."}
+            elif job["status"] in ("done", "error"):
+                results[job_id] = job_to_batch_result(job)
+            else:
+                continue
+            result = results[job_id]
+            if result["status"] == "ok":
+                with st.expander(f"✅ @{result['reels_info']['owner']} - {result['url']} ({result['elapsed']:.0f}초)"):
+                    display_analysis_results(result["analysis"], result["reels_info"])
+            else:
+                st.error(f"❌ {result['url']}: {result['error']}")
         
-        # 완료 표시
-        progress_placeholder.markdown("""
-            <div class="step-container">
-                <div class="progress-label">✨ 분석 완료!</div>
-            </div>
-        """, unsafe_allow_html=True)
-        progress_placeholder.progress(100)
-        time.sleep(1)
-        progress_placeholder.empty()
+        progress_bar.progress(len(results) / len(job_ids))
+        succeeded = sum(1 for r in results.values() if r["status"] == "ok")
+        status_placeholder.markdown(f"**{len(results)}/{len(job_ids)}** 완료 (성공 {succeeded}개)")
+        if len(results) < len(job_ids):
+            if time.monotonic() > deadline:
+                st.info(f"남은 {len(job_ids) - len(results)}개 작업은 계속 진행됩니다. 잠시 후 새로고침해서 결과를 확인해주세요.")
+                break
+            time.sleep(JOB_POLL_INTERVAL)
+    
+    st.download_button(
+        "📥 결과 CSV 다운로드",
+        data=batch_results_dataframe([results[job_id] for job_id in job_ids if job_id in results]).to_csv(index=False).encode("utf-8-sig"),
+        file_name=f"batch_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+        mime="text/csv",
+    )
+
+def create_batch_form():
+    with st.expander("📚 여러 릴스 한번에 분석하기 (배치)"):
+        urls_text = st.text_area("릴스 URL 목록 (한 줄에 하나씩)", height=150, key="batch_urls")
+        batch_topic = st.text_area("제작할 콘텐츠 주제", height=68, key="batch_topic")
+        
+        # 동시 실행 한도는 모든 세션과 작업 큐가 공유 (환경 변수로 설정)
+        limits = get_limits()
+        st.caption(
+            f"동시 실행 한도 - Instagram {limits['instagram']} · ffmpeg {limits['ffmpeg']} · OpenAI {limits['openai']}"
+        )
         
-        return {
-            "analysis": analysis,
-            "reels_info": reels_info
+        if st.button("배치 분석 시작"):
+            urls = read_urls(urls_text.splitlines())
+            if not urls:
+                st.warning("URL을 한 개 이상 입력해주세요.")
+                return
+            # 릴스마다 작업 큐에 제출 (같은 작업이 진행 중이면 합류)
+            st.session_state.batch_job_ids = [
+                submit_job(url, {"url": url, "video_analysis": empty_video_analysis(), "content_info": {"topic": batch_topic}})
+                for url in urls
+            ]
+        
+        if st.session_state.get("batch_job_ids"):
+            watch_batch(st.session_state.batch_job_ids)
+
+def create_history_view():
+    """결과 저장소에 쌓인 지난 분석을 다시 API 호출 없이 불러옵니다."""
+    with st.expander("📂 지난 분석 불러오기"):
+        try:
+            store = get_results_store()
+        except (sqlite3.Error, OSError) as e:
+            st.warning(f"결과 저장소를 열 수 없습니다: {e}")
+            return
+        owner = st.text_input("계정명으로 찾기 (비워두면 전체)", key="history_owner").strip().lstrip("@")
+        history = store.list_analyses(owner=owner or None, limit=100)
+        if not history:
+            st.info("저장된 분석이 없습니다.")
+            return
+        
+        labels = {
+            row["analysis_key"]: f"@{row['owner']} · {row['shortcode']} · {row['topic'] or '주제 없음'} ({row['updated_at']})"
+            for row in history
         }
+        selected = st.selectbox("분석 선택", list(labels), format_func=labels.get, key="history_selected")
         
-    except Exception as e:
-        st.error(f"처리 중 오류가 발생했습니다: {str(e)}")
-        return None
+        col1, col2 = st.columns(2)
+        with col1:
+            show = st.button("불러오기", key="history_load")
+        with col2:
+            st.download_button(
+                "📥 전체 분석 CSV 다운로드",
+                data=store.to_dataframe("analyses").to_csv(index=False).encode("utf-8-sig"),
+                file_name=f"reels_analyses_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv",
+            )
+        
+        if show:
+            result = store.load_result(selected)
+            if result is None:
+                st.warning("선택한 분석을 찾을 수 없습니다.")
+                return
+            display_analysis_results(result["analysis"], result["reels_info"])
 
 def main():
     input_data = create_input_form()
+    create_batch_form()
+    create_history_view()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,440 @@
+"""asyncio 기반 릴스 파이프라인 엔진
+
+메타데이터 → 오디오 추출(ffmpeg) → 전사(Whisper) → 정제 → 분석을
+하나의 이벤트 루프에서 비동기로 실행하여, 워커 하나가 많은 릴스를 동시에 처리합니다.
+
+- OpenAI: AsyncOpenAI
+- ffmpeg: asyncio.create_subprocess_exec (stdout 파이프)
+- 영상 다운로드: httpx.AsyncClient 스트리밍
+- instaloader(동기 라이브러리)는 asyncio.to_thread로 실행
+
+Streamlit 등 동기 코드에서는 run_reel_pipeline / submit_reel_pipeline 파사드를 사용합니다.
+단계별 캐시(메타데이터/전사/정제/분석)는 동기 파이프라인과 공유합니다.
+"""
+import os
+import time
+import asyncio
+import tempfile
+import threading
+from contextlib import asynccontextmanager
+from client_registry import get_async_openai_client, get_async_http_client
+from downloader import async_download_file
+from cache_utils import MISS
+from concurrency import get_limits
+from instrumentation import measure
+from singleflight import single_flight
+from transcription import get_transcription_backend, transcribe_audio, should_chunk, TRANSCRIPTION_LANGUAGE
+from post_cache import get_post_metadata
+from media_pipeline import AUDIO_FORMAT, AUDIO_FORMATS, AUDIO_TRIM_SILENCE, EncodedAudio, build_audio_command
+from transcript_cache import (
+    audio_fingerprint, get_cached_transcript, store_transcript,
+    get_known_fingerprint, remember_fingerprint,
+)
+from stage_caches import refinement_cache, refinement_key, analysis_cache, analysis_key
+from reels_extraction import (
+    report_progress, preprocess_caption, build_refinement_request, parse_refinement_result,
+)
+from reels_analysis import normalize_instagram_url, build_analysis_request
+from results_store import get_stored_analysis, save_analysis_result
+from visual_analysis import VISUAL_ANALYSIS, get_cached_visual_summary, get_visual_summary
+
+async def run_ffmpeg(command):
+    """ffmpeg를 비동기 서브프로세스로 실행하고 stdout 바이트를 반환합니다."""
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    with measure("ffmpeg", output="memory") as m:
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            message = stderr.decode("utf-8", errors="ignore").strip().splitlines()[-1:] or [""]
+            raise RuntimeError(f"ffmpeg 실패 (exit {process.returncode}): {message[0]}")
+        m.add_bytes(len(stdout))
+    return stdout
+
+class AsyncReelMedia:
+    """ReelMedia의 비동기 버전 - 영상은 최대 한 번만 받고, 종료 시 임시 파일을 정리합니다.
+
+    다운로드와 오디오 추출은 서로 기다리지 않습니다 (영상이 아직 없으면 오디오는 URL에서 바로 추출).
+    """
+
+    def __init__(self, engine, video_url):
+        self.engine = engine
+        self.video_url = video_url
+        self._video_path = None
+        self._encoded_audio = {}
+        self._temp_files = []
+        self._video_lock = asyncio.Lock()
+        self._audio_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def source(self):
+        return self._video_path or self.video_url
+
+    async def video_path(self):
+        async with self._video_lock:
+            if self._video_path is None:
+                fd, path = tempfile.mkstemp(suffix=".mp4")
+                os.close(fd)
+                self._temp_files.append(path)
+                await self.engine.download(self.video_url, path)
+                self._video_path = path
+            return self._video_path
+
+    async def encoded_audio(self, audio_format=None, trim_silence=None):
+        audio_format = audio_format or AUDIO_FORMAT
+        trim_silence = AUDIO_TRIM_SILENCE if trim_silence is None else trim_silence
+        key = (audio_format, trim_silence)
+        async with self._audio_lock:
+            if key not in self._encoded_audio:
+                command = build_audio_command(self.source, "pipe:1", audio_format, trim_silence)
+                async with self.engine.limit("ffmpeg"):
+                    data = await run_ffmpeg(command)
+                self._encoded_audio[key] = EncodedAudio(
+                    filename=f"audio{AUDIO_FORMATS[audio_format]['suffix']}",
+                    audio_format=audio_format,
+                    data=data,
+                )
+            return self._encoded_audio[key]
+
+    def close(self):
+        for path in self._temp_files:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._temp_files = []
+        self._video_path = None
+        self._encoded_audio = {}
+
+class AsyncReelPipeline:
+    """하나의 이벤트 루프에서 여러 릴스를 동시에 처리하는 엔진.
+
+    자원별 동시 실행 한도는 concurrency 설정(instagram/ffmpeg/openai)을 그대로 따릅니다.
+    반드시 엔진을 사용할 이벤트 루프 안에서 생성해야 합니다.
+    """
+
+    def __init__(self, limits=None):
+        limits = limits or get_limits()
+        self._semaphores = {name: asyncio.Semaphore(value) for name, value in limits.items()}
+
+    @asynccontextmanager
+    async def limit(self, resource):
+        async with self._semaphores[resource]:
+            yield
+
+    @property
+    def client(self):
+        # 루프별 공유 클라이언트 (client_registry)
+        return get_async_openai_client()
+
+    @property
+    def http(self):
+        return get_async_http_client()
+
+    async def download(self, video_url, path):
+        """CDN에서 영상을 받아 저장합니다 (크기가 크면 Range로 나눠 동시에 받음)."""
+        async with self.limit("instagram"):
+            return await async_download_file(self.http, video_url, path)
+
+    async def fetch_metadata(self, shortcode):
+        async with self.limit("instagram"):
+            return await asyncio.to_thread(get_post_metadata, shortcode)
+
+    async def transcribe(self, media, shortcode=None, progress_callback=None):
+        if shortcode is None:
+            return await self._transcribe(media, shortcode, progress_callback)
+        # 스레드 엔진과 같은 진행 목록 - 같은 숏코드를 이미 전사 중이면 그 결과를 함께 사용
+        text, shared = await single_flight("whisper").do_async(
+            shortcode, self._transcribe, media, shortcode, progress_callback
+        )
+        if shared:
+            with measure("whisper", shortcode=shortcode, source="shared") as m:
+                m.cache_hit()
+            report_progress(progress_callback, "audio", shared=True)
+            report_progress(progress_callback, "transcript", shared=True)
+        return text
+
+    async def _transcribe(self, media, shortcode, progress_callback):
+        try:
+            known_fingerprint = get_known_fingerprint(shortcode)
+            if known_fingerprint:
+                cached = get_cached_transcript(shortcode, known_fingerprint)
+                if cached is not None:
+                    with measure("whisper", shortcode=shortcode) as m:
+                        m.cache_hit()
+                    report_progress(progress_callback, "audio", cached=True)
+                    report_progress(progress_callback, "transcript", cached=True)
+                    return cached
+
+            audio = await media.encoded_audio()
+            report_progress(progress_callback, "audio", bytes=audio.size, audio_format=audio.audio_format)
+
+            with measure("whisper", shortcode=shortcode, audio_format=audio.audio_format) as m:
+                fingerprint = audio_fingerprint(audio)
+                remember_fingerprint(shortcode, fingerprint)
+                cached = get_cached_transcript(shortcode, fingerprint)
+                if cached is not None:
+                    m.cache_hit()
+                    report_progress(progress_callback, "transcript", cached=True)
+                    return cached
+
+                m.cache_miss()
+                backend = get_transcription_backend()
+                m.set(backend=backend.name)
+                if backend.remote and not should_chunk(audio):
+                    async with self.limit("openai"):
+                        transcript = await self.client.audio.transcriptions.create(
+                            model="whisper-1",
+                            file=audio.as_upload(),
+                            language=TRANSCRIPTION_LANGUAGE
+                        )
+                    text = transcript.text
+                else:
+                    # 긴 오디오는 청크 분할 전사, 로컬 모델은 배치 워커가 처리
+                    text = await asyncio.to_thread(transcribe_audio, audio)
+                m.add_bytes(audio.size)
+            store_transcript(shortcode, fingerprint, text)
+            report_progress(progress_callback, "transcript")
+            return text
+        except Exception as e:
+            print(f"전사 오류: {e}")
+            return ""
+
+    async def refine(self, transcript, caption, video_analysis, visual=None):
+        cache_key = refinement_key(transcript, caption, video_analysis, visual)
+        cached = refinement_cache.get(cache_key)
+        if cached is not MISS:
+            with measure("refinement") as m:
+                m.cache_hit()
+            return dict(cached)
+        try:
+            result, shared = await single_flight("refinement").do_async(
+                cache_key, self._request_refinement, transcript, caption, video_analysis, visual, cache_key
+            )
+            if shared:
+                with measure("refinement", source="shared") as m:
+                    m.cache_hit()
+            return dict(result)
+        except Exception as e:
+            print(f"텍스트 처리 중 오류 발생: {e}")
+            return {"transcript": transcript, "caption": caption}
+
+    async def _request_refinement(self, transcript, caption, video_analysis, visual, cache_key):
+        request = build_refinement_request(transcript, caption, video_analysis, visual)
+        with measure("refinement") as m:
+            m.cache_miss()
+            m.set(**request.stats)
+            async with self.limit("openai"):
+                response = await self.client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=request.messages,
+                    temperature=0.3,
+                    max_tokens=request.max_tokens
+                )
+            m.add_usage(response.usage)
+        result = parse_refinement_result(response.choices[0].message.content)
+        refinement_cache.set(cache_key, result)
+        return result
+
+    async def visual_summary(self, media, shortcode):
+        """reels_extraction.download_visual_summary의 비동기 버전 (다운로드 실패 시 None)"""
+        try:
+            with measure("video_download", shortcode=shortcode):
+                video_path = await media.video_path()
+        except Exception as e:
+            print(f"화면 분석용 영상 다운로드 실패: {e}")
+            return None
+        return await asyncio.to_thread(get_visual_summary, shortcode, video_path)
+
+    async def extract_reels_info(self, url, video_analysis=None, progress_callback=None):
+        """reels_extraction.extract_reels_info의 비동기 버전 (같은 info 딕셔너리 반환)"""
+        shortcode = url.split("/p/")[1].strip("/")
+        try:
+            metadata = await self.fetch_metadata(shortcode)
+            info = {
+                'shortcode': shortcode,
+                'date': metadata['date'],
+                'caption': metadata['caption'],
+                'view_count': metadata['view_count'],
+                'video_duration': metadata['video_duration'],
+                'likes': metadata['likes'],
+                'comments': metadata['comments'],
+                'owner': metadata['owner'],
+                'video_url': metadata['video_url']
+            }
+            report_progress(progress_callback, "metadata")
+
+            visual = get_cached_visual_summary(shortcode) if VISUAL_ANALYSIS else None
+            async with AsyncReelMedia(self, info['video_url']) as media:
+                # 영상 다운로드 + 화면 분석은 전사와 동시에 진행 (오디오 추출은 다운로드를 기다리지 않음)
+                visual_task = None
+                if VISUAL_ANALYSIS and visual is None:
+                    visual_task = asyncio.create_task(self.visual_summary(media, shortcode))
+                # 전사가 진행되는 동안 캡션 전처리
+                transcript_task = asyncio.create_task(self.transcribe(media, shortcode, progress_callback))
+                caption = preprocess_caption(info['caption'])
+                transcript = await transcript_task
+                if visual_task is not None:
+                    visual = await visual_task
+            info['raw_transcript'] = transcript
+            if visual:
+                info['visual'] = visual
+                report_progress(progress_callback, "visual", frames=visual["frames"], ocr=visual["ocr"])
+
+            processed_result = await self.refine(transcript, caption, video_analysis or {}, visual)
+            info['refined_transcript'] = processed_result['transcript']
+            info['caption'] = processed_result['caption']
+            report_progress(progress_callback, "refinement")
+            return info
+        except Exception as e:
+            return f"에러 발생: {str(e)}"
+
+    async def analyze(self, info, input_data, progress_callback=None, outcome=None):
+        """analyze_with_gpt4의 비동기 버전 (토큰 스트리밍)"""
+        outcome = {} if outcome is None else outcome
+        cache_key = analysis_key(info, input_data)
+        cached = analysis_cache.get(cache_key)
+        if cached is not MISS:
+            with measure("analysis", source="cache") as m:
+                m.cache_hit()
+            report_progress(progress_callback, "analysis", chars=len(cached), delta=cached)
+            return cached
+        stored = await asyncio.to_thread(get_stored_analysis, cache_key)
+        if stored is not None:
+            with measure("analysis", source="store") as m:
+                m.cache_hit()
+            analysis_cache.set(cache_key, stored)
+            report_progress(progress_callback, "analysis", chars=len(stored), delta=stored)
+            return stored
+        # 같은 분석이 이미 스트리밍 중이면 완료된 결과를 한 번에 받음
+        flight = single_flight("analysis")
+        future, leader = flight.claim(cache_key)
+        if not leader:
+            try:
+                # (분석, 잘림 여부) - 잘린 분석을 함께 받은 호출자도 저장하지 않도록
+                analysis, outcome["truncated"] = await asyncio.wrap_future(future)
+            except Exception as e:
+                print(f"분석 중 오류 발생: {str(e)}")
+                return f"분석 중 오류 발생: {str(e)}"
+            with measure("analysis", source="shared") as m:
+                m.cache_hit()
+                m.set(truncated=outcome["truncated"])
+            report_progress(progress_callback, "analysis", chars=len(analysis), delta=analysis)
+            return analysis
+        try:
+            chunks = []
+            received_chars = 0
+            request = build_analysis_request(info, input_data)
+            with measure("analysis") as m:
+                m.cache_miss()
+                m.set(**request.stats)
+                async with self.limit("openai"):
+                    started = time.perf_counter()
+                    stream = await self.client.chat.completions.create(
+                        model="gpt-4o",
+                        messages=request.messages,
+                        temperature=0,
+                        max_tokens=request.max_tokens,
+                        stream=True,
+                        extra_body={"stream_options": {"include_usage": True}}
+                    )
+                    async for chunk in stream:
+                        m.add_usage(getattr(chunk, "usage", None))
+                        if not chunk.choices:
+                            continue
+                        if chunk.choices[0].finish_reason:
+                            outcome["finish_reason"] = chunk.choices[0].finish_reason
+                            m.set(finish_reason=chunk.choices[0].finish_reason)
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            if not chunks:
+                                m.set(ttft=round(time.perf_counter() - started, 4))
+                            chunks.append(delta)
+                            received_chars += len(delta)
+                            m.add_bytes(len(delta.encode("utf-8")))
+                            report_progress(progress_callback, "analysis", chars=received_chars, delta=delta)
+            analysis = "".join(chunks).strip()
+            # max_tokens에 걸려 잘린 분석은 캐시하지 않음 (run()에서 저장도 건너뜀)
+            outcome["truncated"] = outcome.get("finish_reason") == "length"
+            if outcome["truncated"]:
+                print(f"⚠️ 분석이 출력 길이 한도에 걸려 잘렸습니다 (캐시/저장하지 않음): {info.get('shortcode')}")
+            else:
+                analysis_cache.set(cache_key, analysis)
+            flight.resolve(cache_key, future, (analysis, outcome["truncated"]))
+            return analysis
+        except BaseException as e:
+            flight.resolve(cache_key, future, error=e)
+            if not isinstance(e, Exception):
+                raise
+            print(f"분석 중 오류 발생: {str(e)}")
+            return f"분석 중 오류 발생: {str(e)}"
+
+    async def run(self, url, input_data, progress_callback=None):
+        """run_analysis_pipeline의 비동기 버전"""
+        url = normalize_instagram_url(url)
+        reels_info = await self.extract_reels_info(url, input_data['video_analysis'], progress_callback)
+        if isinstance(reels_info, str):
+            return {"error": f"정보 추출 실패: {reels_info}"}
+        report_progress(progress_callback, "reels_info", reels_info=reels_info)
+
+        outcome = {}
+        analysis = await self.analyze(reels_info, input_data, progress_callback, outcome)
+        if analysis.startswith("분석 중 오류 발생"):
+            return {"error": f"AI 분석 실패: {analysis}"}
+        truncated = outcome.get("truncated", False)
+        if not truncated:
+            await asyncio.to_thread(save_analysis_result, reels_info, input_data, analysis)
+        return {"analysis": analysis, "reels_info": reels_info, "truncated": truncated}
+
+    async def run_many(self, items):
+        """(url, input_data) 목록을 동시에 처리합니다. 결과 순서는 입력 순서와 같습니다."""
+        return await asyncio.gather(*(self.run(url, input_data) for url, input_data in items))
+
+class _EngineLoop:
+    """동기 코드용 파사드 - 전용 스레드의 이벤트 루프 하나에서 모든 요청을 처리합니다."""
+
+    def __init__(self):
+        self._loop = None
+        self._engine = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        ready = threading.Event()
+
+        def run_loop():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._engine = AsyncReelPipeline()
+            ready.set()
+            self._loop.run_forever()
+
+        threading.Thread(target=run_loop, name="reels-async-engine", daemon=True).start()
+        ready.wait()
+
+    def submit(self, coroutine_factory):
+        with self._lock:
+            if self._loop is None:
+                self._start()
+        return asyncio.run_coroutine_threadsafe(coroutine_factory(self._engine), self._loop)
+
+_engine_loop = _EngineLoop()
+
+def submit_reel_pipeline(url, input_data, progress_callback=None):
+    """파이프라인을 엔진 루프에 제출하고 concurrent.futures.Future를 반환합니다 (호출 스레드를 막지 않음)."""
+    return _engine_loop.submit(lambda engine: engine.run(url, input_data, progress_callback))
+
+def run_reel_pipeline(url, input_data, progress_callback=None):
+    """동기 파사드 - run_analysis_pipeline과 같은 결과를 반환합니다."""
+    return submit_reel_pipeline(url, input_data, progress_callback).result()
+
+def run_reel_pipelines(items):
+    """동기 파사드 - 여러 릴스를 한 루프에서 동시에 처리합니다."""
+    return _engine_loop.submit(lambda engine: engine.run_many(items)).result()
@@ -0,0 +1,150 @@
+"""여러 릴스 URL을 한 번에 벤치마킹 분석합니다.
+
+    python batch_benchmark.py urls.txt --topic "직장인 재테크" --openai 8 --output results.jsonl
+    cat urls.txt | python batch_benchmark.py - --topic "..."
+
+Instagram / ffmpeg / OpenAI 동시 실행 한도는 각각 따로 지정할 수 있고,
+릴스 하나가 끝날 때마다 결과가 출력(및 --output 파일에 추가)됩니다.
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from concurrency import configure_limits, get_limits, scoped_limits, submit_with_context
+from reels_analysis import run_analysis_pipeline
+
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 2.0
+
+def read_urls(source):
+    """파일 경로('-'는 stdin) 또는 URL 목록에서 빈 줄/주석/중복을 뺀 URL 목록을 만듭니다."""
+    if isinstance(source, str):
+        if source == "-":
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(source, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+    else:
+        lines = source
+
+    urls = []
+    for line in lines:
+        url = line.strip()
+        if url and not url.startswith("#") and url not in urls:
+            urls.append(url)
+    return urls
+
+def empty_video_analysis():
+    return {"intro_copy": "", "intro_structure": "", "narration": "", "music": "", "font": ""}
+
+def analyze_one(url, topic, video_analysis=None, retries=DEFAULT_RETRIES):
+    """릴스 하나를 분석합니다. 실패 시 지수 백오프로 재시도합니다."""
+    input_data = {
+        "url": url,
+        "video_analysis": video_analysis or empty_video_analysis(),
+        "content_info": {"topic": topic},
+    }
+    started_at = time.time()
+    error = None
+    for attempt in range(1, retries + 2):
+        try:
+            result = run_analysis_pipeline(url, input_data)
+        except Exception as e:
+            result = {"error": str(e)}
+        if "error" not in result:
+            return {
+                "url": url,
+                "status": "ok",
+                "attempts": attempt,
+                "elapsed": round(time.time() - started_at, 2),
+                "reels_info": result["reels_info"],
+                "analysis": result["analysis"],
+            }
+        error = result["error"]
+        if attempt <= retries:
+            time.sleep(RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1)))
+    return {
+        "url": url,
+        "status": "error",
+        "attempts": retries + 1,
+        "elapsed": round(time.time() - started_at, 2),
+        "error": error,
+    }
+
+def run_batch(urls, topic="", video_analysis=None, max_workers=8, retries=DEFAULT_RETRIES,
+              limits=None, on_result=None):
+    """URL 목록을 동시에 분석하고, 끝나는 순서대로 on_result(결과)를 호출합니다.
+
+    limits(instagram/ffmpeg/openai)는 이 배치에만 적용되는 한도로, 전역 한도와 함께 지켜집니다.
+    (전역 한도는 바꾸지 않으므로 다른 세션/작업 큐에는 영향이 없습니다. async 엔진은 전역 한도만 사용)
+    max_workers는 동시에 진행 중일 수 있는 릴스 수의 상한입니다.
+    """
+    results = []
+    with scoped_limits(**(limits or {})):
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as executor:
+            futures = {
+                submit_with_context(executor, analyze_one, url, topic, video_analysis, retries): url
+                for url in urls
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+    return results
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="+", help="URL 목록 파일('-'는 stdin) 또는 릴스 URL들")
+    parser.add_argument("--topic", default="", help="벤치마킹할 내 콘텐츠 주제")
+    parser.add_argument("--workers", type=int, default=8, help="동시에 진행할 릴스 수")
+    parser.add_argument("--instagram", type=int, default=None, help="Instagram 동시 요청 한도")
+    parser.add_argument("--ffmpeg", type=int, default=None, help="ffmpeg 동시 실행 한도")
+    parser.add_argument("--openai", type=int, default=None, help="OpenAI 동시 요청 한도")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="릴스별 재시도 횟수")
+    parser.add_argument("--output", help="결과를 JSON Lines로 추가 저장할 파일")
+    args = parser.parse_args()
+
+    if len(args.urls) == 1 and not args.urls[0].startswith("http"):
+        urls = read_urls(args.urls[0])
+    else:
+        urls = read_urls(args.urls)
+
+    # CLI는 자체 프로세스이므로 시작 시 전역 한도로 설정
+    limits = {"instagram": args.instagram, "ffmpeg": args.ffmpeg, "openai": args.openai}
+    configure_limits(**limits)
+    print(f"🚀 {len(urls)}개 릴스 분석 시작 (한도: {get_limits()}, 동시 진행: {args.workers})")
+
+    output_lock = threading.Lock()
+    output_file = open(args.output, "a", encoding="utf-8") if args.output else None
+    done = 0
+
+    def on_result(result):
+        nonlocal done
+        with output_lock:
+            done += 1
+            mark = "✅" if result["status"] == "ok" else "❌"
+            detail = f"{result['elapsed']}초" if result["status"] == "ok" else result["error"]
+            print(f"[{done}/{len(urls)}] {mark} {result['url']} ({detail})")
+            if output_file:
+                output_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output_file.flush()
+
+    started_at = time.time()
+    try:
+        results = run_batch(urls, args.topic, max_workers=args.workers, retries=args.retries, on_result=on_result)
+    finally:
+        if output_file:
+            output_file.close()
+
+    succeeded = sum(1 for r in results if r["status"] == "ok")
+    elapsed = time.time() - started_at
+    print(f"\n✨ 완료: 성공 {succeeded}/{len(results)}, {elapsed:.1f}초 ({len(results) / max(elapsed, 1e-9) * 60:.1f}개/분)")
+    return 0 if succeeded == len(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
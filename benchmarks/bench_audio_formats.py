@@ -0,0 +1,70 @@
+"""Whisper 업로드용 오디오 형식 벤치마크
+
+형식(wav/opus/mp3) × 무음 제거 × 메모리/디스크 경로별로
+페이로드 크기, 인코딩 시간, (선택) 전사 왕복 시간을 비교합니다.
+
+    python -m benchmarks.bench_audio_formats
+    python -m benchmarks.bench_audio_formats --transcribe   # OPENAI_API_KEY 필요
+"""
+import argparse
+import itertools
+import time
+from media_pipeline import ReelMedia, AUDIO_FORMATS
+from benchmarks.sample_media import ensure_sample_clips, SAMPLE_CLIPS
+
+def transcribe(audio):
+    from api_config import get_api_config
+    import openai
+
+    client = openai.OpenAI(api_key=get_api_config()["api_key"])
+    start = time.perf_counter()
+    client.audio.transcriptions.create(model="whisper-1", file=audio.as_upload(), language="ko")
+    return time.perf_counter() - start
+
+def run(clips, formats, with_transcription):
+    rows = []
+    for clip_name, path in clips.items():
+        for audio_format, trim_silence, in_memory in itertools.product(formats, (False, True), (True, False)):
+            with ReelMedia(path) as media:
+                start = time.perf_counter()
+                audio = media.encoded_audio(audio_format, trim_silence, in_memory)
+                encode_seconds = time.perf_counter() - start
+                upload_seconds = transcribe(audio) if with_transcription else None
+            rows.append({
+                "clip": clip_name,
+                "format": audio_format,
+                "trim": trim_silence,
+                "memory": in_memory,
+                "bytes": audio.size,
+                "encode_s": encode_seconds,
+                "transcribe_s": upload_seconds,
+            })
+    return rows
+
+def print_report(rows):
+    print(f"{'clip':<10} {'format':<6} {'trim':<5} {'memory':<6} {'KB':>9} {'vs wav':>7} {'encode_s':>9} {'total_s':>8}")
+    baseline = {
+        row["clip"]: row["bytes"] for row in rows
+        if row["format"] == "wav" and not row["trim"] and row["memory"]
+    }
+    for row in rows:
+        ratio = row["bytes"] / baseline[row["clip"]] if row["clip"] in baseline else float("nan")
+        total = row["encode_s"] + row["transcribe_s"] if row["transcribe_s"] is not None else None
+        print(
+            f"{row['clip']:<10} {row['format']:<6} {str(row['trim']):<5} {str(row['memory']):<6} "
+            f"{row['bytes'] / 1024:>9.1f} {ratio:>7.2f} {row['encode_s']:>9.2f} "
+            f"{(f'{total:.2f}' if total is not None else '-'):>8}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", nargs="*", choices=list(SAMPLE_CLIPS), default=None)
+    parser.add_argument("--formats", nargs="*", choices=list(AUDIO_FORMATS), default=["wav", "opus", "mp3"])
+    parser.add_argument("--transcribe", action="store_true", help="OpenAI 전사까지 포함한 왕복 시간 측정")
+    args = parser.parse_args()
+
+    clips = ensure_sample_clips(args.clips)
+    print_report(run(clips, args.formats, args.transcribe))
+
+if __name__ == "__main__":
+    main()
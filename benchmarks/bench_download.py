@@ -0,0 +1,131 @@
+"""영상 다운로더 벤치마크
+
+로컬 대체 CDN(benchmarks.fake_services, 연결당 대역폭 제한)에서 샘플 MP4를 받으며
+설정별 다운로드 시간, 요청 수, 진행 콜백 호출 수를 비교합니다.
+
+- legacy:   한 연결, 4KB 청크, 청크마다 진행 콜백 (기존 download_to_file 방식)
+- single:   한 연결, 큰 청크, 바이트 예산 진행 콜백
+- parts=N:  Range로 N개 구간을 동시에 받음
+- resume:   절반쯤에서 중단(DownloadCancelled) 후 같은 resume_key로 이어받기
+
+    python -m benchmarks.bench_download
+    python -m benchmarks.bench_download --cdn-bandwidth 2000000 --parts 2 4 8 --repeat 3
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import downloader
+from benchmarks.sample_media import ensure_sample_clips, SAMPLE_CLIPS
+from benchmarks.fake_services import FakeServiceConfig, start_fake_services
+
+def configure(chunk_size, parts, min_part_size, progress_bytes):
+    """downloader 모듈 설정을 바꿉니다 (환경 변수와 같은 효과)."""
+    downloader.DOWNLOAD_CHUNK_SIZE = chunk_size
+    downloader.DOWNLOAD_PARTS = parts
+    downloader.DOWNLOAD_MIN_PART_SIZE = min_part_size
+    downloader.DOWNLOAD_PROGRESS_BYTES = progress_bytes
+
+class CallbackCounter:
+    def __init__(self, cancel_at=None):
+        self.calls = 0
+        self.cancel_at = cancel_at
+
+    def __call__(self, downloaded, total):
+        self.calls += 1
+        if self.cancel_at is not None and total and downloaded >= total * self.cancel_at:
+            self.cancel_at = None
+            raise downloader.DownloadCancelled()
+
+def legacy_download(url, path, progress_callback=None, resume_key=None):
+    """기존 download_to_file과 같은 방식 (한 연결, 4KB 청크, 청크마다 진행 표시)"""
+    from client_registry import get_http_session
+
+    response = get_http_session().get(url, stream=True)
+    response.raise_for_status()
+    total_size = int(response.headers.get('content-length', 0))
+    with open(path, 'wb') as video_file:
+        downloaded = 0
+        for data in response.iter_content(chunk_size=4096):
+            downloaded += len(data)
+            video_file.write(data)
+            progress_callback(downloaded, total_size)
+
+def timed_download(services, url, resume_key=None, callback=None, download=None):
+    """(초, 서버 요청 수, 서버 전송 바이트)"""
+    download = download or downloader.download_file
+    services.reset_stats()
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "video.mp4")
+        start = time.perf_counter()
+        download(url, path, progress_callback=callback, resume_key=resume_key)
+        seconds = time.perf_counter() - start
+    stats = services.get_stats()
+    return seconds, stats.get("cdn_requests", 0), stats.get("cdn_bytes", 0)
+
+def run(services, clips, args):
+    # (모드, 구간 수)
+    modes = [("legacy", 1), ("single", 1), *((f"parts={parts}", parts) for parts in args.parts)]
+    rows = []
+    for clip in clips:
+        url = f"{services.base_url}/cdn/{clip}.mp4"
+        size = os.path.getsize(clips[clip])
+        for name, parts in modes:
+            configure(args.chunk_size, parts, args.min_part_size, args.progress_bytes)
+            download = legacy_download if name == "legacy" else downloader.download_file
+            runs = []
+            for _ in range(args.repeat):
+                counter = CallbackCounter()
+                seconds, requests_count, sent = timed_download(services, url, callback=counter, download=download)
+                runs.append((seconds, requests_count, sent, counter.calls))
+            seconds, requests_count, sent, calls = min(runs)
+            rows.append({"clip": clip, "mode": name, "bytes": size, "seconds": seconds,
+                         "requests": requests_count, "sent": sent, "callbacks": calls})
+
+        # 중단 후 이어받기: 두 번째 시도에서 다시 받은 바이트
+        configure(args.chunk_size, max(args.parts), args.min_part_size, args.progress_bytes)
+        resume_key = f"bench-{clip}-{time.time_ns()}"
+        try:
+            timed_download(services, url, resume_key=resume_key, callback=CallbackCounter(cancel_at=0.5))
+        except downloader.DownloadCancelled:
+            pass
+        counter = CallbackCounter()
+        seconds, requests_count, sent = timed_download(services, url, resume_key=resume_key, callback=counter)
+        rows.append({"clip": clip, "mode": "resume", "bytes": size, "seconds": seconds,
+                     "requests": requests_count, "sent": sent, "callbacks": counter.calls})
+    return rows
+
+def print_report(rows):
+    print(f"\n{'clip':<10} {'mode':<9} {'MB':>6} {'seconds':>8} {'MB/s':>7} {'vs legacy':>9} {'requests':>8} {'sent MB':>8} {'callbacks':>9}")
+    legacy = {row["clip"]: row["seconds"] for row in rows if row["mode"] == "legacy"}
+    for row in rows:
+        speedup = legacy[row["clip"]] / row["seconds"] if row["seconds"] else float("nan")
+        print(
+            f"{row['clip']:<10} {row['mode']:<9} {row['bytes'] / 1e6:>6.2f} {row['seconds']:>8.2f} "
+            f"{row['bytes'] / 1e6 / max(row['seconds'], 1e-9):>7.2f} {speedup:>8.2f}x {row['requests']:>8} "
+            f"{row['sent'] / 1e6:>8.2f} {row['callbacks']:>9}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", nargs="*", choices=list(SAMPLE_CLIPS), default=list(SAMPLE_CLIPS))
+    parser.add_argument("--parts", nargs="*", type=int, default=[2, 4, 8])
+    parser.add_argument("--chunk-size", type=int, default=downloader.DOWNLOAD_CHUNK_SIZE)
+    parser.add_argument("--min-part-size", type=int, default=256 * 1024, help="샘플 클립이 작아 기본값보다 작게 설정")
+    parser.add_argument("--progress-bytes", type=int, default=downloader.DOWNLOAD_PROGRESS_BYTES)
+    parser.add_argument("--repeat", type=int, default=1, help="설정별 반복 횟수 (최솟값 사용)")
+    parser.add_argument("--cdn-bandwidth", type=float, default=2_000_000, help="연결당 대역폭 (bytes/s)")
+    parser.add_argument("--cdn-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    clips = ensure_sample_clips(args.clips)
+    config = FakeServiceConfig(cdn_bandwidth=args.cdn_bandwidth, cdn_latency=args.cdn_latency)
+    with start_fake_services(clips, config) as services:
+        print(f"🚀 대체 CDN {services.base_url} / 연결당 {args.cdn_bandwidth / 1e6:.1f}MB/s")
+        rows = run(services, clips, args)
+    print_report(rows)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""계정 단위 수집(owner_ingest) 벤치마크
+
+로컬 대체 프로필(benchmarks.fake_services)로 동기화 시나리오별 프로필 페이지 조회 수, 조회한 게시물 수,
+시간, 저장된 릴스 수를 측정합니다. 분석 작업은 제출하지 않고 조회수 기준을 넘은 후보 수만 셉니다.
+
+시나리오 (순서대로 같은 계정에 이어서 실행)
+- interrupted: --max-posts만큼만 조회하고 멈춤 (이어받기 위치 저장)
+- resume:      저장된 위치부터 나머지 과거 게시물 수집
+- unchanged:   새 게시물이 없을 때의 증분 동기화
+- new_posts:   새 게시물 --new-posts개가 올라온 뒤의 증분 동기화
+- full:        새 계정의 전체 수집을 한 번에 (비교용)
+
+    python -m benchmarks.bench_ingest
+    python -m benchmarks.bench_ingest --profile-posts 600 --max-posts 100 --page-latency 0.1
+"""
+import sys
+import time
+import argparse
+import tempfile
+from benchmarks.bench_pipeline import isolate_state
+from benchmarks.fake_services import FakeServiceConfig, start_fake_services
+
+OWNER = "bench_account"
+FULL_OWNER = "bench_full"
+
+def run_sync(services, owner, max_posts, min_views):
+    from owner_ingest import sync_owner
+    from results_store import get_results_store
+
+    services.reset_stats()
+    start = time.perf_counter()
+    result = sync_owner(owner, max_posts=max_posts, min_views=0)
+    seconds = time.perf_counter() - start
+    candidates = get_results_store().list_owner_reels(owner, min_views=min_views, pending_only=True)
+    return {
+        "seconds": seconds,
+        "pages": services.get_stats().get("profile_pages", 0),
+        "seen": result.seen,
+        "stored": result.stored,
+        "new": result.new,
+        "total": get_results_store().count_owner_reels(owner),
+        "candidates": len(candidates),
+        "backfill_done": result.backfill_done,
+        "error": result.error,
+    }
+
+def run(services, args):
+    rows = []
+    rows.append(("interrupted", run_sync(services, OWNER, args.max_posts, args.min_views)))
+    rows.append(("resume", run_sync(services, OWNER, 0, args.min_views)))
+    rows.append(("unchanged", run_sync(services, OWNER, 0, args.min_views)))
+    services.add_profile_posts(OWNER, args.new_posts)
+    rows.append(("new_posts", run_sync(services, OWNER, 0, args.min_views)))
+    rows.append(("full", run_sync(services, FULL_OWNER, 0, args.min_views)))
+    return rows
+
+def print_report(rows):
+    print(f"\n{'scenario':<12} {'seconds':>8} {'pages':>6} {'seen':>6} {'stored':>7} {'new':>5} {'total':>6} {'candidates':>10}  backfill")
+    for name, row in rows:
+        backfill = "done" if row["backfill_done"] else "pending"
+        if row["error"]:
+            backfill += f" (error: {row['error']})"
+        print(
+            f"{name:<12} {row['seconds']:>8.2f} {row['pages']:>6} {row['seen']:>6} {row['stored']:>7} "
+            f"{row['new']:>5} {row['total']:>6} {row['candidates']:>10}  {backfill}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile-posts", type=int, default=FakeServiceConfig.profile_posts)
+    parser.add_argument("--page-size", type=int, default=FakeServiceConfig.profile_page_size)
+    parser.add_argument("--page-latency", type=float, default=FakeServiceConfig.profile_page_latency)
+    parser.add_argument("--max-posts", type=int, default=50, help="interrupted 시나리오에서 조회할 게시물 수")
+    parser.add_argument("--new-posts", type=int, default=5)
+    parser.add_argument("--min-views", type=int, default=100000, help="분석 후보로 셀 조회수 기준")
+    args = parser.parse_args()
+
+    config = FakeServiceConfig(
+        profile_posts=args.profile_posts, profile_page_size=args.page_size, profile_page_latency=args.page_latency,
+    )
+    with tempfile.TemporaryDirectory(prefix="bench_ingest_") as workdir:
+        isolate_state(workdir, "thread")
+        with start_fake_services({}, config) as services:
+            services.install()
+            rows = run(services, args)
+    print_report(rows)
+    return 1 if any(row["error"] for _, row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""오프라인 파이프라인 벤치마크
+
+Instagram / CDN / OpenAI를 로컬 대체 서버(benchmarks.fake_services)로 바꾸고
+시나리오별 지연 시간과 처리량을 측정합니다. 실제 서비스나 API 키가 필요 없습니다.
+
+시나리오
+- single:        새 릴스 하나 (모든 캐시 미스)
+- cached_rerun:  같은 릴스, 같은 주제 재실행
+- topic_change:  같은 릴스, 다른 주제 (전사/정제 재사용, 분석만 새로)
+- extract:       새 릴스의 extract_reels_info만
+- download:      download_video (영상 파일 다운로드)
+- batch:         새 릴스 N개(기본 50) 동시 분석
+- duplicates:    새 릴스 하나를 --workers개 세션이 동시에 분석 (진행 중 요청 합치기, 서버 요청 수 확인)
+
+    python -m benchmarks.bench_pipeline --output bench.json
+    python -m benchmarks.bench_pipeline --baseline bench.json --tolerance 0.2   # 회귀 시 exit 1
+    python -m benchmarks.bench_pipeline --engine async --cdn-bandwidth 1000000 --scenarios single batch
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from dataclasses import fields
+from pathlib import Path
+from benchmarks.sample_media import ensure_sample_clips, SAMPLE_CLIPS
+from benchmarks.fake_services import FakeServiceConfig, start_fake_services
+
+SCENARIOS = ("single", "cached_rerun", "topic_change", "extract", "download", "batch", "duplicates")
+DEFAULT_TOPIC = "직장인 재테크"
+CHANGED_TOPIC = "대학생 용돈 관리"
+
+def isolate_state(workdir, engine):
+    """캐시, 결과 저장소, 로그를 작업 디렉터리로 돌립니다.
+
+    파이프라인 모듈은 import 시점에 이 설정을 읽으므로 import 전에 호출해야 합니다.
+    """
+    workdir = Path(workdir)
+    os.environ["REELS_CACHE_DIR"] = str(workdir / "cache")
+    os.environ["RESULTS_DB_PATH"] = str(workdir / "results.db")
+    os.environ["METRICS_LOG_PATH"] = str(workdir / "metrics.jsonl")
+    os.environ["INSTAGRAM_SESSION_DIR"] = str(workdir / "sessions")
+    os.environ["INSTRUMENTATION_SINKS"] = "jsonl,histogram"
+    os.environ["PIPELINE_ENGINE"] = engine
+    os.environ.setdefault("OPENAI_API_KEY", "bench-fake-key")
+
+def reel_url(shortcode):
+    return f"https://www.instagram.com/reel/{shortcode}/"
+
+def make_input_data(url, topic):
+    from batch_benchmark import empty_video_analysis
+
+    return {"url": url, "video_analysis": empty_video_analysis(), "content_info": {"topic": topic}}
+
+def _percentile(values, p):
+    from instrumentation import percentile
+
+    return percentile(sorted(values), p)
+
+class BenchmarkRunner:
+    def __init__(self, services, batch_size, workers):
+        self.services = services
+        self.batch_size = batch_size
+        self.workers = workers
+        self.first_url = None
+        self._counter = 0
+
+    def new_shortcode(self):
+        self._counter += 1
+        return f"BENCH{self._counter:04d}"
+
+    # ---- 시나리오: (릴스별 지연 시간 목록, 성공 수) 반환 ----
+
+    def _analyze(self, url, topic):
+        from reels_analysis import run_analysis_pipeline
+
+        start = time.perf_counter()
+        result = run_analysis_pipeline(url, make_input_data(url, topic))
+        return time.perf_counter() - start, "error" not in result
+
+    def scenario_single(self):
+        self.first_url = reel_url(self.new_shortcode())
+        latency, ok = self._analyze(self.first_url, DEFAULT_TOPIC)
+        return [latency], int(ok)
+
+    def scenario_cached_rerun(self):
+        latency, ok = self._analyze(self._first_url(), DEFAULT_TOPIC)
+        return [latency], int(ok)
+
+    def scenario_topic_change(self):
+        latency, ok = self._analyze(self._first_url(), CHANGED_TOPIC)
+        return [latency], int(ok)
+
+    def _first_url(self):
+        # single을 건너뛰었으면 캐시를 먼저 채움
+        if self.first_url is None:
+            self.scenario_single()
+        return self.first_url
+
+    def scenario_extract(self):
+        from reels_analysis import normalize_instagram_url
+        from reels_extraction import extract_reels_info
+
+        url = normalize_instagram_url(reel_url(self.new_shortcode()))
+        start = time.perf_counter()
+        info = extract_reels_info(url, make_input_data(url, DEFAULT_TOPIC)["video_analysis"])
+        return [time.perf_counter() - start], int(isinstance(info, dict))
+
+    def scenario_download(self):
+        from reels_analysis import normalize_instagram_url
+        from reels_extraction import download_video
+
+        url = normalize_instagram_url(reel_url(self.new_shortcode()))
+        start = time.perf_counter()
+        path = download_video(url)
+        latency = time.perf_counter() - start
+        if path:
+            os.remove(path)
+        return [latency], int(bool(path))
+
+    def scenario_batch(self):
+        from batch_benchmark import run_batch
+
+        urls = [reel_url(self.new_shortcode()) for _ in range(self.batch_size)]
+        results = run_batch(urls, DEFAULT_TOPIC, max_workers=self.workers, retries=0)
+        latencies = [result["elapsed"] for result in results]
+        return latencies, sum(1 for result in results if result["status"] == "ok")
+
+    def scenario_duplicates(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        url = reel_url(self.new_shortcode())
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(lambda _: self._analyze(url, DEFAULT_TOPIC), range(self.workers)))
+        return [latency for latency, _ in results], sum(1 for _, ok in results if ok)
+
+    def run(self, name):
+        from instrumentation import get_histogram, summarize
+
+        get_histogram().reset()
+        self.services.reset_stats()
+        start = time.perf_counter()
+        latencies, succeeded = getattr(self, f"scenario_{name}")()
+        wall = time.perf_counter() - start
+        return {
+            "reels": len(latencies),
+            "ok": succeeded,
+            "wall_s": round(wall, 3),
+            "p50_s": round(_percentile(latencies, 50), 3),
+            "p95_s": round(_percentile(latencies, 95), 3),
+            "reels_per_min": round(len(latencies) / max(wall, 1e-9) * 60, 2),
+            "stages": summarize(get_histogram().records()),
+            "server": self.services.get_stats(),
+        }
+
+def print_report(report):
+    print(f"\n{'scenario':<14} {'reels':>5} {'ok':>4} {'wall_s':>8} {'p50_s':>7} {'p95_s':>7} {'reels/min':>10}")
+    for name, row in report["scenarios"].items():
+        print(
+            f"{name:<14} {row['reels']:>5} {row['ok']:>4} {row['wall_s']:>8.2f} "
+            f"{row['p50_s']:>7.2f} {row['p95_s']:>7.2f} {row['reels_per_min']:>10.1f}"
+        )
+    for name, row in report["scenarios"].items():
+        print(f"\n[{name}] 단계별")
+        for stage, stats in row["stages"].items():
+            hit_rate = f"{stats['hit_rate']:.0%}" if stats["hit_rate"] is not None else "-"
+            print(
+                f"  {stage:<20} n={stats['count']:<4} p50={stats['p50']:.3f}s p95={stats['p95']:.3f}s "
+                f"hit={hit_rate:<5} KB={stats['bytes'] / 1024:.0f} tokens={stats['prompt_tokens']}/{stats['completion_tokens']} cached={stats['cached_tokens']}"
+            )
+
+def compare_with_baseline(report, baseline, tolerance):
+    """기준 리포트 대비 p95 증가 / 처리량 감소가 허용치를 넘는 시나리오를 찾습니다."""
+    if baseline.get("config") != report["config"]:
+        print("⚠️ 기준 리포트와 대체 서버 설정이 다릅니다. 비교 결과를 주의해서 보세요.")
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        if previous["p95_s"] and current["p95_s"] > previous["p95_s"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_s']:.2f}s → {current['p95_s']:.2f}s")
+        if current["reels_per_min"] < previous["reels_per_min"] * (1 - tolerance):
+            regressions.append(f"{name}: 처리량 {previous['reels_per_min']:.1f} → {current['reels_per_min']:.1f}개/분")
+        if current["ok"] < previous["ok"]:
+            regressions.append(f"{name}: 성공 {previous['ok']} → {current['ok']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="*", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8, help="배치 동시 진행 릴스 수")
+    parser.add_argument("--engine", choices=["thread", "async"], default="thread")
+    parser.add_argument("--clips", nargs="*", choices=list(SAMPLE_CLIPS), default=["reel_15s", "reel_30s"])
+    for field in fields(FakeServiceConfig):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=field.type, default=field.default)
+    parser.add_argument("--output", help="리포트를 JSON으로 저장할 경로")
+    parser.add_argument("--baseline", help="비교할 이전 리포트(JSON)")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="회귀로 판단할 변화율")
+    parser.add_argument("--workdir", help="캐시/DB/로그 작업 디렉터리 (기본: 새 임시 디렉터리)")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="reels-bench-")
+    isolate_state(workdir, args.engine)
+    config = FakeServiceConfig(**{field.name: getattr(args, field.name) for field in fields(FakeServiceConfig)})
+    clips = ensure_sample_clips(args.clips)
+
+    with start_fake_services(clips, config) as services:
+        services.install()
+        print(f"🚀 대체 서버 {services.base_url} / 엔진 {args.engine} / 작업 디렉터리 {workdir}")
+        runner = BenchmarkRunner(services, args.batch_size, args.workers)
+        report = {
+            "config": config.to_dict(),
+            "engine": args.engine,
+            "clips": args.clips,
+            "scenarios": {},
+        }
+        for name in args.scenarios:
+            print(f"▶ {name}")
+            report["scenarios"][name] = runner.run(name)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ 리포트 저장: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_with_baseline(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ 성능 회귀:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\n✅ 기준 대비 회귀 없음")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
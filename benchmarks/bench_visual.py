@@ -0,0 +1,97 @@
+"""화면 분석(프레임 샘플링) 벤치마크
+
+로컬 샘플 클립에서 프레임 추출 방식별 시간, 디코딩한 프레임 수, 파이프로 받은 바이트,
+ffmpeg 최대 메모리(RSS)를 비교합니다.
+
+- naive:     전체 영상을 원본 해상도로 디코딩하며 초당 --naive-fps장 샘플링
+- intro:     초반 구간만 읽고 저해상도로 샘플링 (visual_analysis.build_intro_command)
+- keyframes: 키프레임만 디코딩하고 장면 전환 프레임만 선택 (visual_analysis.build_keyframe_command)
+- analyze:   analyze_video_frames 전체 (intro + keyframes + OCR, Tesseract가 있을 때)
+
+    python -m benchmarks.bench_visual
+    python -m benchmarks.bench_visual --clips reel_60s --frame-width 240 --repeat 3
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+import visual_analysis
+from benchmarks.sample_media import ensure_sample_clips, ensure_scene_clip, SAMPLE_CLIPS, SCENE_CLIP
+
+def build_naive_command(source, fps):
+    return [
+        'ffmpeg', '-hide_banner', '-nostdin', '-i', source, '-an',
+        '-vf', f"fps={fps:g},format=gray", '-c:v', 'pgm', '-f', 'image2pipe', 'pipe:1'
+    ]
+
+def run_command(command):
+    """(초, 출력 바이트, 프레임 수, ffmpeg 최대 RSS(MB))"""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    data = process.stdout.read()
+    # wait4로 이 ffmpeg 프로세스만의 자원 사용량을 받음
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+    frames = len(visual_analysis.parse_pgm_stream(data))
+    # Linux의 ru_maxrss 단위는 KB
+    return time.perf_counter() - start, len(data), frames, usage.ru_maxrss / 1024
+
+def run(clips, args):
+    rows = []
+    for clip, path in clips.items():
+        modes = {
+            "naive": build_naive_command(path, args.naive_fps),
+            "intro": visual_analysis.build_intro_command(path),
+            "keyframes": visual_analysis.build_keyframe_command(path),
+        }
+        for name, command in modes.items():
+            seconds, sent, frames, rss = min(run_command(command) for _ in range(args.repeat))
+            rows.append({"clip": clip, "mode": name, "seconds": seconds, "sent": sent, "frames": frames, "rss_mb": rss})
+
+        runs = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            visual = visual_analysis.analyze_video_frames(path)
+            runs.append((time.perf_counter() - start, visual))
+        seconds, visual = min(runs, key=lambda run: run[0])
+        rows.append({
+            "clip": clip, "mode": "analyze", "seconds": seconds, "sent": None, "frames": visual["frames"], "rss_mb": None,
+            "summary": f"intro_cuts={visual['intro_cuts']} scenes={len(visual['scenes'])} ocr={visual['ocr']} "
+                       f"text={len(visual['intro_text']) + sum(len(scene['text']) for scene in visual['scenes'])}자",
+        })
+    return rows
+
+def print_report(rows):
+    print(f"\n{'clip':<10} {'mode':<10} {'seconds':>8} {'vs naive':>9} {'frames':>7} {'MB':>8} {'rss MB':>7}")
+    naive = {row["clip"]: row["seconds"] for row in rows if row["mode"] == "naive"}
+    for row in rows:
+        sent = f"{row['sent'] / 1e6:.2f}" if row["sent"] is not None else "-"
+        rss = f"{row['rss_mb']:.0f}" if row["rss_mb"] is not None else "-"
+        print(
+            f"{row['clip']:<10} {row['mode']:<10} {row['seconds']:>8.3f} {naive[row['clip']] / row['seconds']:>8.1f}x "
+            f"{row['frames']:>7} {sent:>8} {rss:>7}  {row.get('summary', '')}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", nargs="*", choices=[*SAMPLE_CLIPS, SCENE_CLIP], default=[SCENE_CLIP, "reel_30s"])
+    parser.add_argument("--naive-fps", type=float, default=visual_analysis.VISUAL_INTRO_FPS)
+    parser.add_argument("--frame-width", type=int, default=visual_analysis.VISUAL_FRAME_WIDTH)
+    parser.add_argument("--repeat", type=int, default=1, help="설정별 반복 횟수 (최솟값 사용)")
+    args = parser.parse_args()
+
+    # 환경 변수와 같은 효과
+    visual_analysis.VISUAL_FRAME_WIDTH = args.frame_width
+    names = [clip for clip in args.clips if clip in SAMPLE_CLIPS]
+    clips = ensure_sample_clips(names) if names else {}
+    if SCENE_CLIP in args.clips:
+        clips = {SCENE_CLIP: ensure_scene_clip(), **clips}
+    rows = run(clips, args)
+    print_report(rows)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""앱 모듈 import 시간 예산 점검
+
+각 모듈을 새 인터프리터에서 import하여
+1) import에 걸린 시간이 예산 안인지,
+2) 입력 폼 렌더링에 필요 없는 무거운 의존성(instaloader, openai, pandas 등)이 로드되지 않았는지
+확인합니다. 하나라도 어기면 exit 1로 끝나므로 배포 전 점검에 쓸 수 있습니다.
+
+    python -m benchmarks.check_import_time
+    python -m benchmarks.check_import_time --budget app=1.5 --budget reels_extraction=0.3 --top 15
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# 모듈: import 시간 예산(초)
+DEFAULT_BUDGETS = {
+    "reels_extraction": 0.5,
+    "reels_analysis": 0.6,
+    "app": 2.5,
+}
+
+# 첫 사용 시에만 로드되어야 하는 의존성
+HEAVY_MODULES = ("instaloader", "openai", "httpx", "requests", "pandas", "numpy", "torch", "whisper", "faster_whisper")
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def probe(module):
+    """새 인터프리터에서 module을 import하고 (시간, 로드된 무거운 모듈, -X importtime 출력)을 반환합니다."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT_DIR))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} import 실패:\n{result.stderr.strip().splitlines()[-1:]}")
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return report["seconds"], report["loaded"], result.stderr
+
+def top_imports(importtime_output, count):
+    """-X importtime 출력에서 자체 import 시간이 큰 모듈 상위 count개"""
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+def parse_budgets(values):
+    budgets = dict(DEFAULT_BUDGETS)
+    for value in values or []:
+        module, seconds = value.split("=")
+        budgets[module] = float(seconds)
+    return budgets
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", action="append", help="모듈=초 (여러 번 지정 가능)")
+    parser.add_argument("--repeat", type=int, default=3, help="모듈별 측정 횟수 (최솟값 사용)")
+    parser.add_argument("--top", type=int, default=10, help="자체 import 시간이 큰 모듈 출력 수")
+    args = parser.parse_args()
+
+    budgets = parse_budgets(args.budget)
+    # streamlit이 스스로 가져오는 모듈은 app의 책임이 아니므로 제외
+    _, streamlit_loaded, _ = probe("streamlit")
+
+    failures = []
+    for module, budget in budgets.items():
+        runs = [probe(module) for _ in range(max(args.repeat, 1))]
+        seconds, loaded, importtime_output = min(runs, key=lambda run: run[0])
+        allowed = set(streamlit_loaded) if module == "app" else set()
+        unexpected = [name for name in loaded if name not in allowed]
+
+        mark = "✅" if seconds <= budget and not unexpected else "❌"
+        print(f"{mark} {module}: {seconds:.3f}초 (예산 {budget:.2f}초)")
+        if unexpected:
+            print(f"   ⚠️ 시작 시 로드된 무거운 모듈: {', '.join(unexpected)}")
+        for self_us, cumulative_us, name in top_imports(importtime_output, args.top):
+            print(f"   {self_us / 1000:>8.1f}ms self {cumulative_us / 1000:>8.1f}ms total  {name}")
+
+        if seconds > budget:
+            failures.append(f"{module}: {seconds:.3f}초 > {budget:.2f}초")
+        if unexpected:
+            failures.append(f"{module}: {', '.join(unexpected)} 즉시 로드")
+
+    if failures:
+        print("\n❌ import 시간 예산 초과:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n✅ 모든 모듈이 예산 안에서 import됩니다.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
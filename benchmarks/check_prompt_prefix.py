@@ -0,0 +1,96 @@
+"""분석 프롬프트 캐시 배치 점검
+
+OpenAI 프롬프트 캐싱은 요청 앞부분이 1024토큰 이상 바이트 단위로 같을 때만 적용됩니다.
+1) 주제/스크립트/캡션/영상 분석 입력을 바꿔가며 분석 요청을 만들어 시스템 메시지가 모두 같은지,
+2) 그 고정 앞부분이 캐싱 최소 길이 이상인지 확인합니다. 하나라도 어기면 exit 1로 끝납니다.
+
+--live N을 주면 실제(또는 OPENAI_BASE_URL로 지정한 대체) 서버에 주제만 바꾼 분석을 N번 보내
+usage의 cached_tokens와 첫 토큰까지의 시간을 출력합니다.
+
+    python -m benchmarks.check_prompt_prefix
+    python -m benchmarks.check_prompt_prefix --live 3
+"""
+import sys
+import argparse
+from reels_analysis import ANALYSIS_SYSTEM_PROMPT, build_analysis_request, stream_analysis_with_gpt4
+from prompt_builder import count_tokens
+from instrumentation import get_histogram
+
+# OpenAI 프롬프트 캐싱 최소 길이 (토큰)
+MIN_CACHED_PREFIX_TOKENS = 1024
+
+SAMPLE_TOPICS = ["", "다이어트 식단", "월급 관리 꿀팁", "강아지 산책 루틴"]
+SAMPLE_INFOS = [
+    {"refined_transcript": "이것 하나만 있으면 월급이 두 배가 됩니다.", "caption": "✨꿀팁 공개✨\n#재테크"},
+    {"refined_transcript": "", "caption": ""},
+    {"refined_transcript": "오늘은 아침 루틴을 알려드릴게요. " * 400, "caption": "#루틴 " * 200},
+    {
+        "refined_transcript": "딱 3가지만 기억하세요.",
+        "caption": "저장 필수📌",
+        "visual": {"intro_text": "월급 200 → 400", "intro_cuts": 2, "scenes": [{"time": 4.5, "text": "STEP 1"}], "frames": 7, "ocr": True},
+    },
+]
+
+def sample_input(topic, index=0):
+    return {
+        "video_analysis": {
+            "intro_copy": f"카피 {index}",
+            "intro_structure": f"구성 {index}",
+            "narration": "있음" if index % 2 else "없음",
+            "music": "트렌디한 BGM",
+            "font": "굵은 고딕",
+        },
+        "content_info": {"topic": topic},
+    }
+
+def check_prefix():
+    """(실패 목록, 고정 앞부분 토큰 수)"""
+    failures = []
+    prefix = ANALYSIS_SYSTEM_PROMPT.encode("utf-8")
+    for index, (info, topic) in enumerate((info, topic) for info in SAMPLE_INFOS for topic in SAMPLE_TOPICS):
+        messages = build_analysis_request(info, sample_input(topic, index)).messages
+        system = messages[0]
+        if system["role"] != "system" or system["content"].encode("utf-8") != prefix:
+            failures.append(f"주제={topic!r}, 스크립트 {len(info['refined_transcript'])}자: 시스템 메시지가 다름")
+        elif topic and topic in system["content"]:
+            failures.append(f"주제 {topic!r}가 시스템 메시지에 들어감")
+    prefix_tokens = count_tokens(ANALYSIS_SYSTEM_PROMPT)
+    if prefix_tokens < MIN_CACHED_PREFIX_TOKENS:
+        failures.append(f"고정 앞부분 {prefix_tokens}토큰 < 캐싱 최소 {MIN_CACHED_PREFIX_TOKENS}토큰")
+    return failures, prefix_tokens
+
+def run_live(count):
+    """주제만 바꾼 분석을 count번 보내고 usage의 캐시 토큰 수를 출력합니다."""
+    info = SAMPLE_INFOS[0]
+    print(f"\n{'run':>3} {'prompt':>7} {'cached':>7} {'ttft_s':>7}")
+    for run in range(count):
+        # 주제가 다르면 분석 캐시 키도 달라 매번 실제 요청이 나감
+        for _ in stream_analysis_with_gpt4(info, sample_input(f"점검 주제 {run}")):
+            pass
+        record = next(record for record in reversed(get_histogram().records()) if record["stage"] == "analysis")
+        ttft = record.get("ttft")
+        print(
+            f"{run + 1:>3} {record.get('prompt_tokens', '-'):>7} {record.get('cached_tokens', '-'):>7} "
+            f"{ttft if ttft is not None else '-':>7}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", type=int, default=0, help="실제 서버로 보낼 분석 요청 수")
+    args = parser.parse_args()
+
+    failures, prefix_tokens = check_prefix()
+    print(f"고정 시스템 메시지: {len(ANALYSIS_SYSTEM_PROMPT.encode('utf-8'))}바이트, {prefix_tokens}토큰")
+    if failures:
+        print("\n❌ 프롬프트 캐시 배치 점검 실패:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print(f"✅ {len(SAMPLE_INFOS) * len(SAMPLE_TOPICS)}개 요청의 시스템 메시지가 모두 동일합니다.")
+
+    if args.live:
+        run_live(args.live)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,462 @@
+"""벤치마크용 로컬 대체 서비스
+
+실제 서비스 대신 지연 시간과 처리량을 조절할 수 있는 로컬 서버를 띄웁니다.
+- Instagram 메타데이터: FakeSessionManager (Post.from_shortcode 대신 FakePost 반환)
+- Instagram 프로필: FakeSessionManager.iter_profile_posts (페이지 단위로 지연되는 최신순 게시물 목록)
+- CDN: /cdn/<클립>.mp4 (Range 요청 지원, 대역폭 제한)
+- OpenAI: /v1/audio/transcriptions, /v1/chat/completions (스트리밍 포함), /v1/models/<모델>
+
+    with start_fake_services(ensure_sample_clips(), FakeServiceConfig(cdn_bandwidth=2_000_000)) as services:
+        services.install()   # OPENAI_BASE_URL 설정 + 세션 관리자 교체
+        ...
+"""
+import os
+import re
+import json
+import time
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrency import limit
+
+# 스트리밍 청크 크기 (CDN 대역폭 제한 단위)
+CDN_BLOCK_SIZE = 64 * 1024
+FAKE_TRANSCRIPT = "오늘은 월급 관리 꿀팁 세 가지를 알려드릴게요. 첫째, 통장을 나누세요. 둘째, 고정비를 줄이세요. 셋째, 자동 이체로 먼저 저축하세요."
+
+@dataclass
+class FakeServiceConfig:
+    """대체 서비스의 지연 시간(초)과 처리량"""
+    metadata_latency: float = 0.3
+    cdn_latency: float = 0.05
+    cdn_bandwidth: float = 5_000_000  # bytes/s, 0이면 제한 없음
+    whisper_latency: float = 1.0
+    chat_latency: float = 0.5
+    chat_tokens_per_second: float = 200  # 0이면 제한 없음
+    analysis_chars: int = 3000
+    profile_posts: int = 120        # 계정마다 가진 게시물 수
+    profile_page_size: int = 12     # 프로필 목록 한 페이지의 게시물 수
+    profile_page_latency: float = 0.3
+    profile_video_ratio: float = 0.75  # 게시물 중 릴스(영상) 비율
+
+    def to_dict(self):
+        return asdict(self)
+
+def build_fake_analysis(topic, length):
+    """analyze_with_gpt4 결과와 같은 섹션 구성의 가짜 분석 텍스트"""
+    sections = [
+        "# 1. 주제:\n- **설명: 월급 관리 꿀팁**\n- ✅ **공유 및 저장**: \"꿀팁 세 가지\"\n",
+        "# 2. 초반 3초\n## 카피라이팅 :\n- ✅ **구체적 수치**: \"세 가지\"\n",
+        "# 3. 내용 구성: \n- ✅ **문제해결**: \"통장을 나누세요\"\n",
+        "# 4. 개선할 점:\n- ❌ **권위 강조**: 경력 소개 추가\n",
+        "# 5. 적용할 점:\n- ✅ **구체적 수치**: 숫자로 시작하기\n",
+        f"# 6. 벤치마킹 적용 기획:\n- 입력하신 주제 \"{topic}\"에 대한 벤치마킹 적용 기획입니다.\n",
+    ]
+    text = "\n".join(sections)
+    filler = "- 원본 구조를 그대로 활용한 예시 문장입니다.\n"
+    while len(text) < length:
+        text += filler
+    return text
+
+def _between(text, start, end):
+    match = re.search(re.escape(start) + r"(.*?)" + re.escape(end), text, re.S)
+    return match.group(1).strip() if match else ""
+
+class FakePost:
+    """instaloader.Post에서 post_to_metadata가 읽는 속성만 흉내 냅니다."""
+
+    def __init__(self, shortcode, video_url, date=None, view_count=120000, owner="bench_owner",
+                 is_video=True, is_pinned=False):
+        self.shortcode = shortcode
+        self.date = date or datetime(2025, 1, 30, 14, 43, 9)
+        self.caption = f"✨월급 관리 꿀팁 공개✨ ({shortcode})\n\n#재테크 #월급"
+        self.video_view_count = view_count if is_video else None
+        self.video_duration = 30.0
+        self.likes = 3400
+        self.comments = 120
+        self.owner_username = owner
+        self.is_video = is_video
+        self.is_pinned = is_pinned
+        self.video_url = video_url
+
+class FakeProfilePosts:
+    """instaloader NodeIterator처럼 페이지 단위로 게시물을 가져오는 최신순 이터레이터
+
+    첫 페이지 맨 앞에는 고정 게시물(가장 오래된 게시물)이 옵니다. freeze()/cursor로 이어받기를 흉내 냅니다.
+    다음 페이지 조회는 호출자가 잡은 Instagram 동시 실행 한도 안에서 일어나므로 여기서 다시 limit()를 잡지 않습니다.
+    """
+
+    def __init__(self, services, posts, offset=0):
+        self.services = services
+        self.posts = posts
+        self.offset = offset
+        self._page = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self._page:
+            if self.offset >= len(self.posts):
+                raise StopIteration
+            config = self.services.config
+            with self.services.lock:
+                self.services.stats["profile_pages"] = self.services.stats.get("profile_pages", 0) + 1
+            time.sleep(config.profile_page_latency)
+            self._page = list(self.posts[self.offset:self.offset + config.profile_page_size])
+            self.offset += len(self._page)
+        return self._page.pop(0)
+
+    def freeze(self):
+        """아직 돌려주지 않은 게시물이 남은 페이지는 처음부터 다시 읽도록 페이지 시작 위치를 저장합니다."""
+        size = self.services.config.profile_page_size
+        start = self.offset - size if self._page else self.offset
+        return {"offset": max(start, 0)}
+
+class FakeSessionManager:
+    """InstagramSessionManager와 같은 인터페이스로 FakePost를 반환합니다."""
+
+    def __init__(self, services):
+        self.services = services
+        self.has_credentials = True
+        self.is_logged_in = True
+        self._lock = threading.Lock()
+        self._stats = {"logins": 0, "relogins": 0, "login_failures": 0, "session_loads": 0, "fetches": 0}
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def get_loader(self):
+        return None
+
+    @property
+    def context(self):
+        return None
+
+    def relogin(self):
+        return True
+
+    def fetch_post(self, shortcode):
+        with self._lock:
+            self._stats["fetches"] += 1
+        with limit("instagram"):
+            time.sleep(self.services.config.metadata_latency)
+        return FakePost(shortcode, self.services.video_url(shortcode))
+
+    def iter_profile_posts(self, owner, cursor=None):
+        with self._lock:
+            self._stats["fetches"] += 1
+        with limit("instagram"):
+            time.sleep(self.services.config.metadata_latency)
+        offset = json.loads(cursor)["offset"] if cursor else 0
+        return FakeProfilePosts(self.services, self.services.profile_posts(owner), offset)
+
+    def freeze_posts(self, posts):
+        return json.dumps(posts.freeze())
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive (커넥션 재사용 측정용)
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def services(self):
+        return self.server.services
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self, key, amount=1):
+        with self.services.lock:
+            self.services.stats[key] = self.services.stats.get(key, 0) + amount
+
+    # ---- CDN ----
+
+    def _serve_video(self, head_only=False):
+        name = self.path.split("?")[0].rsplit("/", 1)[-1]
+        path = self.services.clips.get(name.removesuffix(".mp4"))
+        if path is None:
+            self._send_json({"error": "not found"}, status=404)
+            return
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range")
+        if range_header:
+            match = re.match(r"bytes=(\d*)-(\d*)", range_header)
+            if match and match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            elif match and match.group(2):
+                start = max(size - int(match.group(2)), 0)
+        if start >= size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        time.sleep(self.services.config.cdn_latency)
+        self.send_response(206 if range_header else 200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if range_header:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if head_only:
+            return
+
+        self._count("cdn_requests")
+        bandwidth = self.services.config.cdn_bandwidth
+        with open(path, "rb") as video_file:
+            video_file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                block = video_file.read(min(CDN_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                try:
+                    self.wfile.write(block)
+                except (BrokenPipeError, ConnectionResetError):
+                    return  # ffmpeg 등 클라이언트가 중간에 끊는 경우
+                remaining -= len(block)
+                self._count("cdn_bytes", len(block))
+                if bandwidth:
+                    time.sleep(len(block) / bandwidth)
+
+    # ---- OpenAI ----
+
+    def _transcription(self):
+        body = self._read_body()
+        self._count("whisper_requests")
+        self._count("whisper_bytes", len(body))
+        time.sleep(self.services.config.whisper_latency)
+        self._send_json({"text": FAKE_TRANSCRIPT})
+
+    def _chat(self):
+        request = json.loads(self._read_body() or b"{}")
+        self._count("chat_requests")
+        messages = request.get("messages", [])
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        if "---스크립트---" in prompt:
+            # 정제 요청: 원본 스크립트/캡션을 그대로 돌려줌 (릴스마다 다른 분석 키 유지)
+            transcript = _between(prompt, "원본 스크립트:", "원본 캡션:")
+            caption = _between(prompt, "원본 캡션:", "영상 분석 내용:")
+            content = f"---스크립트---\n{transcript}\n---캡션---\n{caption}"
+        else:
+            topic = _between(prompt, "벤치마킹할 새로운 주제:", "\n")
+            content = build_fake_analysis(topic, self.services.config.analysis_chars)
+
+        prompt_tokens = max(len(prompt) // 2, 1)
+        completion_tokens = max(len(content) // 2, 1)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": self._cached_prefix_tokens(messages)},
+        }
+        time.sleep(self.services.config.chat_latency)
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            self._stream_chat(request.get("model", "gpt-4o"), content, usage if include_usage else None)
+            return
+
+        tokens_per_second = self.services.config.chat_tokens_per_second
+        if tokens_per_second:
+            time.sleep(completion_tokens / tokens_per_second)
+        self._send_json({
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        })
+
+    def _cached_prefix_tokens(self, messages):
+        """OpenAI처럼 이전에 본 시스템 메시지가 1024토큰 이상이면 128토큰 단위로 캐시 처리"""
+        if not messages or messages[0].get("role") != "system":
+            return 0
+        prefix = str(messages[0].get("content", ""))
+        with self.services.lock:
+            seen = prefix in self.services.seen_prefixes
+            self.services.seen_prefixes.add(prefix)
+        tokens = len(prefix) // 2
+        if not seen or tokens < 1024:
+            return 0
+        self._count("chat_cached_tokens", tokens // 128 * 128)
+        return tokens // 128 * 128
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    def _write_event(self, payload):
+        data = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False)
+        self._write_chunk(f"data: {data}\n\n".encode("utf-8"))
+
+    def _stream_chat(self, model, content, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        tokens_per_second = self.services.config.chat_tokens_per_second
+        # 약 2글자 = 1토큰으로 보고 토큰 단위로 나눠 전송
+        pieces = [content[i:i + 2] for i in range(0, len(content), 2)]
+        for piece in pieces:
+            self._write_event(chunk({"content": piece}))
+            if tokens_per_second:
+                time.sleep(1 / tokens_per_second)
+        self._write_event(chunk({}, "stop"))
+        if usage:
+            self._write_event({
+                "id": "chatcmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            })
+        self._write_event("[DONE]")
+        self._write_chunk(b"")
+
+    def _model(self):
+        self._send_json({"id": self.path.rsplit("/", 1)[-1], "object": "model", "created": 0, "owned_by": "bench"})
+
+    def do_HEAD(self):
+        if self.path.startswith("/cdn/"):
+            self._serve_video(head_only=True)
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_GET(self):
+        if self.path.startswith("/cdn/"):
+            self._serve_video()
+        elif self.path.startswith("/v1/models/"):
+            self._model()
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if self.path.startswith("/v1/audio/transcriptions"):
+            self._transcription()
+        elif self.path.startswith("/v1/chat/completions"):
+            self._chat()
+        else:
+            self._read_body()
+            self._send_json({"error": "not found"}, status=404)
+
+class FakeServices:
+    """로컬 HTTP 서버 하나로 CDN과 OpenAI를 대신합니다."""
+
+    def __init__(self, clips, config=None):
+        self.clips = {name: str(path) for name, path in clips.items()}
+        self.config = config or FakeServiceConfig()
+        self.stats = {}
+        self.lock = threading.Lock()
+        # 한 번 본 시스템 메시지 (OpenAI 프롬프트 캐시 흉내)
+        self.seen_prefixes = set()
+        # 계정별로 새로 올라온 게시물 수 (add_profile_posts)
+        self.new_posts = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.services = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self):
+        return f"{self.base_url}/v1"
+
+    def video_url(self, shortcode):
+        """숏코드마다 클립 하나를 돌려가며 배정합니다 (oe는 충분히 먼 만료 시각)."""
+        names = sorted(self.clips)
+        name = names[sum(shortcode.encode("utf-8")) % len(names)]
+        expiry = format(int(time.time()) + 24 * 3600, "x")
+        return f"{self.base_url}/cdn/{name}.mp4?oe={expiry}"
+
+    def profile_posts(self, owner):
+        """계정의 게시물 목록 (최신순, 고정 게시물이 맨 앞). 하루에 하나씩 올린 것으로 만듭니다."""
+        config = self.config
+        with self.lock:
+            total = config.profile_posts + self.new_posts.get(owner, 0)
+        newest = datetime.now().replace(microsecond=0) - timedelta(days=30)
+        posts = []
+        for index in range(total):
+            number = total - index  # 게시 순번 (오래된 게시물이 1)
+            shortcode = f"{owner[:6]}{number:05d}"
+            # 전체의 profile_video_ratio만큼 고르게 영상
+            is_video = int(number * config.profile_video_ratio) != int((number - 1) * config.profile_video_ratio)
+            posts.append(FakePost(
+                shortcode, None, date=newest - timedelta(days=index - self.new_posts.get(owner, 0)),
+                view_count=(number * 7919) % 200000, owner=owner, is_video=is_video,
+            ))
+        pinned = posts.pop()
+        pinned.is_pinned = True
+        return [pinned, *posts]
+
+    def add_profile_posts(self, owner, count):
+        """계정에 새 게시물 count개를 올립니다 (증분 동기화 측정용)."""
+        with self.lock:
+            self.new_posts[owner] = self.new_posts.get(owner, 0) + count
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-services", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def install(self):
+        """파이프라인이 이 서버를 쓰도록 OpenAI 주소와 Instagram 세션 관리자를 교체합니다.
+
+        OpenAI 클라이언트는 처음 사용할 때 만들어지므로 파이프라인 실행 전에 호출해야 합니다.
+        """
+        from instagram_session import set_session_manager
+
+        os.environ["OPENAI_BASE_URL"] = self.openai_base_url
+        os.environ.setdefault("OPENAI_API_KEY", "bench-fake-key")
+        set_session_manager(FakeSessionManager(self))
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {}
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+@contextmanager
+def start_fake_services(clips, config=None):
+    services = FakeServices(clips, config).start()
+    try:
+        yield services
+    finally:
+        services.stop()
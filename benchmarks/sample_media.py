@@ -0,0 +1,63 @@
+"""벤치마크용 샘플 클립 생성
+
+ffmpeg의 lavfi 소스로 음성 대역 톤 + 무음 구간이 섞인 짧은 MP4를 만듭니다.
+생성된 파일은 benchmarks/media/ 에 저장되며 git에는 포함하지 않습니다.
+"""
+import subprocess
+from pathlib import Path
+
+MEDIA_DIR = Path(__file__).parent / "media"
+
+# 클립 이름: 길이(초)
+SAMPLE_CLIPS = {
+    "reel_15s": 15,
+    "reel_30s": 30,
+    "reel_60s": 60,
+}
+
+# 4초마다 3초 톤 + 1초 무음 (말하다 쉬는 나레이션 흉내)
+AUDIO_SOURCE = "aevalsrc='if(lt(mod(t,4),3),0.4*sin(2*PI*(300+200*sin(t))*t),0)':s=44100"
+
+def ensure_sample_clips(names=None):
+    """샘플 클립이 없으면 생성하고 {이름: 경로}를 반환합니다."""
+    MEDIA_DIR.mkdir(parents=True, exist_ok=True)
+    clips = {}
+    for name in names or SAMPLE_CLIPS:
+        duration = SAMPLE_CLIPS[name]
+        path = MEDIA_DIR / f"{name}.mp4"
+        if not path.exists():
+            command = [
+                'ffmpeg', '-y',
+                '-f', 'lavfi', '-i', f"testsrc2=size=720x1280:rate=30:duration={duration}",
+                '-f', 'lavfi', '-i', f"{AUDIO_SOURCE}:d={duration}",
+                '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+                '-c:a', 'aac', '-b:a', '128k',
+                '-movflags', '+faststart',
+                '-shortest',
+                str(path)
+            ]
+            subprocess.run(command, check=True, capture_output=True)
+        clips[name] = str(path)
+    return clips
+
+# 화면 분석 벤치마크용: 5초마다 서로 다른 화면으로 바뀌는 무음 클립 (testsrc에는 숫자 카운터가 있어 OCR 확인 가능)
+SCENE_CLIP = "reel_cuts"
+SCENE_SOURCES = ("testsrc", "smptebars", "testsrc2", "rgbtestsrc")
+
+def ensure_scene_clip(seconds_per_scene=5):
+    """장면 전환이 있는 샘플 클립이 없으면 생성하고 경로를 반환합니다."""
+    MEDIA_DIR.mkdir(parents=True, exist_ok=True)
+    path = MEDIA_DIR / f"{SCENE_CLIP}.mp4"
+    if not path.exists():
+        command = ['ffmpeg', '-y']
+        for source in SCENE_SOURCES:
+            command += ['-f', 'lavfi', '-i', f"{source}=size=720x1280:rate=30:duration={seconds_per_scene}"]
+        inputs = "".join(f"[{index}:v]" for index in range(len(SCENE_SOURCES)))
+        command += [
+            '-filter_complex', f"{inputs}concat=n={len(SCENE_SOURCES)}:v=1:a=0",
+            '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+            '-movflags', '+faststart',
+            str(path)
+        ]
+        subprocess.run(command, check=True, capture_output=True)
+    return str(path)
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+# 캐시 기본 저장 위치
+CACHE_DIR = Path(os.getenv("REELS_CACHE_DIR", Path(__file__).parent / ".cache"))
+
+# 캐시 미스 표시용 (None 값도 캐시할 수 있도록 별도 객체 사용)
+MISS = object()
+
+def make_cache_key(*parts):
+    """JSON 직렬화 가능한 값들로 안정적인 캐시 키(sha256)를 만듭니다."""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class TieredCache:
+    """메모리 LRU + 디스크(JSON) 2단계 캐시.
+
+    값은 JSON 직렬화 가능해야 하며, 항목마다 TTL(초)을 둘 수 있습니다.
+    max_disk_bytes를 지정하면 디스크 용량이 넘을 때 가장 오래 쓰이지 않은 파일부터 지웁니다.
+    """
+
+    def __init__(self, name, maxsize=256, ttl=3600, cache_dir=CACHE_DIR, disk=True, max_disk_bytes=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_dir = Path(cache_dir) / name if disk else None
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.RLock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._disk_bytes = None
+
+    def _disk_path(self, key):
+        digest = hashlib.sha256(str(key).encode("utf-8")).hexdigest()
+        return self.disk_dir / f"{digest}.json"
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats, memory_size=len(self._memory))
+            stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+            if self._disk_bytes is not None:
+                stats["disk_bytes"] = self._disk_bytes
+            return stats
+
+    def _disk_entries(self):
+        entries = []
+        for path in self.disk_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+            except FileNotFoundError:
+                pass
+        return entries
+
+    def _enforce_disk_limit(self, added_bytes):
+        """디스크 용량 제한을 넘으면 mtime(마지막 사용 시각)이 오래된 파일부터 삭제합니다."""
+        if self.max_disk_bytes is None:
+            return
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            else:
+                self._disk_bytes += added_bytes
+            if self._disk_bytes <= self.max_disk_bytes:
+                return
+
+            entries = sorted(self._disk_entries())
+            total = sum(size for _, size, _ in entries)
+            # 매번 정리하지 않도록 제한의 90%까지 비움
+            target = self.max_disk_bytes * 0.9
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self._stats["evictions"] += 1
+            self._disk_bytes = total
+
+    def _remember(self, key, expires_at, value):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def get(self, key, default=MISS):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    record = json.load(f)
+                if record["key"] == key and record["expires_at"] > now:
+                    if self.max_disk_bytes is not None:
+                        os.utime(path)  # LRU 정리를 위해 사용 시각 갱신
+                    self._remember(key, record["expires_at"], record["value"])
+                    self._count("disk_hits")
+                    return record["value"]
+                path.unlink(missing_ok=True)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"캐시 읽기 실패 ({self.name}): {e}")
+
+        self._count("misses")
+        return default
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, value)
+
+        if self.disk_dir is not None:
+            try:
+                self.disk_dir.mkdir(parents=True, exist_ok=True)
+                path = self._disk_path(key)
+                # 임시 파일에 쓴 뒤 교체하여 다른 프로세스가 반쯤 쓴 파일을 읽지 않도록 함
+                temp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"key": key, "expires_at": expires_at, "value": value}, f, ensure_ascii=False)
+                os.replace(temp_path, path)
+                self._enforce_disk_limit(path.stat().st_size)
+            except Exception as e:
+                print(f"캐시 저장 실패 ({self.name}): {e}")
+
+    def delete(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.disk_dir is not None:
+            self._disk_path(key).unlink(missing_ok=True)
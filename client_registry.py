@@ -0,0 +1,194 @@
+import os
+import asyncio
+import threading
+import weakref
+from api_config import get_api_config
+from lazy_imports import lazy_import
+
+# 클라이언트를 처음 만들 때 import (앱 시작 시간 단축)
+httpx = lazy_import("httpx")
+openai = lazy_import("openai")
+requests = lazy_import("requests")
+
+# 커넥션 풀 / 타임아웃 / 재시도 설정
+CLIENT_POOL_SIZE = int(os.getenv("CLIENT_POOL_SIZE", 20))
+CLIENT_TIMEOUT = float(os.getenv("CLIENT_TIMEOUT", 120))
+CLIENT_CONNECT_TIMEOUT = float(os.getenv("CLIENT_CONNECT_TIMEOUT", 10))
+CLIENT_MAX_RETRIES = int(os.getenv("CLIENT_MAX_RETRIES", 3))
+CLIENT_BACKOFF_FACTOR = float(os.getenv("CLIENT_BACKOFF_FACTOR", 0.5))
+# keep-alive 연결을 유지할 시간(초)
+CLIENT_KEEPALIVE_EXPIRY = float(os.getenv("CLIENT_KEEPALIVE_EXPIRY", 60))
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_lock = threading.Lock()
+_clients = {}
+# 비동기 클라이언트는 이벤트 루프에 묶이므로 루프별로 하나씩 보관
+_async_clients = weakref.WeakKeyDictionary()
+_async_http_clients = weakref.WeakKeyDictionary()
+
+class ConnectionMetrics:
+    """요청 수와 새로 연결된 커넥션 수를 세어 커넥션 재사용률을 계산합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._streams = weakref.WeakSet()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record(self, network_stream=None):
+        with self._lock:
+            self.requests += 1
+            if network_stream is None:
+                return
+            try:
+                if network_stream not in self._streams:
+                    self._streams.add(network_stream)
+                    self.new_connections += 1
+            except TypeError:
+                pass
+
+    def set_counts(self, requests_count, connections_count):
+        with self._lock:
+            self.requests = requests_count
+            self.new_connections = connections_count
+
+    def snapshot(self):
+        with self._lock:
+            reused = max(self.requests - self.new_connections, 0)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused": reused,
+                "reuse_ratio": round(reused / self.requests, 3) if self.requests else 0.0,
+            }
+
+_metrics = {
+    "openai": ConnectionMetrics(),
+    "openai_async": ConnectionMetrics(),
+    "http": ConnectionMetrics(),
+    "http_async": ConnectionMetrics(),
+}
+
+def _httpx_limits():
+    return httpx.Limits(
+        max_connections=CLIENT_POOL_SIZE,
+        max_keepalive_connections=CLIENT_POOL_SIZE,
+        keepalive_expiry=CLIENT_KEEPALIVE_EXPIRY,
+    )
+
+def _httpx_timeout():
+    return httpx.Timeout(CLIENT_TIMEOUT, connect=CLIENT_CONNECT_TIMEOUT)
+
+def _get_or_create(name, factory):
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _lock:
+        if name not in _clients:
+            _clients[name] = factory()
+        return _clients[name]
+
+def _openai_kwargs():
+    api_config = get_api_config()
+    kwargs = {"api_key": api_config["api_key"], "max_retries": CLIENT_MAX_RETRIES}
+    if api_config.get("base_url"):
+        kwargs["base_url"] = api_config["base_url"]
+    return kwargs
+
+def get_openai_client():
+    """프로세스 전체에서 공유하는 OpenAI 클라이언트 (스레드 안전, keep-alive 커넥션 풀)"""
+    def create():
+        metrics = _metrics["openai"]
+        http_client = httpx.Client(
+            limits=_httpx_limits(),
+            timeout=_httpx_timeout(),
+            event_hooks={"response": [lambda response: metrics.record(response.extensions.get("network_stream"))]},
+        )
+        return openai.OpenAI(http_client=http_client, **_openai_kwargs())
+    return _get_or_create("openai", create)
+
+def get_async_openai_client():
+    """현재 이벤트 루프에서 공유하는 AsyncOpenAI 클라이언트 (루프마다 하나)"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        metrics = _metrics["openai_async"]
+
+        async def on_response(response):
+            metrics.record(response.extensions.get("network_stream"))
+
+        http_client = httpx.AsyncClient(
+            limits=_httpx_limits(),
+            timeout=_httpx_timeout(),
+            event_hooks={"response": [on_response]},
+        )
+        client = openai.AsyncOpenAI(http_client=http_client, **_openai_kwargs())
+        _async_clients[loop] = client
+    return client
+
+def get_async_http_client():
+    """현재 이벤트 루프에서 공유하는 미디어 다운로드용 httpx.AsyncClient"""
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None:
+        metrics = _metrics["http_async"]
+
+        async def on_response(response):
+            metrics.record(response.extensions.get("network_stream"))
+
+        client = httpx.AsyncClient(
+            limits=_httpx_limits(),
+            timeout=_httpx_timeout(),
+            follow_redirects=True,
+            transport=httpx.AsyncHTTPTransport(retries=CLIENT_MAX_RETRIES),
+            event_hooks={"response": [on_response]},
+        )
+        _async_http_clients[loop] = client
+    return client
+
+def _pooled_session():
+    """기본 타임아웃이 적용된 requests 세션"""
+    class _PooledSession(requests.Session):
+        def request(self, method, url, **kwargs):
+            kwargs.setdefault("timeout", (CLIENT_CONNECT_TIMEOUT, CLIENT_TIMEOUT))
+            return super().request(method, url, **kwargs)
+    return _PooledSession()
+
+def get_http_session():
+    """프로세스 전체에서 공유하는 requests 세션 (커넥션 풀 + 재시도/백오프)"""
+    def create():
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=CLIENT_MAX_RETRIES,
+            backoff_factor=CLIENT_BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=("GET", "HEAD"),
+        )
+        adapter = HTTPAdapter(pool_connections=CLIENT_POOL_SIZE, pool_maxsize=CLIENT_POOL_SIZE, max_retries=retry)
+        session = _pooled_session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+    return _get_or_create("http", create)
+
+def _requests_pool_counts(session):
+    """urllib3 커넥션 풀에 기록된 요청 수 / 생성된 커넥션 수"""
+    requests_count = connections_count = 0
+    for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                requests_count += pool.num_requests
+                connections_count += pool.num_connections
+    return requests_count, connections_count
+
+def get_connection_metrics():
+    """클라이언트별 요청 수, 새 커넥션 수, 커넥션 재사용률"""
+    session = _clients.get("http")
+    if session is not None:
+        _metrics["http"].set_counts(*_requests_pool_counts(session))
+    return {name: metrics.snapshot() for name, metrics in _metrics.items()}
@@ -0,0 +1,75 @@
+import os
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+
+# 외부 자원별 동시 실행 한도 (프로세스 전체 공유)
+# - instagram: 게시물 조회 / CDN 다운로드 (계정 rate limit 보호)
+# - ffmpeg: 오디오 추출/인코딩 프로세스 (CPU)
+# - openai: Whisper + GPT 요청
+DEFAULT_LIMITS = {
+    "instagram": int(os.getenv("INSTAGRAM_CONCURRENCY", 2)),
+    "ffmpeg": int(os.getenv("FFMPEG_CONCURRENCY", os.cpu_count() or 2)),
+    "openai": int(os.getenv("OPENAI_CONCURRENCY", 8)),
+}
+
+_limits = dict(DEFAULT_LIMITS)
+_semaphores = {name: threading.BoundedSemaphore(value) for name, value in _limits.items()}
+_config_lock = threading.Lock()
+
+# 현재 실행 흐름(배치 등)에만 적용되는 추가 한도 - 전역 한도와 함께 적용됩니다.
+_scoped_limits = contextvars.ContextVar("scoped_limits", default=None)
+
+def _validate(limits):
+    for name, value in limits.items():
+        if name not in _limits:
+            raise ValueError(f"알 수 없는 자원입니다: {name}")
+        if value is not None and value < 1:
+            raise ValueError(f"동시 실행 한도는 1 이상이어야 합니다: {name}={value}")
+
+def configure_limits(**limits):
+    """프로세스 전역 한도를 바꿉니다. 작업을 시작하기 전(CLI 시작 시 등)에만 호출하세요.
+
+    이미 실행 중인 작업은 기존 세마포어로 끝나므로, 실행 중에 바꾸면 잠시 두 한도가 함께 적용됩니다.
+    요청/배치마다 다른 한도가 필요하면 scoped_limits를 사용합니다.
+    """
+    with _config_lock:
+        _validate(limits)
+        for name, value in limits.items():
+            if value is None:
+                continue
+            _limits[name] = value
+            _semaphores[name] = threading.BoundedSemaphore(value)
+
+def get_limits():
+    with _config_lock:
+        return dict(_limits)
+
+@contextmanager
+def scoped_limits(**limits):
+    """with 블록(과 copy_context로 넘긴 스레드)에서만 적용되는 자원별 한도.
+
+    전역 한도를 바꾸지 않으므로 다른 세션/작업 큐 워커에는 영향이 없고,
+    블록 안의 작업은 이 한도와 전역 한도를 모두 지킵니다. None인 자원은 전역 한도만 적용됩니다.
+    """
+    _validate(limits)
+    semaphores = {name: threading.BoundedSemaphore(value) for name, value in limits.items() if value is not None}
+    token = _scoped_limits.set({**(_scoped_limits.get() or {}), **semaphores})
+    try:
+        yield
+    finally:
+        _scoped_limits.reset(token)
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """현재 컨텍스트(scoped_limits 등)를 유지한 채 executor에 작업을 제출합니다."""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+@contextmanager
+def limit(resource):
+    """자원 한도 안에서 블록을 실행합니다."""
+    with _config_lock:
+        semaphore = _semaphores[resource]
+    scoped = (_scoped_limits.get() or {}).get(resource)
+    with scoped or nullcontext():
+        with semaphore:
+            yield
@@ -0,0 +1,409 @@
+"""범위 요청(Range) 기반 병렬 / 이어받기 영상 다운로더
+
+- 큰 청크(기본 1MB)로 읽고, 파일이 충분히 크면 Range로 나눠 여러 연결에서 동시에 받습니다.
+- 받는 동안 구간별 진행 상태를 <파일>.part.json에 기록해 두어, 연결이 끊기거나 프로세스가
+  재시작되어도 받은 부분부터 이어받습니다. (파일 크기와 ETag가 같을 때만)
+- 진행 콜백은 청크마다가 아니라 DOWNLOAD_PROGRESS_BYTES를 받을 때마다 한 번씩 호출됩니다.
+  콜백에서 DownloadCancelled를 던지면 모든 구간이 멈추고, resume_key가 있으면 다음에 이어받습니다.
+- resume_key의 공유 중간 파일은 파일 잠금으로 한 프로세스만 씁니다. 다른 프로세스가 같은 릴스를 받는 중이면
+  이 프로세스 전용 중간 파일에 받습니다. 한 구간이 실패하면 나머지 구간도 바로 멈춥니다.
+- 서버가 Range를 지원하지 않으면 한 연결로 스트리밍해서 받습니다. (메모리에 통째로 올리지 않음)
+
+    download_file(url, "reel.mp4", progress_callback=lambda done, total: ..., resume_key="Cxyz")
+"""
+import os
+import re
+import json
+import math
+import shutil
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from client_registry import get_http_session
+from instrumentation import measure
+
+# 한 번에 읽어서 쓰는 크기
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", 1024 * 1024))
+# 동시에 여는 Range 연결 수 (1이면 병렬 분할 안 함)
+DOWNLOAD_PARTS = int(os.getenv("DOWNLOAD_PARTS", 4))
+# 구간 하나의 최소 크기 - 이보다 작은 파일은 나누지 않음
+DOWNLOAD_MIN_PART_SIZE = int(os.getenv("DOWNLOAD_MIN_PART_SIZE", 2 * 1024 * 1024))
+# 진행 콜백 / 이어받기 상태 저장 간격 (바이트)
+DOWNLOAD_PROGRESS_BYTES = int(os.getenv("DOWNLOAD_PROGRESS_BYTES", 1024 * 1024))
+# 구간별 재시도 횟수 (재시도 시 받은 위치부터 이어받음)
+DOWNLOAD_MAX_ATTEMPTS = int(os.getenv("DOWNLOAD_MAX_ATTEMPTS", 3))
+# resume_key를 준 다운로드의 중간 파일 위치 (프로세스를 다시 시작해도 이어받기)
+DOWNLOAD_PARTIAL_DIR = os.getenv("DOWNLOAD_PARTIAL_DIR", os.path.join(tempfile.gettempdir(), "reels_downloads"))
+
+class RangeNotSupported(Exception):
+    """서버가 Range 요청에 206으로 응답하지 않음"""
+
+class DownloadCancelled(Exception):
+    """진행 콜백이 다운로드를 중단시킴"""
+
+def plan_parts(size, parts=None, min_part_size=None):
+    """[start, end] (양 끝 포함) 구간 목록. 작은 파일은 구간 하나로 받습니다."""
+    parts = parts or DOWNLOAD_PARTS
+    min_part_size = min_part_size or DOWNLOAD_MIN_PART_SIZE
+    count = max(1, min(parts, math.ceil(size / max(min_part_size, 1))))
+    step = math.ceil(size / count)
+    return [[start, min(start + step, size) - 1] for start in range(0, size, step)]
+
+def parse_content_range(value):
+    """'bytes 0-0/12345' -> (0, 0, 12345). 전체 크기를 모르면 None."""
+    match = re.match(r"bytes (\d+)-(\d+)/(\d+|\*)", value or "")
+    if not match:
+        return None
+    start, end, total = match.groups()
+    return int(start), int(end), int(total) if total != "*" else None
+
+def print_progress(downloaded, total):
+    """콘솔 진행 막대 (CLI에서 progress_callback으로 넘겨 사용)"""
+    if total:
+        done = int(50 * downloaded / total)
+        print(f"\r💫 다운로드 진행률: [{'=' * done}{'.' * (50 - done)}] {downloaded}/{total} bytes", end='')
+    else:
+        print(f"\r💫 다운로드: {downloaded} bytes", end='')
+
+class DownloadProgress:
+    """받은 바이트를 모아 예산(budget)만큼 쌓일 때마다 콜백을 한 번 호출합니다."""
+
+    def __init__(self, callback, total, initial=0, budget=None):
+        self.callback = callback
+        self.total = total
+        self.downloaded = initial
+        self.budget = max(budget or DOWNLOAD_PROGRESS_BYTES, 1)
+        self.cancelled = False
+        self._reported = initial
+        self._lock = threading.Lock()
+
+    def advance(self, size):
+        """예산을 넘겨 콜백을 호출했으면 True (이어받기 상태 저장 시점으로도 사용)"""
+        if self.cancelled:
+            # 다른 구간에서 중단된 경우
+            raise DownloadCancelled()
+        with self._lock:
+            self.downloaded += size
+            if self.downloaded - self._reported < self.budget:
+                return False
+            self._reported = self.downloaded
+            downloaded = self.downloaded
+        self._report(downloaded)
+        return True
+
+    def finish(self):
+        self._report(self.downloaded)
+
+    def _report(self, downloaded):
+        if self.callback is None:
+            return
+        try:
+            self.callback(downloaded, self.total)
+        except DownloadCancelled:
+            self.cancelled = True
+            raise
+        except Exception as e:
+            print(f"다운로드 진행 콜백 오류: {e}")
+
+class DownloadState:
+    """구간별로 받은 바이트 수. <중간 파일>.json에 저장해 이어받기에 씁니다."""
+
+    def __init__(self, path, size, etag, parts):
+        self.path = path
+        self.size = size
+        self.etag = etag
+        # [start, end, 받은 바이트]
+        self.parts = [list(part) for part in parts]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load_or_create(cls, path, size, etag):
+        """같은 파일(크기/ETag)의 상태가 있고 중간 파일이 남아 있으면 이어받고, 아니면 새로 시작합니다."""
+        state_path = f"{path}.json"
+        try:
+            with open(state_path, encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved["size"] == size and saved["etag"] == etag and os.path.getsize(path) == size:
+                return cls(path, size, etag, saved["parts"])
+        except (FileNotFoundError, ValueError, KeyError, OSError):
+            pass
+        return cls(path, size, etag, [[start, end, 0] for start, end in plan_parts(size)])
+
+    @property
+    def downloaded(self):
+        with self._lock:
+            return sum(part[2] for part in self.parts)
+
+    def advance(self, index, size):
+        with self._lock:
+            self.parts[index][2] += size
+
+    def next_offset(self, index):
+        """구간 index에서 다음에 받을 위치 (다 받았으면 None)"""
+        with self._lock:
+            start, end, done = self.parts[index]
+            return start + done if start + done <= end else None
+
+    def save(self):
+        with self._lock:
+            payload = {"size": self.size, "etag": self.etag, "parts": self.parts}
+            temp_path = f"{self.path}.json.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(temp_path, f"{self.path}.json")
+
+    def discard(self):
+        for path in (f"{self.path}.json", f"{self.path}.json.tmp"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+def partial_path(path, resume_key=None):
+    """받는 중인 파일 위치. resume_key가 있으면 프로세스 간에도 같은 위치를 씁니다."""
+    if resume_key:
+        os.makedirs(DOWNLOAD_PARTIAL_DIR, exist_ok=True)
+        return os.path.join(DOWNLOAD_PARTIAL_DIR, f"{resume_key}.part")
+    return f"{path}.part"
+
+def _try_lock(lock_path):
+    """잠금 파일에 배타적 잠금을 시도합니다. 성공하면 열린 파일(닫으면 해제), 다른 프로세스가 쥐고 있으면 None"""
+    f = open(lock_path, "a+b")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+def claim_partial(path, resume_key=None):
+    """(중간 파일 위치, 잠금, 이어받기 여부)
+
+    resume_key의 공유 중간 파일은 잠금을 쥔 프로세스 하나만 씁니다. single_flight는 프로세스 안에서만
+    합쳐 주므로, 다른 프로세스(작업 큐 프로세스 풀, Streamlit 등)가 같은 릴스를 받는 중이면
+    서로의 구간을 덮어쓰지 않도록 이 프로세스 전용 중간 파일에 받고 이어받기는 하지 않습니다.
+    """
+    partial = partial_path(path, resume_key)
+    if not resume_key:
+        return partial, None, False
+    lock = _try_lock(f"{partial}.lock")
+    if lock is not None:
+        return partial, lock, True
+    return os.path.join(DOWNLOAD_PARTIAL_DIR, f"{resume_key}.{os.getpid()}.{threading.get_ident()}.part"), None, False
+
+def _release(lock):
+    if lock is not None:
+        lock.close()
+
+def _first_error(errors):
+    """구간 오류 중 원인 오류 (다른 구간 실패로 멈춘 DownloadCancelled보다 우선)"""
+    return next((error for error in errors if not isinstance(error, DownloadCancelled)), errors[0])
+
+def _prepare_file(path, size):
+    mode = "r+b" if os.path.exists(path) else "w+b"
+    with open(path, mode) as f:
+        f.truncate(size)
+
+def _complete(partial, path, state=None):
+    if state is not None:
+        state.discard()
+    shutil.move(partial, path)
+    return path
+
+def _discard_partial(partial, state=None, keep=False):
+    """실패 시 정리. 이어받기(keep)면 다음 시도를 위해 남겨 둡니다."""
+    if keep:
+        if state is not None:
+            state.save()
+        return
+    if state is not None:
+        state.discard()
+    try:
+        os.remove(partial)
+    except FileNotFoundError:
+        pass
+
+# ---- 동기 (requests) ----
+
+def _download_part(session, url, partial, state, index, progress, m):
+    """구간 하나를 받습니다. 끊기면 받은 위치부터 다시 요청합니다."""
+    for attempt in range(1, DOWNLOAD_MAX_ATTEMPTS + 1):
+        offset = state.next_offset(index)
+        if offset is None:
+            return
+        end = state.parts[index][1]
+        try:
+            with session.get(url, headers={"Range": f"bytes={offset}-{end}"}, stream=True) as response:
+                response.raise_for_status()
+                content_range = parse_content_range(response.headers.get("Content-Range"))
+                if response.status_code != 206 or content_range is None or content_range[0] != offset:
+                    raise RangeNotSupported(f"Range 응답 아님 (HTTP {response.status_code})")
+                with open(partial, "r+b") as f:
+                    f.seek(offset)
+                    for data in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(data)
+                        state.advance(index, len(data))
+                        m.add_bytes(len(data))
+                        if progress.advance(len(data)):
+                            f.flush()  # 상태에 기록한 바이트가 파일에 먼저 반영되도록
+                            state.save()
+            if state.next_offset(index) is None:
+                return
+        except (RangeNotSupported, DownloadCancelled):
+            raise
+        except Exception as e:
+            if attempt == DOWNLOAD_MAX_ATTEMPTS:
+                raise
+            print(f"다운로드 구간 {index} 재시도 ({attempt}/{DOWNLOAD_MAX_ATTEMPTS}): {e}")
+
+def _download_single(response, partial, total, progress, m):
+    """Range를 지원하지 않는 서버 - 한 연결로 처음부터 스트리밍"""
+    with open(partial, "wb") as f:
+        for data in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+            f.write(data)
+            m.add_bytes(len(data))
+            progress.advance(len(data))
+
+def download_file(url, path, progress_callback=None, resume_key=None, session=None):
+    """url을 path에 저장합니다. 크기를 알고 Range를 지원하면 구간을 나눠 병렬로 받습니다."""
+    session = session or get_http_session()
+    partial, lock, resumable = claim_partial(path, resume_key)
+    state = None
+    with measure("download") as m:
+        try:
+            # 1바이트 Range 요청으로 전체 크기 / Range 지원 여부 / ETag 확인
+            probe = session.get(url, headers={"Range": "bytes=0-0"}, stream=True)
+            probe.raise_for_status()
+            content_range = parse_content_range(probe.headers.get("Content-Range"))
+            if probe.status_code != 206 or content_range is None or content_range[2] is None:
+                total = int(probe.headers.get("content-length", 0)) or None
+                m.set(parts=1, ranged=False)
+                progress = DownloadProgress(progress_callback, total)
+                with probe:
+                    _download_single(probe, partial, total, progress, m)
+            else:
+                probe.close()
+                size = content_range[2]
+                state = DownloadState.load_or_create(partial, size, probe.headers.get("ETag"))
+                _prepare_file(partial, size)
+                resumed = state.downloaded
+                m.set(parts=len(state.parts), ranged=True, resumed_bytes=resumed)
+                progress = DownloadProgress(progress_callback, size, initial=resumed)
+                indexes = [index for index in range(len(state.parts)) if state.next_offset(index) is not None]
+                if len(indexes) > 1:
+                    with ThreadPoolExecutor(max_workers=len(indexes), thread_name_prefix="download") as executor:
+                        futures = [
+                            executor.submit(_download_part, session, url, partial, state, index, progress, m)
+                            for index in indexes
+                        ]
+                        errors = []
+                        for future in as_completed(futures):
+                            if future.cancelled() or future.exception() is None:
+                                continue
+                            if not errors:
+                                # 한 구간이 실패하면 대기 중인 구간은 취소하고, 받는 중인 구간은 다음 청크에서 멈춤
+                                progress.cancelled = True
+                                for pending in futures:
+                                    pending.cancel()
+                            errors.append(future.exception())
+                        if errors:
+                            raise _first_error(errors)
+                else:
+                    for index in indexes:
+                        _download_part(session, url, partial, state, index, progress, m)
+            progress.finish()
+            return _complete(partial, path, state)
+        except Exception:
+            _discard_partial(partial, state, keep=resumable)
+            raise
+        finally:
+            _release(lock)
+
+# ---- 비동기 (httpx) ----
+
+async def _async_download_part(client, url, partial, state, index, progress, m):
+    for attempt in range(1, DOWNLOAD_MAX_ATTEMPTS + 1):
+        offset = state.next_offset(index)
+        if offset is None:
+            return
+        end = state.parts[index][1]
+        try:
+            async with client.stream("GET", url, headers={"Range": f"bytes={offset}-{end}"}) as response:
+                response.raise_for_status()
+                content_range = parse_content_range(response.headers.get("Content-Range"))
+                if response.status_code != 206 or content_range is None or content_range[0] != offset:
+                    raise RangeNotSupported(f"Range 응답 아님 (HTTP {response.status_code})")
+                with open(partial, "r+b") as f:
+                    f.seek(offset)
+                    async for data in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        f.write(data)
+                        state.advance(index, len(data))
+                        m.add_bytes(len(data))
+                        if progress.advance(len(data)):
+                            f.flush()  # 상태에 기록한 바이트가 파일에 먼저 반영되도록
+                            state.save()
+            if state.next_offset(index) is None:
+                return
+        except (RangeNotSupported, DownloadCancelled):
+            raise
+        except Exception as e:
+            if attempt == DOWNLOAD_MAX_ATTEMPTS:
+                raise
+            print(f"다운로드 구간 {index} 재시도 ({attempt}/{DOWNLOAD_MAX_ATTEMPTS}): {e}")
+
+async def async_download_file(client, url, path, progress_callback=None, resume_key=None):
+    """download_file의 비동기 버전 (httpx.AsyncClient 사용, 구간은 태스크로 동시에 받음)"""
+    partial, lock, resumable = claim_partial(path, resume_key)
+    state = None
+    with measure("download") as m:
+        try:
+            async with client.stream("GET", url, headers={"Range": "bytes=0-0"}) as probe:
+                probe.raise_for_status()
+                content_range = parse_content_range(probe.headers.get("Content-Range"))
+                ranged = probe.status_code == 206 and content_range is not None and content_range[2] is not None
+                if not ranged:
+                    total = int(probe.headers.get("content-length", 0)) or None
+                    m.set(parts=1, ranged=False)
+                    progress = DownloadProgress(progress_callback, total)
+                    with open(partial, "wb") as f:
+                        async for data in probe.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                            f.write(data)
+                            m.add_bytes(len(data))
+                            progress.advance(len(data))
+            if ranged:
+                size = content_range[2]
+                state = DownloadState.load_or_create(partial, size, probe.headers.get("ETag"))
+                _prepare_file(partial, size)
+                resumed = state.downloaded
+                m.set(parts=len(state.parts), ranged=True, resumed_bytes=resumed)
+                progress = DownloadProgress(progress_callback, size, initial=resumed)
+                async def download_part(index):
+                    try:
+                        await _async_download_part(client, url, partial, state, index, progress, m)
+                    except Exception:
+                        # 한 구간이 실패하면 나머지 구간도 다음 청크에서 멈춤
+                        progress.cancelled = True
+                        raise
+
+                # 모든 구간이 멈춘 뒤 정리하도록 예외를 모아서 처리
+                results = await asyncio.gather(*(
+                    download_part(index)
+                    for index in range(len(state.parts)) if state.next_offset(index) is not None
+                ), return_exceptions=True)
+                errors = [result for result in results if isinstance(result, BaseException)]
+                if errors:
+                    raise _first_error(errors)
+            progress.finish()
+            return _complete(partial, path, state)
+        except Exception:
+            _discard_partial(partial, state, keep=resumable)
+            raise
+        finally:
+            _release(lock)
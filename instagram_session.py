@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from concurrency import limit
+from instrumentation import measure
+from lazy_imports import lazy_import
+
+# 첫 로그인/조회 시 import (앱 시작 시간 단축)
+instaloader = lazy_import("instaloader")
+
+# 세션 파일 저장 위치 (재시작 후에도 로그인 상태 재사용)
+SESSION_DIR = Path(os.getenv("INSTAGRAM_SESSION_DIR", Path(__file__).parent / ".sessions"))
+# 일시적인 오류(네트워크/요청 제한)로 로그인에 실패하면 이 시간(초)이 지난 뒤 다시 시도
+LOGIN_RETRY_SECONDS = float(os.getenv("INSTAGRAM_LOGIN_RETRY_SECONDS", 300))
+
+def login_rejected_errors():
+    """다시 시도해도 성공하지 않는 로그인 실패 (잘못된 계정 정보, 2단계 인증, 체크포인트)"""
+    return (
+        instaloader.exceptions.BadCredentialsException,
+        instaloader.exceptions.TwoFactorAuthRequiredException,
+        instaloader.exceptions.LoginException,
+    )
+
+def auth_errors():
+    """인증 만료/거부로 판단하여 재로그인을 시도할 예외 (except 절에서만 평가되므로 import를 앞당기지 않음)"""
+    return (
+        instaloader.exceptions.LoginRequiredException,
+        instaloader.exceptions.QueryReturnedForbiddenException,
+    )
+
+class InstagramSessionManager:
+    """프로세스 전체에서 하나의 Instaloader 세션을 공유합니다.
+
+    최초 사용 시 세션 파일을 불러오거나 한 번만 로그인하고,
+    인증 오류가 발생했을 때만 재로그인합니다. 로그인이 거부되면(잘못된 계정 정보 등) 다시 시도하지 않고,
+    일시적인 오류로 실패하면 LOGIN_RETRY_SECONDS 뒤 다음 요청에서 다시 로그인합니다.
+    """
+
+    def __init__(self, username=None, password=None, session_dir=SESSION_DIR):
+        self.username = username if username is not None else os.getenv("INSTAGRAM_USERNAME")
+        self.password = password if password is not None else os.getenv("INSTAGRAM_PASSWORD")
+        self.session_dir = Path(session_dir)
+        self._loader = None
+        self._logged_in = False
+        # 로그인이 거부된 경우 (재시도하지 않음)
+        self._login_rejected = False
+        # 일시적인 실패 후 다시 로그인을 시도할 수 있는 시각 (time.monotonic 기준)
+        self._retry_at = 0.0
+        self._lock = threading.RLock()
+        self._stats = {
+            "logins": 0,
+            "relogins": 0,
+            "login_failures": 0,
+            "session_loads": 0,
+            "fetches": 0,
+        }
+
+    @property
+    def has_credentials(self):
+        return bool(self.username and self.password)
+
+    @property
+    def is_logged_in(self):
+        return self._logged_in
+
+    @property
+    def session_file(self):
+        return self.session_dir / f"session-{self.username}"
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def get_stats(self):
+        """로그인/조회 횟수 통계를 반환합니다."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _load_session(self):
+        if not self.session_file.exists():
+            return False
+        with measure("login", method="session_file") as m:
+            try:
+                self._loader.load_session_from_file(self.username, str(self.session_file))
+                self._count("session_loads")
+                print("✅ Instagram 세션 파일 로드 완료")
+                return True
+            except Exception as e:
+                m.status = "error"
+                print(f"⚠️ Instagram 세션 파일 로드 실패: {str(e)}")
+                return False
+
+    def _login(self):
+        with measure("login", method="password") as m:
+            try:
+                self._loader.login(self.username, self.password)
+                self._count("logins")
+                print("✅ Instagram 로그인 성공")
+            except instaloader.exceptions.BadCredentialsException:
+                m.status = "error"
+                self._count("login_failures")
+                self._login_rejected = True
+                print("⚠️ Instagram 로그인 실패: 잘못된 사용자 이름 또는 비밀번호")
+                return False
+            except login_rejected_errors() as e:
+                m.status = "error"
+                self._count("login_failures")
+                self._login_rejected = True
+                print(f"⚠️ Instagram 로그인 거부: {str(e)}")
+                return False
+            except Exception as e:
+                m.status = "error"
+                self._count("login_failures")
+                self._retry_at = time.monotonic() + LOGIN_RETRY_SECONDS
+                print(f"⚠️ Instagram 로그인 중 오류 ({LOGIN_RETRY_SECONDS:g}초 뒤 다시 시도): {str(e)}")
+                return False
+
+        try:
+            self.session_dir.mkdir(parents=True, exist_ok=True)
+            self._loader.save_session_to_file(str(self.session_file))
+        except Exception as e:
+            print(f"⚠️ Instagram 세션 저장 실패: {str(e)}")
+        return True
+
+    def _ensure_session(self, force_login=False):
+        if self._loader is None:
+            self._loader = instaloader.Instaloader(quiet=True)
+
+        if self._logged_in and not force_login:
+            return
+        if self._login_rejected:
+            return
+        if not force_login and time.monotonic() < self._retry_at:
+            return
+
+        if not self.has_credentials:
+            print("⚠️ Instagram 로그인 정보가 설정되지 않았습니다.")
+            self._login_rejected = True
+            return
+
+        if not force_login and self._load_session():
+            self._logged_in = True
+            return
+
+        if force_login:
+            self._count("relogins")
+            # 새 로더로 교체하여 만료된 쿠키를 버림
+            self._loader = instaloader.Instaloader(quiet=True)
+        self._logged_in = self._login()
+
+    def get_loader(self):
+        """공유 Instaloader 인스턴스를 반환합니다 (필요 시 로그인)."""
+        with self._lock:
+            self._ensure_session()
+            return self._loader
+
+    @property
+    def context(self):
+        return self.get_loader().context
+
+    def relogin(self):
+        """인증 오류 발생 시 세션을 새로 발급받습니다."""
+        with self._lock:
+            self._logged_in = False
+            self._ensure_session(force_login=True)
+            return self._logged_in
+
+    def _with_relogin(self, request):
+        """request(loader)를 실행합니다. 인증 오류 시 한 번만 재로그인 후 재시도합니다."""
+        try:
+            self._count("fetches")
+            with limit("instagram"):
+                return request(self.get_loader())
+        except auth_errors() as e:
+            if not self.has_credentials:
+                raise
+            print(f"⚠️ Instagram 인증 오류, 재로그인합니다: {str(e)}")
+            if not self.relogin():
+                raise
+            self._count("fetches")
+            with limit("instagram"):
+                return request(self.get_loader())
+
+    def fetch_post(self, shortcode):
+        """숏코드로 게시물을 조회합니다."""
+        return self._with_relogin(lambda loader: instaloader.Post.from_shortcode(loader.context, shortcode))
+
+    def iter_profile_posts(self, owner, cursor=None):
+        """계정의 게시물을 최신순으로 돌려주는 instaloader 이터레이터 (고정 게시물이 먼저 나옴).
+
+        다음 페이지는 이터레이터를 진행할 때 조회됩니다. cursor(freeze_posts 결과)를 주면 그 위치부터 이어서 조회합니다.
+        """
+        profile = self._with_relogin(lambda loader: instaloader.Profile.from_username(loader.context, owner))
+        posts = profile.get_posts()
+        if cursor:
+            posts.thaw(instaloader.FrozenNodeIterator(**json.loads(cursor)))
+        return posts
+
+    def freeze_posts(self, posts):
+        """iter_profile_posts 이터레이터의 현재 위치 (JSON 문자열, 이어받기용)"""
+        return json.dumps(posts.freeze()._asdict(), ensure_ascii=False)
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_session_manager():
+    """프로세스 전역 세션 관리자를 반환합니다."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = InstagramSessionManager()
+        return _manager
+
+def set_session_manager(manager):
+    """전역 세션 관리자를 교체합니다 (벤치마크/로컬 대체 서버용)."""
+    global _manager
+    with _manager_lock:
+        _manager = manager
@@ -0,0 +1,251 @@
+"""파이프라인 단계별 계측 (소요 시간, 전송 바이트, OpenAI 토큰, 캐시 적중 여부)
+
+    with measure("refinement", shortcode=shortcode) as m:
+        ...
+        m.cache_hit()                  # 또는 m.cache_miss()
+        m.add_bytes(len(data))
+        m.add_usage(response.usage)
+
+측정이 끝날 때마다 기록(record) 하나가 등록된 싱크로 전달됩니다.
+StageScheduler의 단계도 "<pipeline>.<단계>" 이름(run_id, start, thread 포함)으로 같은 싱크에 기록됩니다.
+기본 싱크는 INSTRUMENTATION_SINKS 환경 변수("jsonl,histogram")로 고릅니다.
+- jsonl: logs/metrics.jsonl에 한 줄씩 추가 (프로세스/재시작을 넘어 집계할 때)
+- histogram: 프로세스 메모리에 단계별 최근 기록을 보관 (관리자 페이지의 p50/p95)
+"""
+import os
+import json
+import math
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+METRICS_LOG_PATH = Path(os.getenv("METRICS_LOG_PATH", Path(__file__).parent / "logs" / "metrics.jsonl"))
+INSTRUMENTATION_SINKS = os.getenv("INSTRUMENTATION_SINKS", "jsonl,histogram")
+# 히스토그램 싱크가 단계별로 보관하는 최근 기록 수
+HISTOGRAM_WINDOW = int(os.getenv("HISTOGRAM_WINDOW", 2048))
+
+# 관리자 페이지 표시 순서
+STAGES = ("login", "metadata", "download", "ffmpeg", "whisper", "refinement", "analysis")
+
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+def usage_tokens(usage):
+    """OpenAI 응답의 usage 객체(또는 딕셔너리)에서 토큰 수를 꺼냅니다."""
+    if usage is None:
+        return {}
+    if not isinstance(usage, dict):
+        usage = usage.model_dump() if hasattr(usage, "model_dump") else vars(usage)
+    tokens = {field: usage[field] for field in TOKEN_FIELDS if usage.get(field) is not None}
+    details = usage.get("prompt_tokens_details") or {}
+    if details.get("cached_tokens") is not None:
+        tokens["cached_tokens"] = details["cached_tokens"]
+    return tokens
+
+class StageMeasurement:
+    """측정 중인 단계 하나. 단계 코드가 바이트/토큰/캐시 정보를 채웁니다."""
+
+    def __init__(self, stage, **fields):
+        self.stage = stage
+        self.fields = fields
+        self.status = "ok"
+        self.cache = None
+        self.bytes = 0
+        self.tokens = {}
+        self.duration = None
+
+    def cache_hit(self):
+        self.cache = "hit"
+
+    def cache_miss(self):
+        self.cache = "miss"
+
+    def add_bytes(self, count):
+        self.bytes += count or 0
+
+    def add_usage(self, usage):
+        for field, count in usage_tokens(usage).items():
+            self.tokens[field] = self.tokens.get(field, 0) + count
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def to_record(self):
+        record = {
+            "ts": round(time.time(), 3),
+            "stage": self.stage,
+            "duration": round(self.duration, 4),
+            "status": self.status,
+            "cache": self.cache,
+            "bytes": self.bytes,
+            **self.tokens,
+        }
+        record.update(self.fields)
+        return record
+
+# ---- 싱크 ----
+
+class JsonlSink:
+    """기록을 JSON Lines 파일에 추가합니다."""
+
+    def __init__(self, path=METRICS_LOG_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def read(self, limit=None):
+        """파일에 쌓인 기록을 읽습니다 (limit이 있으면 마지막 limit건)."""
+        if not self.path.exists():
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = deque(f, maxlen=limit) if limit else f.readlines()
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return records
+
+class HistogramSink:
+    """단계별 최근 기록을 메모리에 보관하고 분위수를 계산합니다."""
+
+    def __init__(self, window=HISTOGRAM_WINDOW):
+        self.window = window
+        self._records = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def emit(self, record):
+        with self._lock:
+            self._records[record["stage"]].append(record)
+
+    def records(self):
+        with self._lock:
+            return [record for records in self._records.values() for record in records]
+
+    def summary(self):
+        return summarize(self.records())
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+
+def percentile(sorted_values, p):
+    """정렬된 값에서 nearest-rank 방식 분위수"""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def summarize(records):
+    """기록 목록을 단계별 p50/p95, 캐시 적중률, 바이트/토큰 합계로 요약합니다.
+
+    cached_tokens는 OpenAI 프롬프트 캐시로 처리된 입력 토큰, ttft_p50은 스트리밍 첫 토큰까지의 시간입니다.
+    """
+    by_stage = defaultdict(list)
+    for record in records:
+        by_stage[record["stage"]].append(record)
+
+    ordered = [stage for stage in STAGES if stage in by_stage] + sorted(set(by_stage) - set(STAGES))
+    summary = {}
+    for stage in ordered:
+        stage_records = by_stage[stage]
+        durations = sorted(record["duration"] for record in stage_records)
+        hits = sum(1 for record in stage_records if record.get("cache") == "hit")
+        misses = sum(1 for record in stage_records if record.get("cache") == "miss")
+        prompt_tokens = sum(record.get("prompt_tokens") or 0 for record in stage_records)
+        cached_tokens = sum(record.get("cached_tokens") or 0 for record in stage_records)
+        ttfts = sorted(record["ttft"] for record in stage_records if record.get("ttft") is not None)
+        summary[stage] = {
+            "count": len(stage_records),
+            "errors": sum(1 for record in stage_records if record.get("status") != "ok"),
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "max": durations[-1],
+            "cache_hits": hits,
+            "cache_misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            "bytes": sum(record.get("bytes") or 0 for record in stage_records),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": sum(record.get("completion_tokens") or 0 for record in stage_records),
+            "cached_tokens": cached_tokens,
+            "cached_rate": round(cached_tokens / prompt_tokens, 3) if prompt_tokens else None,
+            "ttft_p50": percentile(ttfts, 50),
+        }
+    return summary
+
+# ---- 싱크 등록 / 기록 전달 ----
+
+_histogram = HistogramSink()
+_jsonl = JsonlSink()
+_sinks = []
+_sinks_lock = threading.Lock()
+
+def get_histogram():
+    """프로세스 기본 히스토그램 싱크"""
+    return _histogram
+
+def get_jsonl_sink():
+    """기본 JSONL 싱크 (등록 여부와 관계없이 파일 읽기에 사용)"""
+    return _jsonl
+
+def add_sink(sink):
+    """emit(record) 메서드를 가진 싱크를 등록합니다."""
+    with _sinks_lock:
+        if sink not in _sinks:
+            _sinks.append(sink)
+
+def remove_sink(sink):
+    with _sinks_lock:
+        if sink in _sinks:
+            _sinks.remove(sink)
+
+def configure_sinks(names):
+    """기본 싱크 구성을 이름 목록("jsonl", "histogram")으로 바꿉니다."""
+    available = {"jsonl": _jsonl, "histogram": _histogram}
+    with _sinks_lock:
+        _sinks[:] = [available[name] for name in names if name in available]
+
+configure_sinks([name.strip() for name in INSTRUMENTATION_SINKS.split(",") if name.strip()])
+
+def emit(record):
+    """기록을 모든 싱크에 전달합니다. 싱크 오류는 파이프라인을 멈추지 않습니다."""
+    with _sinks_lock:
+        sinks = list(_sinks)
+    for sink in sinks:
+        try:
+            sink.emit(record)
+        except Exception as e:
+            print(f"계측 기록 실패 ({type(sink).__name__}): {e}")
+
+@contextmanager
+def measure(stage, **fields):
+    """with 블록 하나를 단계로 측정합니다. 예외가 나면 status="error"로 기록합니다."""
+    measurement = StageMeasurement(stage, **fields)
+    start = time.perf_counter()
+    try:
+        yield measurement
+    except Exception:
+        measurement.status = "error"
+        raise
+    finally:
+        measurement.duration = time.perf_counter() - start
+        emit(measurement.to_record())
+
+def instrument(stage):
+    """함수 전체를 단계로 측정하는 데코레이터"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,484 @@
+"""분석 작업 큐 (백그라운드 워커 풀 + SQLite 상태 저장)
+
+Streamlit 스크립트 스레드에서 파이프라인을 직접 돌리지 않고 작업으로 제출합니다.
+- 작업 하나 = (숏코드, 주제, 영상 분석 입력). 같은 작업이 대기/실행 중이면 새로 만들지 않고
+  그 작업 ID를 돌려줍니다. (여러 세션에서 같은 릴스를 동시에 분석해도 한 번만 실행)
+- 워커 풀(스레드 또는 프로세스)이 실행하고, 단계/작성 중인 분석/결과를 jobs 테이블에 기록합니다.
+- UI는 작업 ID로 상태를 폴링하므로 새로고침이나 세션 끊김과 관계없이 작업은 끝까지 진행됩니다.
+- 실행 중인 작업은 JOB_HEARTBEAT_SECONDS마다 updated_at을 갱신합니다. 워커 풀은 주기적으로
+  하트비트가 멈춘 작업을 다시 대기열에 넣고, 시작 시에는 이 호스트에서 죽은 프로세스가 맡았던 작업을 바로 되살립니다.
+
+    job_id = submit_job(url, input_data)
+    job = get_job(job_id)   # {"status": "running", "stage": "transcript", "partial": "...", ...}
+"""
+import os
+import json
+import uuid
+import socket
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from results_store import RESULTS_DB_PATH
+
+# 기본값은 결과 저장소와 같은 DB 파일 (jobs 테이블만 따로 사용)
+JOBS_DB_PATH = Path(os.getenv("JOBS_DB_PATH", RESULTS_DB_PATH))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 4))
+# "thread" (기본) 또는 "process" (GIL을 피해 CPU 작업이 많은 로컬 전사 등에 사용)
+JOB_EXECUTOR = os.getenv("JOB_EXECUTOR", "thread")
+# 작성 중인 분석을 이 글자 수만큼 모일 때마다 저장 (UI 폴링 시 점진 표시용)
+JOB_PARTIAL_FLUSH_CHARS = int(os.getenv("JOB_PARTIAL_FLUSH_CHARS", 400))
+# 실행 중인 작업의 하트비트(updated_at 갱신) 간격 (초)
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", 30))
+# 이 시간 동안 하트비트가 없는 실행 중 작업은 중단된 것으로 보고 다시 대기열에 넣음
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", 180))
+# 워커 풀이 중단된 작업을 확인하는 간격 (초)
+JOB_SWEEP_INTERVAL = float(os.getenv("JOB_SWEEP_INTERVAL", 60))
+# UI 폴링 간격 (초)
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 0.5))
+# UI가 한 작업을 기다리는 최대 시간 (초) - 넘으면 폴링을 멈추고 나중에 다시 확인하도록 안내
+JOB_WATCH_TIMEOUT = float(os.getenv("JOB_WATCH_TIMEOUT", 1800))
+
+INFLIGHT_STATUSES = ("queued", "running")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    job_key TEXT NOT NULL,
+    shortcode TEXT NOT NULL,
+    topic TEXT,
+    url TEXT NOT NULL,
+    input_data TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    chars INTEGER NOT NULL DEFAULT 0,
+    partial TEXT,
+    reels_info TEXT,
+    analysis TEXT,
+    error TEXT,
+    worker TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT
+);
+-- 같은 작업은 대기/실행 중인 것이 하나만 있도록 (프로세스 간 합치기)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_inflight ON jobs(job_key) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, updated_at);
+"""
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def _cutoff(seconds):
+    return (datetime.now() - timedelta(seconds=seconds)).strftime('%Y-%m-%d %H:%M:%S')
+
+def _worker_name():
+    """작업을 맡은 워커 (호스트:PID:스레드) - 재시작 시 이 호스트의 죽은 프로세스가 맡았던 작업을 찾는 데 사용"""
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+
+def _worker_pid(worker):
+    try:
+        return int(worker.split(":", 2)[1])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        # Windows의 os.kill은 프로세스를 종료시키므로 확인하지 않음 (하트비트 만료로 감지)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def is_job_stalled(job, stale_seconds=JOB_STALE_SECONDS):
+    """실행 중인데 하트비트가 멈춘 작업인지 (워커 풀이 곧 다시 대기열에 넣음)"""
+    return job["status"] == "running" and job["updated_at"] < _cutoff(stale_seconds)
+
+def shortcode_from_url(url):
+    from reels_analysis import normalize_instagram_url
+
+    normalized = normalize_instagram_url(url)
+    return normalized.split("/p/")[1].strip("/") if "/p/" in normalized else normalized
+
+def job_key(shortcode, input_data):
+    """(숏코드, 주제, 영상 분석 입력)이 같으면 같은 작업"""
+    payload = json.dumps(
+        [shortcode, input_data["content_info"]["topic"], input_data.get("video_analysis", {})],
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class JobStore:
+    """jobs 테이블 (스레드마다 별도 커넥션, WAL 모드)"""
+
+    def __init__(self, path=JOBS_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def create(self, url, input_data):
+        """(작업 ID, 새로 만들었는지). 같은 작업이 대기/실행 중이면 그 작업 ID를 반환합니다."""
+        shortcode = shortcode_from_url(url)
+        key = job_key(shortcode, input_data)
+        job_id = uuid.uuid4().hex
+        now = _now()
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    """
+                    INSERT INTO jobs (job_id, job_key, shortcode, topic, url, input_data, status, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, 'queued', ?, ?)
+                    """,
+                    (job_id, key, shortcode, input_data["content_info"]["topic"], url,
+                     json.dumps(input_data, ensure_ascii=False), now, now),
+                )
+            return job_id, True
+        except sqlite3.IntegrityError:
+            row = self._connect().execute(
+                "SELECT job_id FROM jobs WHERE job_key = ? AND status IN ('queued', 'running')", (key,)
+            ).fetchone()
+            if row is None:
+                # 그 사이 기존 작업이 끝난 경우
+                return self.create(url, input_data)
+            return row["job_id"], False
+
+    def claim(self, job_id, worker):
+        """대기 중인 작업을 실행 상태로 바꿉니다. 다른 워커가 먼저 가져갔으면 False."""
+        now = _now()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = 'running', worker = ?, started_at = ?, updated_at = ?
+                WHERE job_id = ? AND status = 'queued'
+                """,
+                (worker, now, now, job_id),
+            )
+        return cursor.rowcount == 1
+
+    # update/finish/fail/heartbeat는 그 작업을 맡은 워커가 아직 실행 중일 때만 반영됩니다.
+    # (중단된 것으로 보고 다시 대기열에 넣은 작업을 예전 워커가 덮어쓰지 않도록) 반영됐으면 True.
+
+    def update(self, job_id, worker, **fields):
+        """stage / chars / partial / reels_info 갱신 (updated_at은 중단 감지용 하트비트)"""
+        if "reels_info" in fields:
+            fields["reels_info"] = json.dumps(fields["reels_info"], ensure_ascii=False, default=str)
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE job_id = ? AND worker = ? AND status = 'running'",
+                (*fields.values(), _now(), job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def finish(self, job_id, worker, reels_info, analysis):
+        now = _now()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = 'done', reels_info = ?, analysis = ?, partial = NULL,
+                       updated_at = ?, finished_at = ?
+                WHERE job_id = ? AND worker = ? AND status = 'running'
+                """,
+                (json.dumps(reels_info, ensure_ascii=False, default=str), analysis, now, now, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, worker, error):
+        now = _now()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = 'error', error = ?, updated_at = ?, finished_at = ?
+                WHERE job_id = ? AND worker = ? AND status = 'running'
+                """,
+                (error, now, now, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for column in ("input_data", "reels_info"):
+            if job[column]:
+                job[column] = json.loads(job[column])
+        return job
+
+    def queue_position(self, job_id):
+        """이 작업보다 먼저 대기 중인 작업 수"""
+        row = self._connect().execute(
+            """
+            SELECT COUNT(*) FROM jobs
+            WHERE status = 'queued' AND created_at < (SELECT created_at FROM jobs WHERE job_id = ?)
+            """,
+            (job_id,),
+        ).fetchone()
+        return row[0]
+
+    def heartbeat(self, job_id, worker):
+        """실행 중인 작업이 살아 있음을 표시합니다."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE job_id = ? AND worker = ? AND status = 'running'",
+                (_now(), job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def _requeue(self, conn, job_id, worker):
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'queued', worker = NULL, updated_at = ? WHERE job_id = ? AND status = 'running' AND worker IS ?",
+            (_now(), job_id, worker),
+        )
+        return cursor.rowcount == 1
+
+    def requeue_dead_workers(self, host):
+        """이 호스트에서 이미 끝난 프로세스가 맡고 있던 실행 중 작업을 바로 다시 대기열에 넣고 그 ID 목록을 반환합니다."""
+        rows = self._connect().execute(
+            "SELECT job_id, worker FROM jobs WHERE status = 'running' AND worker LIKE ?", (f"{host}:%",)
+        ).fetchall()
+        requeued = []
+        with self._connect() as conn:
+            for row in rows:
+                pid = _worker_pid(row["worker"])
+                if pid is not None and pid != os.getpid() and not _pid_alive(pid):
+                    if self._requeue(conn, row["job_id"], row["worker"]):
+                        requeued.append(row["job_id"])
+        return requeued
+
+    def requeue_stale(self, stale_seconds=JOB_STALE_SECONDS):
+        """하트비트가 멈춘 실행 중 작업(다른 호스트 포함)을 다시 대기열에 넣고,
+        그 작업과 오래 대기 중인 작업(제출한 프로세스가 실행 전에 끝난 경우 등)의 ID 목록을 반환합니다."""
+        cutoff = _cutoff(stale_seconds)
+        rows = self._connect().execute(
+            "SELECT job_id, worker FROM jobs WHERE status = 'running' AND updated_at < ?", (cutoff,)
+        ).fetchall()
+        requeued = []
+        with self._connect() as conn:
+            for row in rows:
+                if self._requeue(conn, row["job_id"], row["worker"]):
+                    requeued.append(row["job_id"])
+        waiting = self._connect().execute(
+            "SELECT job_id FROM jobs WHERE status = 'queued' AND updated_at < ? ORDER BY created_at", (cutoff,)
+        ).fetchall()
+        return requeued + [row["job_id"] for row in waiting if row["job_id"] not in requeued]
+
+    def queued_ids(self):
+        rows = self._connect().execute(
+            "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+        ).fetchall()
+        return [row["job_id"] for row in rows]
+
+    def counts(self):
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {row[0]: row[1] for row in rows}
+
+class JobProgress:
+    """파이프라인 진행 이벤트를 jobs 테이블에 기록하는 progress_callback
+
+    단계가 바뀔 때와 분석 글자가 JOB_PARTIAL_FLUSH_CHARS만큼 쌓일 때만 저장합니다.
+    """
+
+    def __init__(self, store, job_id, worker):
+        self.store = store
+        self.job_id = job_id
+        self.worker = worker
+        self._stage = None
+        self._chunks = []
+        self._chars = 0
+        self._flushed_chars = 0
+
+    def __call__(self, stage, detail):
+        if stage == "reels_info":
+            self.store.update(self.job_id, self.worker, reels_info=detail["reels_info"])
+        elif stage == "analysis":
+            if detail.get("delta"):
+                self._chunks.append(detail["delta"])
+                self._chars += len(detail["delta"])
+            if self._stage != stage or self._chars - self._flushed_chars >= JOB_PARTIAL_FLUSH_CHARS:
+                self._flushed_chars = self._chars
+                self.store.update(self.job_id, self.worker, stage=stage, chars=self._chars, partial="".join(self._chunks))
+        elif stage != self._stage:
+            self.store.update(self.job_id, self.worker, stage=stage)
+        self._stage = stage
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_job_store(path=None):
+    """DB 경로별 프로세스 전역 JobStore"""
+    path = str(path or JOBS_DB_PATH)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = JobStore(path)
+        return _stores[path]
+
+class JobHeartbeat:
+    """with 블록 동안 JOB_HEARTBEAT_SECONDS마다 작업의 updated_at을 갱신합니다.
+
+    단계 변화가 없는 긴 다운로드/전사 중에도 다른 프로세스가 중단된 작업으로 오인해 다시 실행하지 않게 합니다.
+    """
+
+    def __init__(self, store, job_id, worker, interval=JOB_HEARTBEAT_SECONDS):
+        self.store = store
+        self.job_id = job_id
+        self.worker = worker
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-heartbeat-{job_id[:8]}", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.store.heartbeat(self.job_id, self.worker)
+            except sqlite3.Error as e:
+                print(f"⚠️ 작업 하트비트 기록 실패: {str(e)}")
+
+def run_job(job_id, db_path=None):
+    """워커에서 작업 하나를 실행합니다 (프로세스 풀에서도 쓰도록 모듈 함수).
+
+    맡은 작업은 어떤 예외가 나도 error 상태로 끝냅니다. 맡기 전에 실패하면 대기 상태로 남아 다음 확인 때 다시 실행됩니다.
+    """
+    store = None
+    claimed = False
+    worker = _worker_name()
+    try:
+        from reels_analysis import run_analysis_pipeline
+
+        store = get_job_store(db_path)
+        claimed = store.claim(job_id, worker)
+        if not claimed:
+            return
+        with JobHeartbeat(store, job_id, worker):
+            job = store.get(job_id)
+            result = run_analysis_pipeline(
+                job["url"], job["input_data"], progress_callback=JobProgress(store, job_id, worker)
+            )
+        result = result or {"error": "처리 결과가 없습니다."}
+    except Exception as e:
+        result = {"error": f"처리 중 오류가 발생했습니다: {str(e)}"}
+    if not claimed:
+        print(f"⚠️ 작업을 시작하지 못했습니다 ({job_id}): {result['error']}")
+        return
+    try:
+        if "error" in result:
+            recorded = store.fail(job_id, worker, result["error"])
+        else:
+            recorded = store.finish(job_id, worker, result["reels_info"], result["analysis"])
+        if not recorded:
+            print(f"⚠️ 다른 워커가 이어받은 작업이라 결과를 기록하지 않습니다 ({job_id})")
+    except sqlite3.Error as e:
+        print(f"⚠️ 작업 결과 기록 실패 ({job_id}): {str(e)}")
+
+class JobQueue:
+    """작업 제출 + 워커 풀.
+
+    시작 시 이 호스트에서 죽은 프로세스가 맡았던 작업과 대기 중인 작업을 다시 실행하고,
+    이후 JOB_SWEEP_INTERVAL마다 하트비트가 멈춘 작업을 다시 대기열에 넣어 실행합니다.
+    """
+
+    def __init__(self, store=None, workers=JOB_WORKERS, executor=JOB_EXECUTOR, sweep_interval=JOB_SWEEP_INTERVAL):
+        self.store = store or get_job_store()
+        if executor == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        # 이 프로세스의 풀에 이미 넣은 작업 (주기 확인 때 중복 제출 방지)
+        self._dispatched = set()
+        self.store.requeue_dead_workers(socket.gethostname())
+        self.store.requeue_stale()
+        for job_id in self.store.queued_ids():
+            self._dispatch(job_id)
+        self._sweeper = threading.Thread(target=self._sweep, args=(sweep_interval,), name="job-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _dispatch(self, job_id):
+        with self._lock:
+            if job_id in self._dispatched:
+                return
+            self._dispatched.add(job_id)
+        future = self._executor.submit(run_job, job_id, str(self.store.path))
+        future.add_done_callback(lambda f: self._done(job_id, f))
+
+    def _done(self, job_id, future):
+        with self._lock:
+            self._dispatched.discard(job_id)
+        if not future.cancelled() and future.exception() is not None:
+            print(f"⚠️ 작업 실행 오류 ({job_id}): {future.exception()}")
+
+    def _sweep(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                for job_id in self.store.requeue_stale():
+                    self._dispatch(job_id)
+            except (sqlite3.Error, RuntimeError) as e:
+                # RuntimeError: 종료 중인 풀에 제출
+                print(f"⚠️ 중단된 작업 확인 실패: {str(e)}")
+
+    def submit(self, url, input_data):
+        """작업 ID를 반환합니다. 같은 작업이 이미 대기/실행 중이면 그 작업에 합류합니다."""
+        with self._lock:
+            job_id, created = self.store.create(url, input_data)
+        if created:
+            self._dispatch(job_id)
+        else:
+            print(f"[Job] 진행 중인 같은 작업에 합류: {job_id}")
+        return job_id
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def shutdown(self, wait=True):
+        self._stop.set()
+        self._executor.shutdown(wait=wait)
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_job_queue():
+    """프로세스 전역 작업 큐 (모든 Streamlit 세션이 공유)"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+def submit_job(url, input_data):
+    return get_job_queue().submit(url, input_data)
+
+def get_job(job_id):
+    try:
+        return get_job_store().get(job_id)
+    except sqlite3.Error as e:
+        print(f"⚠️ 작업 상태 조회 실패: {str(e)}")
+        return None
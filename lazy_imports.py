@@ -0,0 +1,58 @@
+"""무거운 의존성을 처음 사용할 때 import하는 지연 로더
+
+    instaloader = lazy_import("instaloader")   # 여기서는 import하지 않음
+    instaloader.Post.from_shortcode(...)       # 첫 속성 접근 시 실제 import
+
+앱 시작(입력 폼 렌더링)에 필요 없는 instaloader / openai / httpx / requests / pandas 등을
+이 파사드로 감싸 콜드 스타트 시간을 줄입니다.
+"""
+import sys
+import time
+import types
+import importlib
+import threading
+
+_lock = threading.RLock()
+# 모듈 이름: 실제 import에 걸린 시간(초)
+_load_times = {}
+
+class LazyModule(types.ModuleType):
+    """속성에 처음 접근할 때 실제 모듈을 import하는 프록시"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with _lock:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    _load_times[self.__name__] = time.perf_counter() - start
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+def lazy_import(name):
+    """이미 import된 모듈이면 그대로, 아니면 지연 프록시를 반환합니다."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+def get_lazy_load_times():
+    """지연 로드된 모듈별 import 시간(초)"""
+    with _lock:
+        return dict(_load_times)
@@ -0,0 +1,245 @@
+import os
+import re
+import tempfile
+import threading
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from concurrency import limit
+from instrumentation import measure
+from downloader import download_file
+
+# Whisper 업로드용 오디오 인코딩 설정
+# - opus: OGG/Opus 저비트레이트 음성 (WAV 대비 약 1/10 크기, 기본값)
+# - mp3: 저비트레이트 MP3 (호환성 우선)
+# - wav: 기존 16kHz PCM (무손실, 가장 큼)
+AUDIO_FORMATS = {
+    "opus": {"suffix": ".ogg", "container": "ogg", "codec": ['-c:a', 'libopus', '-b:a', '24k', '-application', 'voip']},
+    "mp3": {"suffix": ".mp3", "container": "mp3", "codec": ['-c:a', 'libmp3lame', '-b:a', '32k']},
+    "wav": {"suffix": ".wav", "container": "wav", "codec": ['-c:a', 'pcm_s16le']},
+}
+AUDIO_FORMAT = os.getenv("WHISPER_AUDIO_FORMAT", "opus")
+# 1초 이상 이어지는 무음 구간 제거 여부
+AUDIO_TRIM_SILENCE = os.getenv("WHISPER_TRIM_SILENCE", "0") == "1"
+# 디스크를 거치지 않고 ffmpeg 출력(stdout)을 메모리에서 바로 업로드할지 여부
+AUDIO_IN_MEMORY = os.getenv("WHISPER_AUDIO_IN_MEMORY", "1") == "1"
+
+# 청크 분할용 무음 감지 기준 (이 세기 이하가 이 시간 이상 이어지면 무음)
+SILENCE_NOISE = os.getenv("SILENCE_NOISE", "-35dB")
+SILENCE_MIN_DURATION = float(os.getenv("SILENCE_MIN_DURATION", 0.3))
+
+SILENCE_FILTER = (
+    "silenceremove=start_periods=1:start_threshold=-50dB:"
+    "stop_periods=-1:stop_duration=1:stop_threshold=-50dB"
+)
+
+@dataclass
+class EncodedAudio:
+    """인코딩된 오디오. 메모리(data) 또는 파일(path) 중 하나에 담깁니다."""
+    filename: str
+    audio_format: str
+    data: bytes = None
+    path: str = None
+
+    def read(self):
+        return self.data if self.data is not None else Path(self.path).read_bytes()
+
+    @property
+    def size(self):
+        return len(self.data) if self.data is not None else os.path.getsize(self.path)
+
+    def as_upload(self):
+        """OpenAI 업로드용 (파일명, 바이트) 튜플"""
+        return (self.filename, self.read())
+
+def download_to_file(video_url, path, progress_callback=None, resume_key=None):
+    """CDN에서 영상을 받아 path에 저장합니다 (Range 병렬 / 이어받기는 downloader 참고).
+
+    진행 표시가 필요하면 progress_callback(받은 바이트, 전체 바이트)을 넘깁니다 (예: downloader.print_progress).
+    """
+    with limit("instagram"):
+        download_file(video_url, path, progress_callback=progress_callback, resume_key=resume_key)
+    return path
+
+def build_audio_command(source, output, audio_format="wav", trim_silence=False):
+    """오디오 추출용 ffmpeg 명령어를 만듭니다. output이 'pipe:1'이면 stdout으로 출력합니다."""
+    spec = AUDIO_FORMATS[audio_format]
+    command = [
+        'ffmpeg',
+        '-i', source,  # 로컬 파일 또는 URL에서 직접 스트리밍
+        '-vn',  # 비디오 스트림 제거
+        *spec["codec"],  # 오디오 코덱
+        '-ar', '16000',  # 샘플링 레이트
+        '-ac', '1',  # 모노 채널
+    ]
+    if trim_silence:
+        command += ['-af', SILENCE_FILTER]
+    command += ['-f', spec["container"], '-y', output]
+    return command
+
+def extract_audio(source, output_path, audio_format="wav", trim_silence=False):
+    """FFmpeg로 source(로컬 파일 또는 URL)에서 오디오만 추출해 파일로 저장합니다."""
+    command = build_audio_command(source, output_path, audio_format, trim_silence)
+    with measure("ffmpeg", audio_format=audio_format, output="file") as m:
+        with limit("ffmpeg"):
+            subprocess.run(command, check=True, capture_output=True)
+        m.add_bytes(os.path.getsize(output_path))
+    return output_path
+
+def encode_audio_in_memory(source, audio_format="opus", trim_silence=False):
+    """FFmpeg 출력을 파이프로 받아 디스크 없이 메모리에서 인코딩된 오디오를 반환합니다."""
+    command = build_audio_command(source, 'pipe:1', audio_format, trim_silence)
+    with measure("ffmpeg", audio_format=audio_format, output="memory") as m:
+        with limit("ffmpeg"):
+            result = subprocess.run(command, check=True, capture_output=True)
+        m.add_bytes(len(result.stdout))
+    return EncodedAudio(
+        filename=f"audio{AUDIO_FORMATS[audio_format]['suffix']}",
+        audio_format=audio_format,
+        data=result.stdout,
+    )
+
+def _audio_input(audio):
+    """EncodedAudio를 ffmpeg 입력으로 넘기는 방법 (파일이면 경로, 메모리면 stdin 파이프)"""
+    if audio.path is not None:
+        return audio.path, None
+    return 'pipe:0', audio.data
+
+def _parse_timestamp(value):
+    hours, minutes, seconds = value.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def detect_silences(audio, noise=SILENCE_NOISE, min_duration=SILENCE_MIN_DURATION):
+    """ffmpeg silencedetect로 (전체 길이, [(무음 시작, 무음 끝), ...])를 구합니다."""
+    source, data = _audio_input(audio)
+    command = [
+        'ffmpeg', '-i', source,
+        '-af', f"silencedetect=noise={noise}:d={min_duration}",
+        '-f', 'null', '-'
+    ]
+    with measure("ffmpeg", op="silencedetect"):
+        with limit("ffmpeg"):
+            result = subprocess.run(command, input=data, check=True, capture_output=True)
+    log = result.stderr.decode("utf-8", errors="ignore")
+
+    silences = []
+    start = None
+    for match in re.finditer(r"silence_(start|end): (-?[\d.]+)", log):
+        if match.group(1) == "start":
+            start = max(float(match.group(2)), 0.0)
+        elif start is not None:
+            silences.append((start, float(match.group(2))))
+            start = None
+
+    # 파이프 입력은 Duration이 N/A일 수 있으므로 마지막 진행 시간(time=)을 사용
+    duration = 0.0
+    durations = re.findall(r"Duration: (\d+:\d+:[\d.]+)", log) or re.findall(r"time=(\d+:\d+:[\d.]+)", log)[-1:]
+    if durations:
+        duration = _parse_timestamp(durations[0])
+    if start is not None:
+        silences.append((start, duration))
+    return duration, silences
+
+def encode_audio_segment(audio, start, end, audio_format=None):
+    """오디오의 [start, end) 구간만 잘라 인코딩합니다. end가 None이면 파일 끝까지 자릅니다."""
+    audio_format = audio_format or audio.audio_format
+    source, data = _audio_input(audio)
+    spec = AUDIO_FORMATS[audio_format]
+    bounds = ['-ss', f"{start:.3f}"]
+    if end is not None:
+        bounds += ['-to', f"{end:.3f}"]
+    command = [
+        'ffmpeg', '-i', source,
+        *bounds,
+        '-vn', *spec["codec"], '-ar', '16000', '-ac', '1',
+        '-f', spec["container"], '-y', 'pipe:1'
+    ]
+    with measure("ffmpeg", op="segment", audio_format=audio_format) as m:
+        with limit("ffmpeg"):
+            result = subprocess.run(command, input=data, check=True, capture_output=True)
+        m.add_bytes(len(result.stdout))
+    return EncodedAudio(
+        filename=f"audio{spec['suffix']}",
+        audio_format=audio_format,
+        data=result.stdout,
+    )
+
+class ReelMedia:
+    """릴스 한 건의 미디어를 한 번만 가져와 모든 소비자(오디오 추출, 프레임 분석 등)가 공유합니다.
+
+    - 오디오만 필요한 경우 영상을 디스크에 저장하지 않고 URL에서 바로 추출합니다.
+    - 영상 파일이 필요한 소비자가 있으면 최초 요청 시 한 번만 다운로드합니다.
+      다운로드와 오디오 추출은 서로 기다리지 않으며, 오디오 추출 시점에 영상이 이미 받아져 있으면 그 로컬 파일을 사용합니다.
+    - close() (또는 with 블록 종료) 시 만든 임시 파일을 모두 삭제합니다.
+    """
+
+    def __init__(self, video_url):
+        self.video_url = video_url
+        self._video_path = None
+        self._encoded_audio = {}
+        self._temp_files = []
+        # 다운로드와 오디오 추출이 서로를 막지 않도록 잠금을 나눔
+        self._video_lock = threading.Lock()
+        self._audio_lock = threading.Lock()
+        self._files_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _new_temp_path(self, suffix):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        os.close(fd)
+        with self._files_lock:
+            self._temp_files.append(path)
+        return path
+
+    @property
+    def source(self):
+        """ffmpeg 입력으로 쓸 소스 - 이미 받은 로컬 파일이 있으면 재사용합니다."""
+        return self._video_path or self.video_url
+
+    def video_path(self):
+        """영상 파일 경로를 반환합니다. 최초 호출 시에만 다운로드합니다."""
+        with self._video_lock:
+            if self._video_path is None:
+                path = self._new_temp_path('.mp4')
+                download_to_file(self.video_url, path)
+                self._video_path = path
+            return self._video_path
+
+    def encoded_audio(self, audio_format=None, trim_silence=None, in_memory=None):
+        """Whisper 업로드용으로 압축한 오디오를 반환합니다. 설정 조합별로 한 번만 인코딩합니다."""
+        audio_format = audio_format or AUDIO_FORMAT
+        trim_silence = AUDIO_TRIM_SILENCE if trim_silence is None else trim_silence
+        in_memory = AUDIO_IN_MEMORY if in_memory is None else in_memory
+        if audio_format not in AUDIO_FORMATS:
+            raise ValueError(f"지원하지 않는 오디오 형식입니다: {audio_format}")
+
+        key = (audio_format, trim_silence, in_memory)
+        with self._audio_lock:
+            if key not in self._encoded_audio:
+                if in_memory:
+                    audio = encode_audio_in_memory(self.source, audio_format, trim_silence)
+                else:
+                    suffix = AUDIO_FORMATS[audio_format]["suffix"]
+                    path = extract_audio(self.source, self._new_temp_path(suffix), audio_format, trim_silence)
+                    audio = EncodedAudio(filename=f"audio{suffix}", audio_format=audio_format, path=path)
+                self._encoded_audio[key] = audio
+            return self._encoded_audio[key]
+
+    def close(self):
+        # 진행 중인 다운로드/추출이 끝난 뒤 정리
+        with self._video_lock, self._audio_lock, self._files_lock:
+            for path in self._temp_files:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    print(f"임시 파일 삭제 실패: {e}")
+            self._temp_files = []
+            self._video_path = None
+            self._encoded_audio = {}
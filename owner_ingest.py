@@ -0,0 +1,296 @@
+"""계정 단위 릴스 수집 (증분 동기화)
+
+경쟁 계정(owner)의 게시물을 instaloader 프로필 이터레이터로 훑어 릴스 메타데이터를 결과 저장소에 쌓습니다.
+전사/분석은 바로 하지 않고, 릴스를 열거나(open_reel) 조회수 기준(--min-views)을 넘을 때만 작업 큐에 넣습니다.
+
+동기화 한 번은 두 단계로 진행됩니다.
+1. 새 게시물: 최신순으로 지난 동기화에서 가장 최신이었던 게시물(숏코드/날짜)을 만날 때까지 조회합니다.
+   최근 INGEST_REFRESH_DAYS일 안의 게시물은 조회수/좋아요 갱신을 위해 계속 다시 읽습니다.
+   --max-posts에 걸려 기준점까지 닿지 못하면 그 위치(freeze)를 저장하고, 다음 동기화가 거기서부터 이어가
+   기준점에 닿은 뒤에야 기준점을 옮깁니다 (새 게시물이 많은 계정도 매번 같은 최신 게시물만 읽지 않도록).
+2. 이전 수집 이어받기: 과거 게시물 수집이 끝나지 않았으면 저장해 둔 이터레이터 위치(freeze)부터 이어서 조회합니다.
+   --max-posts로 한 번에 조회할 게시물 수를 제한하면 다음 동기화가 그 지점부터 이어갑니다.
+
+    python owner_ingest.py sync competitor_a competitor_b --max-posts 200
+    python owner_ingest.py sync competitor_a --min-views 100000   # 조회수 10만 이상은 바로 분석
+    python owner_ingest.py list competitor_a --pending
+"""
+import os
+import sys
+import argparse
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from concurrency import limit
+from instrumentation import measure
+from instagram_session import get_session_manager
+from results_store import get_results_store
+
+# 동기화 한 번에 조회할 최대 게시물 수 (0이면 제한 없음)
+INGEST_MAX_POSTS = int(os.getenv("INGEST_MAX_POSTS", 0))
+# 이 조회수 이상인 릴스는 수집 후 바로 전사/분석 작업을 제출 (0이면 사용 안 함)
+INGEST_ANALYZE_MIN_VIEWS = int(os.getenv("INGEST_ANALYZE_MIN_VIEWS", 0))
+# 최근 며칠 안의 게시물은 조회수 갱신을 위해 매번 다시 읽음
+INGEST_REFRESH_DAYS = float(os.getenv("INGEST_REFRESH_DAYS", 7))
+# 이 게시물 수마다 저장소에 쓰고 이어받기 위치를 저장
+INGEST_SAVE_EVERY = int(os.getenv("INGEST_SAVE_EVERY", 50))
+# 자동 분석에 사용할 주제 (비어 있으면 벤치마킹 기획 없이 분석만)
+INGEST_TOPIC = os.getenv("INGEST_TOPIC", "")
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def reel_url(shortcode):
+    return f"https://www.instagram.com/p/{shortcode}/"
+
+def post_to_listing(post):
+    """프로필 목록 응답에서 바로 읽을 수 있는 항목만 추출합니다.
+
+    video_url(곧 만료되는 CDN 주소)과 video_duration은 게시물마다 추가 조회가 필요할 수 있어 저장하지 않고,
+    릴스를 열 때 get_post_metadata로 새로 가져옵니다.
+    """
+    return {
+        'shortcode': post.shortcode,
+        'owner': post.owner_username,
+        'date': post.date.strftime(DATE_FORMAT),
+        'caption': post.caption if post.caption else "",
+        'view_count': post.video_view_count or 0,
+        'likes': post.likes,
+        'comments': post.comments,
+    }
+
+@dataclass
+class SyncResult:
+    owner: str
+    seen: int = 0                # 이번에 조회한 게시물 수 (고정 게시물, 사진 포함)
+    stored: int = 0              # 저장(갱신)한 릴스 수
+    new: int = 0                 # 처음 저장된 릴스 수
+    backfill_done: bool = False  # 과거 게시물까지 모두 수집했는지
+    error: str = None
+    jobs: list = field(default_factory=list)  # 제출한 (숏코드, 작업 ID)
+
+class OwnerSync:
+    """계정 하나의 동기화 한 번 (새 게시물 확인 → 이전 수집 이어받기)"""
+
+    def __init__(self, owner, max_posts=None, store=None, session=None):
+        self.owner = owner
+        self.max_posts = max_posts or None
+        self.store = store or get_results_store()
+        self.session = session or get_session_manager()
+        self.result = SyncResult(owner)
+        self.limited = False
+        self._batch = []
+        self._newest = None
+        self._new_posts = None
+        self._backfill_posts = None
+
+    def _next_posts(self, posts):
+        """게시물을 하나씩 돌려줍니다. 다음 페이지 조회가 일어날 수 있으므로 Instagram 동시 실행 한도 안에서 진행합니다."""
+        while self.max_posts is None or self.result.seen < self.max_posts:
+            with limit("instagram"):
+                post = next(posts, None)
+            if post is None:
+                return
+            self.result.seen += 1
+            yield post
+        self.limited = True
+
+    def _record(self, post):
+        date = post.date.strftime(DATE_FORMAT)
+        # 고정 게시물은 날짜 순서와 관계없이 맨 앞에 나오므로 기준점으로 쓰지 않음
+        if not getattr(post, "is_pinned", False) and (self._newest is None or date > self._newest[1]):
+            self._newest = (post.shortcode, date)
+        if post.is_video:
+            self._batch.append(post_to_listing(post))
+            if len(self._batch) >= INGEST_SAVE_EVERY:
+                self._flush()
+
+    def _flush(self, **state):
+        if self._batch:
+            self.store.upsert_listings(self._batch)
+            self.result.stored += len(self._batch)
+            self._batch = []
+        if state:
+            self.store.save_owner_state(self.owner, **state)
+
+    def _save_newest(self, state):
+        if self._newest and (not state.get("newest_date") or self._newest[1] > state["newest_date"]):
+            self._flush(newest_shortcode=self._newest[0], newest_date=self._newest[1])
+
+    def _open_posts(self, cursor):
+        """cursor 위치부터 게시물 이터레이터를 엽니다."""
+        try:
+            return self.session.iter_profile_posts(self.owner, cursor=cursor)
+        except Exception as e:
+            if not cursor:
+                raise
+            # 만료되었거나 맞지 않는 위치 - 처음부터 다시 (이미 저장된 릴스는 갱신만 됨)
+            print(f"⚠️ {self.owner}: 이어받기 위치를 사용할 수 없어 처음부터 수집합니다: {e}")
+            return self.session.iter_profile_posts(self.owner)
+
+    def _pending_newest(self, state):
+        """이어가는 중인 새 게시물 구간에서 지금까지 본 가장 최신 게시물 (기준점 후보)"""
+        pending = (state["new_pending_shortcode"], state["new_pending_date"]) if state.get("new_pending_date") else None
+        candidates = [newest for newest in (pending, self._newest) if newest]
+        return max(candidates, key=lambda newest: newest[1]) if candidates else None
+
+    def _sync_new(self, state):
+        """지난 동기화 이후 올라온 게시물 (+ 최근 게시물 조회수 갱신). 기준점까지 확인했으면 True
+
+        지난번에 중간에 멈췄으면 저장된 위치부터 이어갑니다.
+        """
+        refresh_after = (datetime.now() - timedelta(days=INGEST_REFRESH_DAYS)).strftime(DATE_FORMAT)
+        posts = self._new_posts = self._open_posts(state.get("new_cursor"))
+        for post in self._next_posts(posts):
+            date = post.date.strftime(DATE_FORMAT)
+            known = post.shortcode == state["newest_shortcode"] or date <= state["newest_date"]
+            if known and date < refresh_after and not getattr(post, "is_pinned", False):
+                return True
+            self._record(post)
+        return not self.limited
+
+    def _finish_new(self, state):
+        """새 게시물 구간을 끝까지 확인했으면 기준점을 옮기고 이어받기 위치를 지웁니다."""
+        newest = self._pending_newest(state)
+        update = {"new_cursor": None, "new_pending_shortcode": None, "new_pending_date": None}
+        if newest and newest[1] > state["newest_date"]:
+            update.update(newest_shortcode=newest[0], newest_date=newest[1])
+        self._flush(**update)
+
+    def _backfill(self, cursor):
+        """저장된 위치부터 과거 게시물 수집을 이어갑니다. 끝까지 수집했으면 True"""
+        posts = self._open_posts(cursor)
+        self._backfill_posts = posts
+        since_save = 0
+        for post in self._next_posts(posts):
+            self._record(post)
+            since_save += 1
+            if since_save >= INGEST_SAVE_EVERY:
+                since_save = 0
+                self._flush(backfill_cursor=self.session.freeze_posts(posts))
+        return not self.limited
+
+    def run(self):
+        state = self.store.get_owner_state(self.owner) or {}
+        before = self.store.count_owner_reels(self.owner)
+        first_sync = not state.get("newest_date")
+        backfill_done = bool(state.get("backfill_done"))
+        new_done = first_sync
+        total = before
+        with measure("owner_sync", owner=self.owner) as m:
+            try:
+                if not first_sync:
+                    new_done = self._sync_new(state)
+                    if new_done:
+                        # 새 게시물 구간을 끝까지 확인했을 때만 기준점을 옮김 (중간에 멈추면 빈 구간이 생김)
+                        self._finish_new(state)
+                if not backfill_done and not self.limited:
+                    backfill_done = self._backfill(state.get("backfill_cursor"))
+                    if backfill_done:
+                        self._flush(backfill_cursor=None, backfill_done=1)
+            except Exception as e:
+                m.status = "error"
+                self.result.error = str(e)
+                print(f"⚠️ {self.owner} 수집 중 오류: {e}")
+            finally:
+                if first_sync:
+                    # 첫 수집은 최신 게시물부터 읽으므로 기준점은 바로 저장 (그 이후 구간은 이어받기 위치가 담당)
+                    self._save_newest(state)
+                state_update = {"synced_at": datetime.now().strftime(DATE_FORMAT)}
+                if self._new_posts is not None and not new_done:
+                    # 다음 동기화가 이 위치부터 기준점까지 이어서 확인
+                    newest = self._pending_newest(state)
+                    if newest:
+                        state_update.update(new_pending_shortcode=newest[0], new_pending_date=newest[1])
+                    try:
+                        state_update["new_cursor"] = self.session.freeze_posts(self._new_posts)
+                    except Exception as e:
+                        print(f"⚠️ {self.owner}: 새 게시물 이어받기 위치 저장 실패: {e}")
+                if self._backfill_posts is not None and not backfill_done:
+                    try:
+                        state_update["backfill_cursor"] = self.session.freeze_posts(self._backfill_posts)
+                    except Exception as e:
+                        print(f"⚠️ {self.owner}: 이어받기 위치 저장 실패: {e}")
+                self._flush(**state_update)
+                total = self.store.count_owner_reels(self.owner)
+                self.store.save_owner_state(self.owner, reels=total)
+            m.set(seen=self.result.seen, stored=self.result.stored)
+        self.result.new = total - before
+        self.result.backfill_done = backfill_done
+        return self.result
+
+def open_reel(shortcode, topic=INGEST_TOPIC):
+    """수집된 릴스를 열 때 전사/분석 작업을 제출하고 작업 ID를 반환합니다 (같은 작업이 진행 중이면 합류)."""
+    from job_queue import submit_job
+    from batch_benchmark import empty_video_analysis
+
+    url = reel_url(shortcode)
+    return submit_job(url, {"url": url, "video_analysis": empty_video_analysis(), "content_info": {"topic": topic}})
+
+def submit_popular_reels(owner, min_views, topic=INGEST_TOPIC, store=None):
+    """조회수 기준을 넘었지만 아직 전사/분석하지 않은 릴스를 작업 큐에 넣습니다."""
+    store = store or get_results_store()
+    return [
+        (reel["shortcode"], open_reel(reel["shortcode"], topic))
+        for reel in store.list_owner_reels(owner, min_views=min_views, pending_only=True)
+    ]
+
+def sync_owner(owner, max_posts=INGEST_MAX_POSTS, min_views=INGEST_ANALYZE_MIN_VIEWS, topic=INGEST_TOPIC,
+               store=None, session=None):
+    """계정 하나를 동기화하고, min_views가 있으면 기준을 넘은 릴스의 분석 작업을 제출합니다."""
+    owner = owner.strip().lstrip("@")
+    result = OwnerSync(owner, max_posts, store, session).run()
+    if min_views:
+        result.jobs = submit_popular_reels(owner, min_views, topic, store)
+    return result
+
+def print_sync_result(result):
+    mark = "❌" if result.error else "✅"
+    backfill = "과거 게시물 수집 완료" if result.backfill_done else "과거 게시물 수집 중 (다음 동기화에서 이어서)"
+    print(
+        f"{mark} @{result.owner}: 게시물 {result.seen}개 조회, 릴스 {result.stored}개 저장 "
+        f"(새 릴스 {result.new}개), {backfill}"
+    )
+    if result.jobs:
+        print(f"   🤖 분석 작업 {len(result.jobs)}개 제출")
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sync_parser = subparsers.add_parser("sync", help="계정의 새 게시물 수집 / 이전 수집 이어받기")
+    sync_parser.add_argument("owners", nargs="+")
+    sync_parser.add_argument("--max-posts", type=int, default=INGEST_MAX_POSTS, help="계정당 조회할 최대 게시물 수 (0이면 제한 없음)")
+    sync_parser.add_argument("--min-views", type=int, default=INGEST_ANALYZE_MIN_VIEWS, help="이 조회수 이상이면 바로 분석 (0이면 사용 안 함)")
+    sync_parser.add_argument("--topic", default=INGEST_TOPIC, help="자동 분석에 사용할 주제")
+    list_parser = subparsers.add_parser("list", help="수집된 릴스 목록")
+    list_parser.add_argument("owner")
+    list_parser.add_argument("--min-views", type=int, default=0)
+    list_parser.add_argument("--pending", action="store_true", help="전사/분석 전인 릴스만")
+    list_parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.command == "list":
+        reels = get_results_store().list_owner_reels(args.owner.lstrip("@"), args.min_views, args.pending, args.limit)
+        for reel in reels:
+            status = "분석됨" if reel["analyses"] else ("전사됨" if reel["transcribed"] else "-")
+            print(f"{reel['date']}  {reel['shortcode']:<14} 조회수 {reel['view_count'] or 0:>10,}  {status}")
+        return 0
+
+    results = []
+    for owner in args.owners:
+        result = sync_owner(owner, args.max_posts, args.min_views, args.topic)
+        print_sync_result(result)
+        results.append(result)
+
+    jobs = [job_id for result in results for _, job_id in result.jobs]
+    if jobs:
+        from job_queue import get_job_queue, get_job
+
+        print(f"\n⏳ 분석 작업 {len(jobs)}개가 끝나기를 기다립니다...")
+        get_job_queue().shutdown(wait=True)
+        statuses = [(get_job(job_id) or {}).get("status") for job_id in jobs]
+        print(f"✨ 분석 완료 {statuses.count('done')}/{len(jobs)}")
+    return 1 if any(result.error for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import streamlit as st
+import pandas as pd
+from instrumentation import get_histogram, get_jsonl_sink, summarize
+from stage_caches import get_stage_cache_stats
+from client_registry import get_connection_metrics
+from job_queue import get_job_store
+from singleflight import get_single_flight_stats
+from instagram_session import get_session_manager
+
+# 페이지 기본 설정
+st.set_page_config(
+    page_title="📊 파이프라인 지표",
+    page_icon="📊",
+    layout="wide"
+)
+
+def summary_dataframe(summary):
+    """단계별 요약을 표로 변환합니다 (시간은 초 단위)."""
+    rows = []
+    for stage, stats in summary.items():
+        rows.append({
+            "단계": stage,
+            "건수": stats["count"],
+            "오류": stats["errors"],
+            "p50(초)": round(stats["p50"], 3),
+            "p95(초)": round(stats["p95"], 3),
+            "최대(초)": round(stats["max"], 3),
+            "캐시 적중률": f"{stats['hit_rate']:.0%}" if stats["hit_rate"] is not None else "-",
+            "전송량(KB)": round(stats["bytes"] / 1024, 1),
+            "입력 토큰": stats["prompt_tokens"],
+            "캐시된 입력 토큰": stats["cached_tokens"],
+            "출력 토큰": stats["completion_tokens"],
+            "첫 토큰 p50(초)": round(stats["ttft_p50"], 3) if stats["ttft_p50"] is not None else None,
+        })
+    return pd.DataFrame(rows)
+
+def main():
+    st.title("📊 파이프라인 지표")
+
+    source = st.radio(
+        "데이터 출처",
+        ["현재 프로세스 (최근 기록)", "JSONL 로그 (전체 실행)"],
+        horizontal=True,
+    )
+    if source.startswith("현재"):
+        records = get_histogram().records()
+    else:
+        limit = st.number_input("최근 기록 수", min_value=100, max_value=1_000_000, value=20_000, step=1000)
+        records = get_jsonl_sink().read(limit=int(limit))
+
+    if not records:
+        st.info("아직 기록된 지표가 없습니다. 릴스를 한 번 분석하면 단계별 지표가 쌓입니다.")
+        return
+
+    summary = summarize(records)
+    frame = summary_dataframe(summary)
+    st.dataframe(frame, hide_index=True, use_container_width=True)
+    st.bar_chart(frame.set_index("단계")[["p50(초)", "p95(초)"]])
+
+    with st.expander("캐시 / 커넥션 / Instagram 세션 / 작업 큐 / 합친 요청 통계"):
+        st.json({
+            "stage_caches": get_stage_cache_stats(),
+            "instagram_session": get_session_manager().get_stats(),
+            "connections": get_connection_metrics(),
+            "jobs": get_job_store().counts(),
+            "single_flight": get_single_flight_stats(),
+        })
+
+    if source.startswith("현재") and st.button("현재 프로세스 기록 초기화"):
+        get_histogram().reset()
+        st.rerun()
+
+main()
@@ -0,0 +1,71 @@
+import streamlit as st
+import pandas as pd
+from owner_ingest import sync_owner, open_reel, reel_url, INGEST_MAX_POSTS
+from results_store import get_results_store
+
+# 페이지 기본 설정
+st.set_page_config(
+    page_title="👥 계정 수집",
+    page_icon="👥",
+    layout="wide"
+)
+
+def reels_dataframe(reels):
+    return pd.DataFrame([
+        {
+            "날짜": reel["date"],
+            "숏코드": reel["shortcode"],
+            "조회수": reel["view_count"] or 0,
+            "좋아요": reel["likes"],
+            "댓글": reel["comments"],
+            "상태": "분석됨" if reel["analyses"] else ("전사됨" if reel["transcribed"] else "-"),
+            "캡션": (reel["caption"] or "").split("\n")[0][:60],
+        }
+        for reel in reels
+    ])
+
+def main():
+    st.title("👥 계정 수집")
+    st.caption("계정의 릴스 목록을 모아 두고, 열어 본 릴스나 조회수 기준을 넘은 릴스만 분석합니다.")
+
+    owner = st.text_input("Instagram 계정", placeholder="예: competitor_account").strip().lstrip("@")
+    if not owner:
+        return
+
+    store = get_results_store()
+    state = store.get_owner_state(owner)
+    if state:
+        backfill = "완료" if state["backfill_done"] else "진행 중"
+        st.write(f"릴스 {state['reels']}개 · 마지막 동기화 {state['synced_at']} · 과거 게시물 수집 {backfill}")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        max_posts = st.number_input("한 번에 조회할 게시물 수 (0이면 전체)", min_value=0, value=INGEST_MAX_POSTS or 200, step=50)
+    with col2:
+        min_views = st.number_input("조회수 기준", min_value=0, value=0, step=10000)
+
+    if st.button("🔄 동기화", type="primary"):
+        with st.spinner(f"@{owner} 게시물을 가져오는 중입니다..."):
+            result = sync_owner(owner, max_posts=int(max_posts), min_views=0)
+        if result.error:
+            st.error(f"수집 중 오류가 발생했습니다: {result.error}")
+        else:
+            st.success(f"게시물 {result.seen}개 조회, 새 릴스 {result.new}개")
+
+    reels = store.list_owner_reels(owner, min_views=int(min_views))
+    if not reels:
+        st.info("수집된 릴스가 없습니다. 동기화를 눌러 주세요.")
+        return
+    st.dataframe(reels_dataframe(reels), hide_index=True, use_container_width=True)
+
+    selected = st.selectbox(
+        "분석할 릴스",
+        [reel["shortcode"] for reel in reels],
+        format_func=lambda shortcode: f"{shortcode} ({reel_url(shortcode)})",
+    )
+    topic = st.text_input("벤치마킹 주제 (선택)")
+    if st.button("🔍 열기"):
+        job_id = open_reel(selected, topic)
+        st.markdown(f"분석을 시작했습니다. [결과 보기](/?job={job_id})")
+
+main()
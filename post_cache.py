@@ -0,0 +1,72 @@
+import os
+import time
+from urllib.parse import urlparse, parse_qs
+from cache_utils import TieredCache, MISS
+from instagram_session import get_session_manager
+from instrumentation import measure
+from singleflight import single_flight
+
+# 메타데이터 캐시 TTL - CDN video_url 만료(oe 파라미터)보다 항상 짧게 유지
+POST_CACHE_TTL = int(os.getenv("POST_CACHE_TTL", 30 * 60))
+# video_url 만료 직전의 URL은 재사용하지 않도록 두는 여유 시간(초)
+VIDEO_URL_EXPIRY_MARGIN = 5 * 60
+
+_post_cache = TieredCache("post_metadata", maxsize=512, ttl=POST_CACHE_TTL)
+
+def video_url_expiry(video_url):
+    """CDN URL의 oe(16진수 유닉스 시간) 파라미터에서 만료 시각을 읽습니다."""
+    try:
+        oe = parse_qs(urlparse(video_url).query).get("oe")
+        return int(oe[0], 16) if oe else None
+    except (ValueError, TypeError):
+        return None
+
+def metadata_ttl(metadata):
+    """기본 TTL과 video_url 만료 시각 중 더 짧은 쪽을 TTL로 사용합니다."""
+    ttl = POST_CACHE_TTL
+    expiry = video_url_expiry(metadata.get("video_url") or "")
+    if expiry:
+        ttl = min(ttl, expiry - time.time() - VIDEO_URL_EXPIRY_MARGIN)
+    return int(ttl)
+
+def post_to_metadata(post):
+    """instaloader Post에서 extract_reels_info의 info 필드를 추출합니다."""
+    return {
+        'shortcode': post.shortcode,
+        'date': post.date.strftime('%Y-%m-%d %H:%M:%S'),
+        'caption': post.caption if post.caption else "",
+        'view_count': post.video_view_count if hasattr(post, 'video_view_count') else 0,
+        'video_duration': post.video_duration if hasattr(post, 'video_duration') else 0,
+        'likes': post.likes,
+        'comments': post.comments,
+        'owner': post.owner_username,
+        'is_video': post.is_video,
+        'video_url': post.video_url,
+    }
+
+def get_post_metadata(shortcode):
+    """숏코드의 게시물 메타데이터를 반환합니다 (메모리 → 디스크 → Instagram 순)."""
+    with measure("metadata", shortcode=shortcode) as m:
+        metadata = _post_cache.get(shortcode)
+        if metadata is not MISS:
+            m.cache_hit()
+            return dict(metadata)
+
+        m.cache_miss()
+        # 같은 숏코드를 이미 조회 중이면 그 결과를 함께 사용
+        metadata, shared = single_flight("metadata").do(shortcode, _fetch_post_metadata, shortcode)
+        m.set(shared=shared)
+        return dict(metadata)
+
+def _fetch_post_metadata(shortcode):
+    post = get_session_manager().fetch_post(shortcode)
+    metadata = post_to_metadata(post)
+    _post_cache.set(shortcode, metadata, ttl=metadata_ttl(metadata))
+    return metadata
+
+def invalidate_post_metadata(shortcode):
+    """만료된 video_url 등으로 캐시를 버려야 할 때 사용합니다."""
+    _post_cache.delete(shortcode)
+
+def get_post_cache_stats():
+    return _post_cache.get_stats()
@@ -0,0 +1,127 @@
+"""토큰 예산 기반 프롬프트 조립 도구
+
+- 토큰 수 계산: tiktoken(로컬 토크나이저)이 있으면 사용, 없으면 글자 수 기반 추정
+- 중복 제거: 연속으로 반복되는 줄/문장(Whisper 반복 출력, 캡션의 같은 해시태그 블록 등)
+- 예산 맞추기: 너무 긴 스크립트/캡션은 앞부분과 끝부분을 남기고 가운데를 줄임
+- max_tokens 산정: 입력 길이로 예상 출력 길이를 계산 (고정 10000 대신)
+"""
+import os
+import re
+import threading
+from lazy_imports import lazy_import
+
+tiktoken = lazy_import("tiktoken")
+
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")  # gpt-4o
+# 입력 예산 (토큰)
+PROMPT_TRANSCRIPT_BUDGET = int(os.getenv("PROMPT_TRANSCRIPT_BUDGET", 3000))
+PROMPT_CAPTION_BUDGET = int(os.getenv("PROMPT_CAPTION_BUDGET", 800))
+PROMPT_VISUAL_BUDGET = int(os.getenv("PROMPT_VISUAL_BUDGET", 600))
+# 분석 출력: 항목별 체크리스트(고정분) + 스크립트/캡션 예시(입력 길이에 비례)
+# 여섯 항목 체크리스트만으로 약 1.3k 토큰이므로, 근거 인용이 긴 분석도 잘리지 않게 두 배 이상 여유를 둠
+ANALYSIS_OUTPUT_BASE = int(os.getenv("ANALYSIS_OUTPUT_BASE", 3000))
+ANALYSIS_OUTPUT_MAX = int(os.getenv("ANALYSIS_OUTPUT_MAX", 8000))
+REFINEMENT_OUTPUT_MAX = int(os.getenv("REFINEMENT_OUTPUT_MAX", 4000))
+
+TRUNCATION_MARKER = "\n…(중략)…\n"
+# 메시지 하나당 역할/구분자 토큰
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+def _get_encoder():
+    """tiktoken 인코더 (없으면 False - 추정치 사용)"""
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            _encoder = False
+            # 구버전 tiktoken에는 o200k_base가 없으므로 cl100k_base로 대체
+            for encoding in (TOKENIZER_ENCODING, "cl100k_base"):
+                try:
+                    _encoder = tiktoken.get_encoding(encoding)
+                    break
+                except ImportError:
+                    break
+                except Exception as e:
+                    # 인코딩 파일 다운로드 실패 등
+                    print(f"토크나이저 로드 실패 ({encoding}): {e}")
+        return _encoder
+
+def count_tokens(text):
+    """텍스트의 토큰 수. 토크나이저가 없으면 영문 4자, 한글 등 1.5자당 1토큰으로 추정합니다."""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return int(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5) + 1
+
+def count_message_tokens(messages):
+    return sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages) + 3
+
+def _dedupe_sentences(line):
+    # "감사합니다. 감사합니다. 감사합니다." 처럼 같은 문장이 이어지는 경우
+    sentences = []
+    for sentence in re.split(r"(?<=[.!?。])\s+", line):
+        if sentences and sentence.strip() and sentence.strip() == sentences[-1].strip():
+            continue
+        sentences.append(sentence)
+    return " ".join(sentences)
+
+def dedupe_text(text):
+    """연속으로 반복되는 줄과 문장을 하나로 줄입니다."""
+    lines = []
+    for line in (text or "").splitlines():
+        line = _dedupe_sentences(line)
+        if lines and line.strip() and line.strip() == lines[-1].strip():
+            continue
+        lines.append(line)
+    return "\n".join(lines).strip()
+
+def truncate_to_tokens(text, budget):
+    """예산을 넘으면 앞 2/3, 끝 1/3을 남기고 가운데를 줄입니다."""
+    if count_tokens(text) <= budget:
+        return text
+    if budget <= 0:
+        return ""
+    encoder = _get_encoder()
+    if encoder:
+        tokens = encoder.encode(text, disallowed_special=())
+        # 예산이 작아 끝부분 몫이 0이면 tokens[-0:]가 전체가 되므로 끝부분은 비움
+        tail_size = budget // 3
+        head, tail = tokens[:budget * 2 // 3], tokens[-tail_size:] if tail_size else []
+        return encoder.decode(head).rstrip() + TRUNCATION_MARKER + encoder.decode(tail).lstrip()
+    ratio = budget / count_tokens(text)
+    keep = int(len(text) * ratio)
+    tail_size = keep // 3
+    tail = text[-tail_size:] if tail_size else ""
+    return text[:keep * 2 // 3].rstrip() + TRUNCATION_MARKER + tail.lstrip()
+
+def fit_text(text, budget):
+    """중복 제거 후 예산에 맞춘 텍스트와 (원래 토큰 수, 최종 토큰 수)를 반환합니다."""
+    original_tokens = count_tokens(text or "")
+    fitted = truncate_to_tokens(dedupe_text(text), budget)
+    return fitted, original_tokens, count_tokens(fitted)
+
+def analysis_max_tokens(transcript_tokens, caption_tokens, has_topic):
+    """분석 출력 예상치: 체크리스트 + (주제가 있으면) 원본 길이만큼의 스크립트/캡션 예시와 기획"""
+    expected = ANALYSIS_OUTPUT_BASE
+    if has_topic:
+        expected += int((transcript_tokens + caption_tokens) * 1.5) + 600
+    return min(expected, ANALYSIS_OUTPUT_MAX)
+
+def refinement_max_tokens(transcript_tokens, caption_tokens):
+    """정제 출력 예상치: 번역/교정된 스크립트 + 캡션 (한국어 번역 시 늘어나는 분량 감안)"""
+    return min(int((transcript_tokens + caption_tokens) * 1.5) + 100, REFINEMENT_OUTPUT_MAX)
+
+class PromptRequest:
+    """조립된 요청 (메시지, max_tokens, 토큰 통계)"""
+
+    def __init__(self, messages, max_tokens, stats):
+        self.messages = messages
+        self.max_tokens = max_tokens
+        self.stats = stats
+        self.stats["prompt_tokens_estimated"] = count_message_tokens(messages)
+        self.stats["max_tokens"] = max_tokens
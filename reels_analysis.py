@@ -0,0 +1,335 @@
+import os
+import time
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from client_registry import get_openai_client
+from reels_extraction import extract_reels_info, report_progress
+from cache_utils import MISS
+from stage_caches import analysis_cache, analysis_key
+from concurrency import limit, submit_with_context
+from instrumentation import measure
+from singleflight import single_flight
+from results_store import get_stored_analysis, save_analysis_result
+from prompt_builder import (
+    PromptRequest, fit_text, analysis_max_tokens,
+    PROMPT_TRANSCRIPT_BUDGET, PROMPT_CAPTION_BUDGET, PROMPT_VISUAL_BUDGET,
+)
+from visual_analysis import format_visual_summary
+
+# 파이프라인 엔진 선택: "thread" (기본, 요청당 스레드) 또는 "async" (이벤트 루프 하나에서 다중 처리)
+PIPELINE_ENGINE = os.getenv("PIPELINE_ENGINE", "thread")
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", 8))
+
+_pipeline_executor = None
+
+def normalize_instagram_url(url):
+    """
+    입력된 인스타그램 URL을 '/p/{ID}/' 형식으로 변환합니다.
+    쿼리 파라미터와 기타 불필요한 부분을 제거합니다.
+    """
+    try:
+        parsed_url = urlparse(url)
+        path_parts = parsed_url.path.strip('/').split('/')
+
+        if len(path_parts) >= 2:
+            if path_parts[0] in ['reel', 'tv', 'p']:
+                shortcode = path_parts[1]
+                normalized_url = f"https://www.instagram.com/p/{shortcode}/"
+                return normalized_url
+        return url  # 변경이 필요 없는 다른 형식의 URL
+
+    except Exception as e:
+        print(f"URL 정규화 중 오류 발생: {str(e)}")
+        return url
+
+# 분석 시스템 프롬프트 (평가 기준표 + 출력 양식)
+# 매 요청 바이트 단위로 동일해야 OpenAI 프롬프트 캐싱(1024토큰 이상의 동일한 앞부분)이 적용되므로
+# 주제, 스크립트, 캡션처럼 요청마다 바뀌는 내용은 넣지 말고 사용자 메시지에 넣습니다.
+ANALYSIS_SYSTEM_PROMPT = """
+            당신은 릴스 분석 전문가입니다. 다음 형식으로 분석 결과를 제공해주세요. 
+            각 항목에 대해 ✅/❌를 표시하고, 그 판단의 근거가 되는 스크립트나 캡션의 구체적인 내용을 인용해주세요. 
+            여기서 모수란 이 내용이 얼마나 많은 사람들의 관심을 끌 수 있는지에 대한 것입니다.
+            문제 해결이란 시청자가 갖고 있는 문제를 해결해줄 수 있는지에 대한 것입니다:
+
+            # 1. 주제: 
+            - **설명: (이 영상의 주제에 대한 내용)**
+            - ✅/❌ **공유 및 저장**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **모수**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **문제해결**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **욕망충족**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **흥미유발**: 스크립트/캡션 중 해당 내용
+
+            # 2. 초반 3초
+            사용자 메시지에 "화면 분석"이 있으면 화면 텍스트와 장면 전환도 초반 3초 판단의 근거로 인용합니다.
+
+            ## 카피라이팅 :
+            - **설명: (이 영상의 초반 3초 카피라이팅에 대한 내용)**
+            - ✅/❌ **구체적 수치**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **뇌 충격**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **이익, 손해 강조**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **권위 강조**: 스크립트/캡션 중 해당 내용
+
+            ## 영상 구성 : 
+            - **설명: (이 영상의 초반 3초 영상 구성에 대한 내용)**
+            - ✅/❌ **상식 파괴**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **결과 먼저**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **부정 강조**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **공감 유도**: 스크립트/캡션 중 해당 내용
+
+            # 3. 내용 구성: 
+            - **설명: (이 영상의 스크립트/캡션의 전체적인 내용 구성에 대한 내용)**
+            - ✅/❌ **문제해결**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **호기심 유발**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **행동 유도**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **스토리**: 스크립트/캡션 중 해당 내용
+            - ✅/❌ **제안**: 스크립트/캡션 중 해당 내용
+
+            # 4. 개선할 점:
+            - ❌ **(항목명)**: 개선할 점 설명 추가 ex. 스크립트/캡션 예시
+            
+            # 5. 적용할 점:
+            - ✅ **(항목명)**: 적용할 점 설명 추가 ex. 스크립트/캡션 중 해당 내용
+
+            # 6. 벤치마킹 적용 기획:
+            사용자 메시지의 "벤치마킹할 새로운 주제"가 비어 있으면 이 항목에는
+            "주제가 입력되지 않았습니다. 구체적인 기획을 위해 주제를 입력해주세요."라고만 작성합니다.
+            주제가 있으면 다음 형식으로 작성합니다:
+
+            - 입력하신 주제 "(벤치마킹할 새로운 주제)"에 대한 벤치마킹 적용 기획입니다.
+            - 위에서 체크(✅)된 항목들을 모두 반영하여 벤치마킹한 내용입니다.
+            
+            사용자 메시지의 스크립트와 캡션을 최대한 유사하게 벤치마킹하여 다음과 같이 작성했습니다:
+            
+            ## 🎙️ 1. 스크립트 예시:
+            [원본 스크립트의 문장 구조, 호흡, 강조점을 거의 그대로 활용하되 새로운 주제에 맞게 변경.
+            예를 들어 원본이 "이것 하나만 있으면 ~~" 구조라면, 새로운 주제도 동일한 구조 사용]
+
+            ## ✏️ 2. 캡션 예시:
+            [원본 캡션의 구조를 거의 그대로 활용.
+            예를 들어 원본이 "✨꿀팁 공개✨" 시작이라면, 새로운 캡션도 동일한 구조 사용.
+            이모지, 해시태그 스타일도 원본과 동일하게 구성]
+
+            ## 🎬 3. 영상 기획:
+            원본 영상의 구성을 최대한 유사하게 벤치마킹하되, 다음 요소들을 추가/보완했습니다:
+
+            1. **🎯 도입부** (3초):
+               - 💥 **뇌 충격을 주는 구체적 수치 활용** (스크립트/캡션 예시 내용)
+               - 🔄 **상식을 깨는 내용으로 시작** (스크립트/캡션 예시 내용)
+               - ⭐ **결과를 먼저 보여주는 방식 적용** (스크립트/캡션 예시 내용)
+               
+            2. **📝 전개**:
+               - **문제 해결형 구조 적용:**
+                 * ❓ **명확한 문제 제시** (스크립트/캡션 예시 내용)
+                 * ✅ **구체적인 해결책 제시** (스크립트/캡션 예시 내용)
+               - **시청 지속성 확보:**
+                 * 🎙️ **나레이션과 영상의 일치성 유지** (스크립트/캡션 예시 내용)
+                 * 🎵 **트렌디한 BGM 활용** (스크립트/캡션 예시 내용)
+                 * 📹 **고화질 영상 품질 유지** (스크립트/캡션 예시 내용)
+               
+            3. **🔚 마무리**:
+               - **행동 유도 요소 포함:**
+                 * 💾 **저장/공유 유도 멘트** (스크립트/캡션 예시 내용)
+                 * 👥 **팔로우 제안** (스크립트/캡션 예시 내용)
+               - **캡션 최적화:**
+                 * 🎣 **첫 줄 후킹** (스크립트/캡션 예시 내용)
+                 * 📑 **단락 구분으로 가독성 확보** (스크립트/캡션 예시 내용)
+                 * 📊 **구체적 수치/권위 요소 포함** (스크립트/캡션 예시 내용)
+            """
+
+def build_analysis_request(info, input_data):
+    """분석 요청을 토큰 예산에 맞춰 조립합니다.
+
+    시스템 메시지는 고정(ANALYSIS_SYSTEM_PROMPT)이고 요청마다 바뀌는 내용은 모두 사용자 메시지에 넣습니다.
+    스크립트/캡션은 중복 제거 후 예산에 맞춰 줄이고, max_tokens는 주제 유무와 실제로 보낸 스크립트/캡션 길이로 산정합니다.
+    """
+    topic = input_data["content_info"]["topic"]
+    transcript, transcript_tokens, transcript_sent = fit_text(info['refined_transcript'], PROMPT_TRANSCRIPT_BUDGET)
+    caption, caption_tokens, caption_sent = fit_text(info['caption'], PROMPT_CAPTION_BUDGET)
+    visual_text, _, visual_sent = fit_text(format_visual_summary(info.get('visual')), PROMPT_VISUAL_BUDGET)
+    if visual_text:
+        visual_text = f"""
+            화면 분석 (영상 프레임에서 자동 추출):
+            {visual_text}
+            """
+
+    messages = [
+        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": f"""
+            다음 릴스를 분석하고, 입력된 주제에 맞게 벤치마킹 기획을 해주세요:
+            
+            스크립트: {transcript}
+            캡션: {caption}
+            
+            사용자 입력 정보:
+            - 초반 3초 카피라이팅: {input_data['video_analysis']['intro_copy']}
+            - 초반 3초 영상 구성: {input_data['video_analysis']['intro_structure']}
+            - 나레이션: {input_data['video_analysis']['narration']}
+            - 음악: {input_data['video_analysis']['music']}
+            - 폰트: {input_data['video_analysis']['font']}
+            {visual_text}
+            벤치마킹할 새로운 주제: {topic or ''}
+            
+            위 릴스의 장점과 특징을 분석한 후, 새로운 주제에 맞게 벤치마킹하여 구체적인 스크립트, 캡션, 영상 기획을 제시해주세요.
+            """
+        }
+    ]
+    stats = {
+        "transcript_tokens": transcript_tokens,
+        "transcript_tokens_sent": transcript_sent,
+        "caption_tokens": caption_tokens,
+        "caption_tokens_sent": caption_sent,
+        "visual_tokens_sent": visual_sent,
+    }
+    return PromptRequest(messages, analysis_max_tokens(transcript_sent, caption_sent, bool(topic)), stats)
+
+def build_analysis_messages(info, input_data):
+    """분석 요청 메시지를 만듭니다."""
+    return build_analysis_request(info, input_data).messages
+
+def stream_analysis_with_gpt4(info, input_data, outcome=None):
+    """분석 결과 텍스트를 토큰이 도착하는 대로 yield합니다. 완료되면 분석 캐시에 저장합니다.
+
+    출력 길이 한도(max_tokens)에 걸려 잘린 분석은 캐시에 저장하지 않고 outcome["truncated"]를 True로 둡니다.
+    """
+    outcome = {} if outcome is None else outcome
+    # 정제된 스크립트/캡션 + 영상 분석 입력 + 주제가 같으면 이전 분석 재사용
+    cache_key = analysis_key(info, input_data)
+    cached = analysis_cache.get(cache_key)
+    if cached is not MISS:
+        with measure("analysis", source="cache") as m:
+            m.cache_hit()
+        yield cached
+        return
+    stored = get_stored_analysis(cache_key)
+    if stored is not None:
+        with measure("analysis", source="store") as m:
+            m.cache_hit()
+        analysis_cache.set(cache_key, stored)
+        yield stored
+        return
+    
+    # 같은 분석이 이미 스트리밍 중이면 GPT를 다시 호출하지 않고 완료된 결과를 한 번에 받음
+    flight = single_flight("analysis")
+    future, leader = flight.claim(cache_key)
+    if not leader:
+        # (분석, 잘림 여부) - 잘린 분석을 함께 받은 호출자도 저장하지 않도록
+        analysis, outcome["truncated"] = future.result()
+        with measure("analysis", source="shared") as m:
+            m.cache_hit()
+            m.set(truncated=outcome["truncated"])
+        yield analysis
+        return
+    try:
+        chunks = []
+        for delta in _stream_analysis(info, input_data, outcome):
+            chunks.append(delta)
+            yield delta
+        analysis = "".join(chunks).strip()
+        outcome["truncated"] = outcome.get("finish_reason") == "length"
+        if outcome["truncated"]:
+            print(f"⚠️ 분석이 출력 길이 한도에 걸려 잘렸습니다 (캐시/저장하지 않음): {info.get('shortcode')}")
+        else:
+            analysis_cache.set(cache_key, analysis)
+    except BaseException as e:
+        # 중간에 실패하거나 소비자가 스트림을 닫으면 기다리던 호출자에게도 알림
+        flight.resolve(cache_key, future, error=e)
+        raise
+    flight.resolve(cache_key, future, (analysis, outcome["truncated"]))
+
+def _stream_analysis(info, input_data, outcome):
+    """GPT 분석 스트림의 텍스트 조각(delta)을 yield합니다. 마지막 finish_reason은 outcome에 기록합니다."""
+    client = get_openai_client()
+    
+    chunks = []
+    request = build_analysis_request(info, input_data)
+    with measure("analysis") as m:
+        m.cache_miss()
+        m.set(**request.stats)
+        # 스트림을 다 받을 때까지 OpenAI 동시 실행 슬롯 하나를 점유
+        with limit("openai"):
+            started = time.perf_counter()
+            stream = client.chat.completions.create(
+                model="gpt-4o",
+                messages=request.messages,
+                temperature=0,
+                max_tokens=request.max_tokens,
+                stream=True,
+                # 마지막 청크로 usage(토큰 수)를 받음
+                extra_body={"stream_options": {"include_usage": True}}
+            )
+            
+            for chunk in stream:
+                m.add_usage(getattr(chunk, "usage", None))
+                if not chunk.choices:
+                    continue
+                if chunk.choices[0].finish_reason:
+                    # "stop"이면 정상 종료, "length"면 max_tokens에 걸려 잘림
+                    outcome["finish_reason"] = chunk.choices[0].finish_reason
+                    m.set(finish_reason=chunk.choices[0].finish_reason)
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not chunks:
+                        # 첫 토큰까지 걸린 시간 (프롬프트 캐시 적중 시 줄어듦)
+                        m.set(ttft=round(time.perf_counter() - started, 4))
+                    chunks.append(delta)
+                    m.add_bytes(len(delta.encode("utf-8")))
+                    yield delta
+
+def analyze_with_gpt4(info, input_data, progress_callback=None, outcome=None):
+    try:
+        # 토큰이 도착할 때마다 진행 상태와 함께 텍스트 조각(delta) 전달
+        chunks = []
+        received_chars = 0
+        for delta in stream_analysis_with_gpt4(info, input_data, outcome):
+            chunks.append(delta)
+            received_chars += len(delta)
+            report_progress(progress_callback, "analysis", chars=received_chars, delta=delta)
+        
+        return "".join(chunks).strip()
+        
+    except Exception as e:
+        print(f"분석 중 오류 발생: {str(e)}")
+        return f"분석 중 오류 발생: {str(e)}"
+
+def run_analysis_pipeline(url, input_data, progress_callback=None):
+    """정보 추출 → AI 분석을 순서대로 실행합니다. 실패 시 에러 메시지를 반환합니다.
+
+    영상은 extract_reels_info 안에서 한 번만 가져와 공유하므로 별도로 다운로드하지 않습니다.
+    출력 길이 한도에 걸려 잘린 분석은 결과 저장소에 저장하지 않고 truncated=True로 반환합니다.
+    """
+    if PIPELINE_ENGINE == "async":
+        from async_pipeline import run_reel_pipeline
+        return run_reel_pipeline(url, input_data, progress_callback)
+    
+    url = normalize_instagram_url(url)
+    reels_info = extract_reels_info(url, input_data['video_analysis'], progress_callback)
+    if isinstance(reels_info, str):
+        return {"error": f"정보 추출 실패: {reels_info}"}
+    report_progress(progress_callback, "reels_info", reels_info=reels_info)
+    
+    outcome = {}
+    analysis = analyze_with_gpt4(reels_info, input_data, progress_callback=progress_callback, outcome=outcome)
+    if analysis.startswith("분석 중 오류 발생"):
+        return {"error": f"AI 분석 실패: {analysis}"}
+    truncated = outcome.get("truncated", False)
+    if not truncated:
+        save_analysis_result(reels_info, input_data, analysis)
+    
+    return {
+        "analysis": analysis,
+        "reels_info": reels_info,
+        "truncated": truncated
+    }
+
+def submit_analysis_pipeline(url, input_data, progress_callback=None):
+    """파이프라인을 백그라운드에서 시작하고 concurrent.futures.Future를 반환합니다."""
+    global _pipeline_executor
+    if PIPELINE_ENGINE == "async":
+        from async_pipeline import submit_reel_pipeline
+        return submit_reel_pipeline(url, input_data, progress_callback)
+    
+    if _pipeline_executor is None:
+        _pipeline_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
+    return submit_with_context(_pipeline_executor, run_analysis_pipeline, url, input_data, progress_callback)
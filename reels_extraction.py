@@ -1,191 +1,314 @@
-import instaloader
 from pathlib import Path
-import pandas as pd
-from datetime import datetime
-import requests
 import tempfile
 import os
-import subprocess
-import openai
-from api_config import get_api_config
-import time
-from functools import wraps
-from concurrent.futures import ThreadPoolExecutor
-import streamlit as st  # Streamlit 설정 추가
+import shutil
+from client_registry import get_openai_client
+from instagram_session import get_session_manager
+from post_cache import get_post_metadata
+from media_pipeline import ReelMedia, download_to_file
+from transcript_cache import (
+    audio_fingerprint, get_cached_transcript, store_transcript,
+    get_known_fingerprint, remember_fingerprint,
+)
+from cache_utils import MISS
+from stage_caches import refinement_cache, refinement_key
+from stage_scheduler import StageScheduler
+from concurrency import limit
+from instrumentation import measure, instrument
+from singleflight import single_flight
+from transcription import get_transcription_backend, transcribe_audio
+from lazy_imports import lazy_import
+from prompt_builder import (
+    PromptRequest, fit_text, refinement_max_tokens,
+    PROMPT_TRANSCRIPT_BUDGET, PROMPT_CAPTION_BUDGET, PROMPT_VISUAL_BUDGET,
+)
+from visual_analysis import VISUAL_ANALYSIS, get_cached_visual_summary, get_visual_summary, format_visual_summary
+import re
+import weakref
+import threading
+import unicodedata
+
+# download_video의 예외 처리에서만 사용
+instaloader = lazy_import("instaloader")
 
 # 절대 경로 설정
 BASE_DIR = Path("D:/cursor_ai/02_reels_benchmarking_template")
 
-def get_whisper_model():
-    # 위스퍼 모델 import 제거
-    # import whisper 제거
-    return None
+# 파이프라인 진행 단계 (진행률 표시용)
+PIPELINE_STAGES = {
+    "metadata": "📱 릴스 정보를 가져왔습니다",
+    "audio": "🎧 오디오 추출 완료",
+    "transcript": "🎙️ 음성 인식 완료",
+    "visual": "🖼️ 화면 분석 완료",
+    "refinement": "✍️ 스크립트/캡션 정제 완료",
+    "analysis": "🤖 AI 분석 작성 중...",
+}
 
-def timer_decorator(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
-        print(f"[Timer] {func.__name__}: {end_time - start_time:.2f}초")
-        return result
-    return wrapper
+def report_progress(progress_callback, stage, **detail):
+    """진행 콜백이 있으면 단계 이벤트를 전달합니다. 콜백 오류는 파이프라인을 멈추지 않습니다."""
+    if progress_callback is None:
+        return
+    try:
+        progress_callback(stage, detail)
+    except Exception as e:
+        print(f"진행 상태 전달 실패 ({stage}): {e}")
 
-@timer_decorator
-def extract_audio_from_url(url):
+def extract_media_audio(media):
     try:
-        # FFmpeg 명령어로 URL에서 직접 오디오 추출
-        temp_audio = tempfile.NamedTemporaryFile(suffix='.wav', delete=False).name
-        command = [
-            'ffmpeg',
-            '-i', url,  # URL에서 직접 스트리밍
-            '-vn',  # 비디오 스트림 제거
-            '-acodec', 'pcm_s16le',  # 오디오 코덱
-            '-ar', '16000',  # 샘플링 레이트
-            '-ac', '1',  # 모노 채널
-            '-y',  # 기존 파일 덮어쓰기
-            temp_audio
-        ]
-        
-        subprocess.run(command, check=True, capture_output=True)
-        return temp_audio
+        # 공유 미디어에서 Whisper 업로드용 압축 오디오 추출 (임시 파일은 media.close()에서 정리)
+        return media.encoded_audio()
     except Exception as e:
         print(f"오디오 추출 실패: {e}")
         return None
 
-@timer_decorator
-def transcribe_video(video_url):
+def transcribe_video(video_url, progress_callback=None, media=None, shortcode=None):
+    if shortcode is None:
+        return _transcribe_video(video_url, progress_callback, media, shortcode)
+    # 같은 숏코드를 이미 전사 중이면 오디오 추출/Whisper를 다시 실행하지 않고 그 결과를 함께 사용
+    text, shared = single_flight("whisper").do(
+        shortcode, _transcribe_video, video_url, progress_callback, media, shortcode
+    )
+    if shared:
+        with measure("whisper", shortcode=shortcode, source="shared") as m:
+            m.cache_hit()
+        report_progress(progress_callback, "audio", shared=True)
+        report_progress(progress_callback, "transcript", shared=True)
+    return text
+
+def _transcribe_video(video_url, progress_callback, media, shortcode):
+    # 공유 미디어가 없으면 이 호출 동안만 사용할 미디어를 만들고 끝나면 정리
+    owns_media = media is None
+    if owns_media:
+        media = ReelMedia(video_url)
     try:
-        audio_path = extract_audio_from_url(video_url)
-        if not audio_path:
+        # 이 숏코드의 오디오를 이미 전사한 적이 있으면 오디오 추출 없이 재사용
+        known_fingerprint = get_known_fingerprint(shortcode)
+        if known_fingerprint:
+            cached = get_cached_transcript(shortcode, known_fingerprint)
+            if cached is not None:
+                with measure("whisper", shortcode=shortcode) as m:
+                    m.cache_hit()
+                report_progress(progress_callback, "audio", cached=True)
+                report_progress(progress_callback, "transcript", cached=True)
+                return cached
+        
+        audio = extract_media_audio(media)
+        if not audio:
             return ""
-            
-        # OpenAI API를 사용한 음성 인식
-        api_config = get_api_config()
-        client = openai.OpenAI(api_key=api_config["api_key"])
+        report_progress(progress_callback, "audio", bytes=audio.size, audio_format=audio.audio_format)
         
-        with open(audio_path, 'rb') as audio_file:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                language="ko"  # 한국어 설정
-            )
+        with measure("whisper", shortcode=shortcode, audio_format=audio.audio_format) as m:
+            # 같은 숏코드 + 같은 오디오면 저장된 전사 결과 재사용
+            fingerprint = audio_fingerprint(audio)
+            remember_fingerprint(shortcode, fingerprint)
+            cached = get_cached_transcript(shortcode, fingerprint)
+            if cached is not None:
+                m.cache_hit()
+                report_progress(progress_callback, "transcript", cached=True)
+                return cached
+            
+            # 설정된 전사 백엔드 (Whisper API 또는 로컬 모델)
+            m.cache_miss()
+            m.set(backend=get_transcription_backend().name)
+            text = transcribe_audio(audio)
+            m.add_bytes(audio.size)
         
-        os.remove(audio_path)
-        return transcript.text
+        store_transcript(shortcode, fingerprint, text)
+        report_progress(progress_callback, "transcript")
+        return text
         
     except Exception as e:
         print(f"전사 오류: {e}")
         return ""
+    finally:
+        if owns_media:
+            media.close()
 
-@timer_decorator
-def extract_reels_info(url, video_analysis=None):
-    L = instaloader.Instaloader()
-    
-    # Instagram 로그인
-    INSTAGRAM_USERNAME = os.getenv("INSTAGRAM_USERNAME")
-    INSTAGRAM_PASSWORD = os.getenv("INSTAGRAM_PASSWORD")
-    
-    if INSTAGRAM_USERNAME and INSTAGRAM_PASSWORD:
-        try:
-            L.login(INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD)
-            print("✅ Instagram 로그인 성공")
-        except instaloader.exceptions.BadCredentialsException:
-            print("⚠️ Instagram 로그인 실패: 잘못된 사용자 이름 또는 비밀번호")
-        except Exception as e:
-            print(f"⚠️ Instagram 로그인 중 오류: {str(e)}")
-    else:
-        print("⚠️ Instagram 로그인 정보가 설정되지 않았습니다.")
-    
+def download_visual_summary(shortcode, media):
+    """영상 파일을 받아 화면 분석 결과를 반환합니다. 다운로드에 실패하면 화면 분석 없이 계속하도록 None을 반환합니다."""
+    try:
+        with measure("video_download", shortcode=shortcode):
+            video_path = media.video_path()
+    except Exception as e:
+        print(f"화면 분석용 영상 다운로드 실패: {e}")
+        return None
+    return get_visual_summary(shortcode, video_path)
+
+@instrument("extract_reels_info")
+def extract_reels_info(url, video_analysis=None, progress_callback=None):
     shortcode = url.split("/p/")[1].strip("/")
     
     try:
-        post = instaloader.Post.from_shortcode(L.context, shortcode)
-        video_url = post.video_url
-        
-        # 메타데이터 추출
-        info = {
-            'shortcode': shortcode,
-            'date': post.date.strftime('%Y-%m-%d %H:%M:%S'),
-            'caption': post.caption if post.caption else "",
-            'view_count': post.video_view_count if hasattr(post, 'video_view_count') else 0,
-            'video_duration': post.video_duration if hasattr(post, 'video_duration') else 0,
-            'likes': post.likes,
-            'comments': post.comments,
-            'owner': post.owner_username,
-            'video_url': video_url
-        }
-        
-        # 트랜스크립션 수행
-        transcript = transcribe_video(video_url)
-        info['raw_transcript'] = transcript
-        
-        # 스크립트와 캡션 처리
-        processed_result = process_transcript_and_caption(
-            transcript=transcript,
-            caption=info['caption'],
-            video_analysis=video_analysis or {}
-        )
+        with StageScheduler("extract_reels_info", key=shortcode) as scheduler:
+            # 메타데이터 추출 (숏코드 캐시 → 공유 Instagram 세션)
+            metadata = scheduler.run("metadata", get_post_metadata, shortcode)
+            video_url = metadata['video_url']
+            
+            info = {
+                'shortcode': shortcode,
+                'date': metadata['date'],
+                'caption': metadata['caption'],
+                'view_count': metadata['view_count'],
+                'video_duration': metadata['video_duration'],
+                'likes': metadata['likes'],
+                'comments': metadata['comments'],
+                'owner': metadata['owner'],
+                'video_url': video_url
+            }
+            report_progress(progress_callback, "metadata")
+            
+            # 화면 분석은 캐시에 없을 때만 영상 파일이 필요
+            visual = get_cached_visual_summary(shortcode) if VISUAL_ANALYSIS else None
+            visual_pending = VISUAL_ANALYSIS and visual is None
+            
+            # 영상은 최대 한 번만 가져오고, 블록 종료 시 임시 파일 정리
+            with ReelMedia(video_url) as media:
+                # Whisper 응답을 기다리는 동안 캡션 전처리와 정제 호출 준비
+                scheduler.submit("caption_preprocess", preprocess_caption, info['caption'])
+                scheduler.submit("refinement_warmup", warm_up_refinement_client)
+                # 영상 다운로드 + 화면 분석은 전사와 동시에 진행 (오디오 추출은 다운로드를 기다리지 않음)
+                if visual_pending:
+                    scheduler.submit("visual", download_visual_summary, shortcode, media)
+                scheduler.submit("transcription", transcribe_video, video_url, progress_callback, media=media, shortcode=shortcode)
+                
+                transcript = scheduler.result("transcription")
+                caption = scheduler.result("caption_preprocess")
+                info['raw_transcript'] = transcript
+                if visual_pending:
+                    visual = scheduler.result("visual")
+            if visual:
+                info['visual'] = visual
+                report_progress(progress_callback, "visual", frames=visual["frames"], ocr=visual["ocr"])
+            
+            # 스크립트와 캡션 처리
+            processed_result = scheduler.run(
+                "refinement",
+                process_transcript_and_caption,
+                transcript=transcript,
+                caption=caption,
+                video_analysis=video_analysis or {},
+                client=scheduler.result("refinement_warmup"),
+                visual=visual
+            )
         
         info['refined_transcript'] = processed_result['transcript']
         info['caption'] = processed_result['caption']
+        report_progress(progress_callback, "refinement")
         
         return info
             
     except Exception as e:
         return f"에러 발생: {str(e)}"
 
-@timer_decorator
-def process_transcript_and_caption(transcript, caption, video_analysis):
-    """스크립트와 캡션의 번역/정제를 하나의 GPT 호출로 통합"""
+def preprocess_caption(caption):
+    """캡션만으로 할 수 있는 정리 (유니코드 정규화, 공백/빈 줄 정리)"""
+    caption = unicodedata.normalize("NFC", caption or "")
+    caption = re.sub(r"[ \t]+\n", "\n", caption)
+    caption = re.sub(r"\n{3,}", "\n\n", caption)
+    return caption.strip()
+
+# 이미 연결을 열어둔 클라이언트 (공유 클라이언트는 keep-alive 풀을 유지하므로 한 번이면 충분)
+_warmed_clients = weakref.WeakSet()
+_warm_up_lock = threading.Lock()
+
+def warm_up_refinement_client():
+    """정제 호출용 클라이언트의 연결을 클라이언트마다 한 번만 미리 열어둡니다. 실패해도 정제 단계에서 다시 시도합니다."""
     try:
-        api_config = get_api_config()
-        client = openai.OpenAI(api_key=api_config["api_key"])
-        
-        prompt = f"""
-        다음은 영상의 스크립트와 캡션입니다. 각각에 대해 다음 작업을 수행해주세요:
-        1. 영어로 된 경우 한국어로 번역 (단, 전문용어/브랜드명/해시태그는 원문 유지)
-        2. 이모티콘과 특수문자는 그대로 유지
-        3. 전체적으로 자연스러운 한국어로 정제
-        
-        원본 스크립트:
-        {transcript}
-        
-        원본 캡션:
-        {caption}
-        
-        영상 분석 내용:
-        - 초반 3초 (카피라이팅): {video_analysis.get('intro_copy', '')}
-        - 초반 3초 (영상 구성): {video_analysis.get('intro_structure', '')}
-        - 나레이션: {video_analysis.get('narration', '')}
-        
-        다음 형식으로 결과를 반환해주세요:
-        ---스크립트---
-        [정제된 스크립트]
-        ---캡션---
-        [정제된 캡션]
-        """
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "당신은 전문 번역가이자 스크립트 교정 전문가입니다."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=1000
+        client = get_openai_client()
+        with _warm_up_lock:
+            if client in _warmed_clients:
+                return client
+            _warmed_clients.add(client)
+        with limit("openai"):
+            client.models.retrieve("gpt-4o")  # TLS 연결 수립 (토큰 비용 없음)
+        return client
+    except Exception as e:
+        print(f"정제 호출 준비 실패: {e}")
+        return None
+
+def build_refinement_messages(transcript, caption, video_analysis, visual_text=""):
+    """스크립트/캡션 정제 요청 메시지를 만듭니다."""
+    if visual_text:
+        # 화면 자막은 Whisper가 잘못 들은 단어를 바로잡는 근거로 사용
+        visual_text = f"""
+    화면 분석 (영상 프레임에서 자동 추출, 스크립트의 잘못 인식된 단어를 바로잡는 참고용):
+    {visual_text}
+    """
+    prompt = f"""
+    다음은 영상의 스크립트와 캡션입니다. 각각에 대해 다음 작업을 수행해주세요:
+    1. 영어로 된 경우 한국어로 번역 (단, 전문용어/브랜드명/해시태그는 원문 유지)
+    2. 이모티콘과 특수문자는 그대로 유지
+    3. 전체적으로 자연스러운 한국어로 정제
+    
+    원본 스크립트:
+    {transcript}
+    
+    원본 캡션:
+    {caption}
+    
+    영상 분석 내용:
+    - 초반 3초 (카피라이팅): {video_analysis.get('intro_copy', '')}
+    - 초반 3초 (영상 구성): {video_analysis.get('intro_structure', '')}
+    - 나레이션: {video_analysis.get('narration', '')}
+    {visual_text}
+    다음 형식으로 결과를 반환해주세요:
+    ---스크립트---
+    [정제된 스크립트]
+    ---캡션---
+    [정제된 캡션]
+    """
+    return [
+        {"role": "system", "content": "당신은 전문 번역가이자 스크립트 교정 전문가입니다."},
+        {"role": "user", "content": prompt}
+    ]
+
+def build_refinement_request(transcript, caption, video_analysis, visual=None):
+    """정제 요청을 토큰 예산에 맞춰 조립합니다. max_tokens는 보낸 스크립트/캡션 길이로 산정합니다."""
+    transcript, transcript_tokens, transcript_sent = fit_text(transcript, PROMPT_TRANSCRIPT_BUDGET)
+    caption, caption_tokens, caption_sent = fit_text(caption, PROMPT_CAPTION_BUDGET)
+    visual_text, _, visual_sent = fit_text(format_visual_summary(visual), PROMPT_VISUAL_BUDGET)
+    stats = {
+        "transcript_tokens": transcript_tokens,
+        "transcript_tokens_sent": transcript_sent,
+        "caption_tokens": caption_tokens,
+        "caption_tokens_sent": caption_sent,
+        "visual_tokens_sent": visual_sent,
+    }
+    return PromptRequest(
+        build_refinement_messages(transcript, caption, video_analysis, visual_text),
+        refinement_max_tokens(transcript_sent, caption_sent),
+        stats,
+    )
+
+def parse_refinement_result(content):
+    """정제 응답에서 스크립트/캡션 부분을 분리합니다."""
+    result = content.strip()
+    transcript_part = result.split("---캡션---")[0].replace("---스크립트---", "").strip()
+    caption_part = result.split("---캡션---")[1].strip()
+    return {
+        "transcript": transcript_part,
+        "caption": caption_part
+    }
+
+def process_transcript_and_caption(transcript, caption, video_analysis, client=None, visual=None):
+    """스크립트와 캡션의 번역/정제를 하나의 GPT 호출로 통합 (visual: 화면 분석 결과, 없으면 None)"""
+    # 같은 스크립트/캡션/영상 분석 입력(+ 화면 분석)이면 이전 정제 결과 재사용
+    cache_key = refinement_key(transcript, caption, video_analysis, visual)
+    cached = refinement_cache.get(cache_key)
+    if cached is not MISS:
+        with measure("refinement") as m:
+            m.cache_hit()
+        return dict(cached)
+    
+    try:
+        # 같은 입력의 정제가 이미 진행 중이면 GPT를 다시 호출하지 않고 그 결과를 함께 사용
+        result, shared = single_flight("refinement").do(
+            cache_key, _request_refinement, transcript, caption, video_analysis, visual, client, cache_key
         )
-        
-        result = response.choices[0].message.content.strip()
-        
-        # 결과 파싱
-        transcript_part = result.split("---캡션---")[0].replace("---스크립트---", "").strip()
-        caption_part = result.split("---캡션---")[1].strip()
-        
-        return {
-            "transcript": transcript_part,
-            "caption": caption_part
-        }
+        if shared:
+            with measure("refinement", source="shared") as m:
+                m.cache_hit()
+        return dict(result)
         
     except Exception as e:
         print(f"텍스트 처리 중 오류 발생: {e}")
@@ -194,64 +317,69 @@ def process_transcript_and_caption(transcript, caption, video_analysis):
             "caption": caption
         }
 
-@timer_decorator
+def _request_refinement(transcript, caption, video_analysis, visual, client, cache_key):
+    if client is None:
+        client = get_openai_client()
+    
+    request = build_refinement_request(transcript, caption, video_analysis, visual)
+    with measure("refinement") as m:
+        m.cache_miss()
+        m.set(**request.stats)
+        with limit("openai"):
+            response = client.chat.completions.create(
+                model="gpt-4o",
+                messages=request.messages,
+                temperature=0.3,
+                max_tokens=request.max_tokens
+            )
+        m.add_usage(response.usage)
+    
+    result = parse_refinement_result(response.choices[0].message.content)
+    refinement_cache.set(cache_key, result)
+    return result
+
 def download_video(url):
     """Instagram 릴스 비디오를 다운로드합니다."""
     try:
-        L = instaloader.Instaloader()
-        
-        # Instagram 로그인
-        INSTAGRAM_USERNAME = os.getenv("INSTAGRAM_USERNAME")
-        INSTAGRAM_PASSWORD = os.getenv("INSTAGRAM_PASSWORD")
-        
-        if INSTAGRAM_USERNAME and INSTAGRAM_PASSWORD:
-            try:
-                L.login(INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD)
-                print("✅ Instagram 로그인 성공")
-            except instaloader.exceptions.BadCredentialsException:
-                print("⚠️ Instagram 로그인 실패: 잘못된 사용자 이름 또는 비밀번호")
-                return None
-            except Exception as e:
-                print(f"⚠️ Instagram 로그인 중 오류: {str(e)}")
-                return None
-        else:
+        # 공유 Instagram 세션 사용 (로그인은 프로세스당 한 번)
+        session = get_session_manager()
+        if not session.has_credentials:
             print("⚠️ Instagram 로그인 정보가 설정되지 않았습니다.")
             return None
+        session.get_loader()
+        if not session.is_logged_in:
+            return None
         
         shortcode = url.split("/p/")[1].strip("/")
-        post = instaloader.Post.from_shortcode(L.context, shortcode)
+        metadata = get_post_metadata(shortcode)
         
-        if not post.is_video:
+        if not metadata['is_video']:
             print("⚠️ 이 게시물은 비디오가 아닙니다.")
             return None
             
-        video_url = post.video_url
+        video_url = metadata['video_url']
         if not video_url:
             print("⚠️ 비디오 URL을 가져올 수 없습니다.")
             return None
             
-        # 임시 파일 생성
+        # 임시 파일에 비디오 다운로드 (반환된 파일은 호출자가 삭제)
         temp_video = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
-        
-        # 비디오 다운로드
-        print("📥 비디오 다운로드 중...")
-        response = requests.get(video_url, stream=True)
-        total_size = int(response.headers.get('content-length', 0))
-        
-        with open(temp_video.name, 'wb') as video_file:
-            if total_size == 0:
-                video_file.write(response.content)
-            else:
-                downloaded = 0
-                for data in response.iter_content(chunk_size=4096):
-                    downloaded += len(data)
-                    video_file.write(data)
-                    done = int(50 * downloaded / total_size)
-                    if done % 5 == 0:  # 진행률 업데이트 빈도 조절
-                        print(f"\r💫 다운로드 진행률: [{'=' * done}{'.' * (50-done)}] {downloaded}/{total_size} bytes", end='')
-        
-        print("\n✅ 비디오 다운로드 완료!")
-        return temp_video.name
+        temp_video.close()
+        try:
+            # 같은 릴스를 이미 받는 중이면 그 파일을 복사해 사용 (같은 resume_key의 부분 파일을 동시에 쓰지 않음)
+            path, shared = single_flight("download").do(
+                shortcode, download_to_file, video_url, temp_video.name, resume_key=shortcode
+            )
+            if shared:
+                try:
+                    shutil.copyfile(path, temp_video.name)
+                except FileNotFoundError:
+                    # 먼저 받은 호출자가 파일을 이미 지웠으면 직접 받음
+                    download_to_file(video_url, temp_video.name, resume_key=shortcode)
+            return temp_video.name
+        except Exception:
+            os.remove(temp_video.name)
+            raise
         
     except instaloader.exceptions.InstaloaderException as e:
         print(f"⚠️ Instagram 관련 오류: {str(e)}")
@@ -0,0 +1,348 @@
+"""분석 결과 영구 저장소 (SQLite, WAL 모드)
+
+extract_reels_info의 info 딕셔너리, 정제된 스크립트/캡션, analyze_with_gpt4 결과를 저장합니다.
+
+    python results_store.py export results.csv
+    python results_store.py export results.parquet --table analyses
+    python results_store.py import reels_info_20250130_144309.csv
+"""
+import os
+import sys
+import json
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from stage_caches import analysis_key
+
+RESULTS_DB_PATH = Path(os.getenv("RESULTS_DB_PATH", Path(__file__).parent / "data" / "reels_results.db"))
+
+# video_url(곧 만료되는 서명된 CDN 주소)은 저장하지 않음 - 필요할 때 get_post_metadata로 새로 가져옵니다.
+REEL_COLUMNS = (
+    "shortcode", "owner", "date", "caption", "raw_transcript", "refined_transcript",
+    "view_count", "video_duration", "likes", "comments",
+)
+# 프로필 목록(owner_ingest)에서 얻는 항목 - caption은 원본이라 분석 파이프라인이 정제한 캡션을 덮어쓰지 않음
+LISTING_COLUMNS = ("shortcode", "owner", "date", "caption", "view_count", "likes", "comments")
+LISTING_REFRESH_COLUMNS = ("owner", "date", "view_count", "likes", "comments")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reels (
+    shortcode TEXT PRIMARY KEY,
+    owner TEXT,
+    date TEXT,
+    caption TEXT,
+    raw_transcript TEXT,
+    refined_transcript TEXT,
+    view_count INTEGER,
+    video_duration REAL,
+    likes INTEGER,
+    comments INTEGER,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reels_owner ON reels(owner);
+CREATE INDEX IF NOT EXISTS idx_reels_date ON reels(date);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    analysis_key TEXT PRIMARY KEY,
+    shortcode TEXT NOT NULL,
+    topic TEXT,
+    video_analysis TEXT,
+    analysis TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_shortcode ON analyses(shortcode);
+CREATE INDEX IF NOT EXISTS idx_analyses_updated ON analyses(updated_at);
+
+-- 계정 단위 수집 상태 (owner_ingest)
+CREATE TABLE IF NOT EXISTS owners (
+    owner TEXT PRIMARY KEY,
+    newest_shortcode TEXT,
+    newest_date TEXT,
+    backfill_cursor TEXT,
+    backfill_done INTEGER NOT NULL DEFAULT 0,
+    reels INTEGER NOT NULL DEFAULT 0,
+    synced_at TEXT,
+    new_cursor TEXT,
+    new_pending_shortcode TEXT,
+    new_pending_date TEXT
+);
+"""
+
+OWNER_COLUMNS = (
+    "newest_shortcode", "newest_date", "backfill_cursor", "backfill_done", "reels", "synced_at",
+    "new_cursor", "new_pending_shortcode", "new_pending_date",
+)
+# 예전 스키마로 만든 DB에 나중에 추가된 열
+OWNER_ADDED_COLUMNS = {"new_cursor": "TEXT", "new_pending_shortcode": "TEXT", "new_pending_date": "TEXT"}
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+class ResultsStore:
+    """스레드마다 별도 커넥션을 쓰는 SQLite 결과 저장소"""
+
+    def __init__(self, path=RESULTS_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            existing = {row["name"] for row in conn.execute("PRAGMA table_info(owners)")}
+            for column, column_type in OWNER_ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE owners ADD COLUMN {column} {column_type}")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    # ---- 저장 (upsert) ----
+
+    def upsert_reels(self, infos):
+        """info 딕셔너리 목록을 한 트랜잭션으로 저장합니다. 숏코드가 같으면 갱신합니다."""
+        rows = [
+            tuple(info.get(column) for column in REEL_COLUMNS) + (_now(),)
+            for info in infos
+        ]
+        updates = ", ".join(f"{column}=COALESCE(excluded.{column}, reels.{column})" for column in REEL_COLUMNS[1:])
+        with self._connect() as conn:
+            conn.executemany(
+                f"""
+                INSERT INTO reels ({", ".join(REEL_COLUMNS)}, updated_at)
+                VALUES ({", ".join("?" for _ in REEL_COLUMNS)}, ?)
+                ON CONFLICT(shortcode) DO UPDATE SET {updates}, updated_at=excluded.updated_at
+                """,
+                rows,
+            )
+
+    def upsert_reel(self, info):
+        self.upsert_reels([info])
+
+    def upsert_listings(self, listings):
+        """프로필 목록 항목을 한 트랜잭션으로 저장합니다.
+
+        이미 있는 릴스는 조회수 등 목록 항목만 갱신하고, 캡션과 전사 등 분석 결과는 그대로 둡니다.
+        """
+        rows = [
+            tuple(listing.get(column) for column in LISTING_COLUMNS) + (_now(),)
+            for listing in listings
+        ]
+        updates = ", ".join(f"{column}=COALESCE(excluded.{column}, reels.{column})" for column in LISTING_REFRESH_COLUMNS)
+        with self._connect() as conn:
+            conn.executemany(
+                f"""
+                INSERT INTO reels ({", ".join(LISTING_COLUMNS)}, updated_at)
+                VALUES ({", ".join("?" for _ in LISTING_COLUMNS)}, ?)
+                ON CONFLICT(shortcode) DO UPDATE SET {updates}, updated_at=excluded.updated_at
+                """,
+                rows,
+            )
+
+    def upsert_analysis(self, analysis_key, shortcode, input_data, analysis):
+        now = _now()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO analyses (analysis_key, shortcode, topic, video_analysis, analysis, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(analysis_key) DO UPDATE SET analysis=excluded.analysis, updated_at=excluded.updated_at
+                """,
+                (
+                    analysis_key,
+                    shortcode,
+                    input_data["content_info"]["topic"],
+                    json.dumps(input_data["video_analysis"], ensure_ascii=False),
+                    analysis,
+                    now,
+                    now,
+                ),
+            )
+
+    def save_owner_state(self, owner, **fields):
+        """계정 수집 상태를 저장합니다 (주어진 항목만 갱신)."""
+        unknown = set(fields) - set(OWNER_COLUMNS)
+        if unknown:
+            raise ValueError(f"알 수 없는 계정 상태 항목: {sorted(unknown)}")
+        columns = list(fields)
+        updates = ", ".join(f"{column}=excluded.{column}" for column in columns) or "owner=excluded.owner"
+        with self._connect() as conn:
+            conn.execute(
+                f"""
+                INSERT INTO owners (owner{"".join(f", {column}" for column in columns)})
+                VALUES (?{", ?" * len(columns)})
+                ON CONFLICT(owner) DO UPDATE SET {updates}
+                """,
+                (owner, *fields.values()),
+            )
+
+    # ---- 조회 ----
+
+    def get_reel(self, shortcode):
+        row = self._connect().execute("SELECT * FROM reels WHERE shortcode = ?", (shortcode,)).fetchone()
+        return dict(row) if row else None
+
+    def get_analysis(self, analysis_key):
+        row = self._connect().execute(
+            "SELECT analysis FROM analyses WHERE analysis_key = ?", (analysis_key,)
+        ).fetchone()
+        return row["analysis"] if row else None
+
+    def list_analyses(self, owner=None, shortcode=None, limit=50):
+        """최근 분석 목록 (릴스 정보 포함)"""
+        query = """
+            SELECT a.analysis_key, a.shortcode, a.topic, a.updated_at, r.owner, r.date, r.view_count
+            FROM analyses a LEFT JOIN reels r ON r.shortcode = a.shortcode
+        """
+        conditions, params = [], []
+        if owner:
+            conditions.append("r.owner = ?")
+            params.append(owner)
+        if shortcode:
+            conditions.append("a.shortcode = ?")
+            params.append(shortcode)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY a.updated_at DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in self._connect().execute(query, params)]
+
+    def get_owner_state(self, owner):
+        row = self._connect().execute("SELECT * FROM owners WHERE owner = ?", (owner,)).fetchone()
+        return dict(row) if row else None
+
+    def count_owner_reels(self, owner):
+        return self._connect().execute("SELECT COUNT(*) FROM reels WHERE owner = ?", (owner,)).fetchone()[0]
+
+    def list_owner_reels(self, owner, min_views=0, pending_only=False, limit=None):
+        """계정의 릴스 목록 (최신순). analyses: 저장된 분석 수, pending_only면 전사/분석 전인 릴스만"""
+        query = """
+            SELECT r.shortcode, r.date, r.view_count, r.likes, r.comments, r.caption,
+                   r.raw_transcript IS NOT NULL AS transcribed,
+                   (SELECT COUNT(*) FROM analyses a WHERE a.shortcode = r.shortcode) AS analyses
+            FROM reels r
+            WHERE r.owner = ? AND COALESCE(r.view_count, 0) >= ?
+        """
+        if pending_only:
+            query += " AND r.raw_transcript IS NULL AND NOT EXISTS (SELECT 1 FROM analyses a WHERE a.shortcode = r.shortcode)"
+        query += " ORDER BY r.date DESC"
+        params = [owner, min_views]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self._connect().execute(query, params)]
+
+    def load_result(self, analysis_key):
+        """저장된 분석을 get_cached_analysis와 같은 형태({analysis, reels_info})로 불러옵니다."""
+        row = self._connect().execute(
+            """
+            SELECT a.analysis, r.* FROM analyses a JOIN reels r ON r.shortcode = a.shortcode
+            WHERE a.analysis_key = ?
+            """,
+            (analysis_key,),
+        ).fetchone()
+        if row is None:
+            return None
+        reels_info = {column: row[column] for column in REEL_COLUMNS}
+        return {"analysis": row["analysis"], "reels_info": reels_info}
+
+    # ---- 내보내기 / 가져오기 ----
+
+    def to_dataframe(self, table="reels"):
+        import pandas as pd
+
+        if table == "analyses":
+            query = """
+                SELECT a.*, r.owner, r.date, r.view_count, r.likes, r.comments,
+                       r.refined_transcript, r.caption
+                FROM analyses a LEFT JOIN reels r ON r.shortcode = a.shortcode
+                ORDER BY a.updated_at DESC
+            """
+        else:
+            query = "SELECT * FROM reels ORDER BY date DESC"
+        return pd.read_sql_query(query, self._connect())
+
+    def export(self, path, table="reels"):
+        """확장자에 따라 CSV 또는 Parquet으로 내보냅니다."""
+        frame = self.to_dataframe(table)
+        if str(path).endswith(".parquet"):
+            frame.to_parquet(path, index=False)  # pyarrow 또는 fastparquet 필요
+        else:
+            frame.to_csv(path, index=False, encoding="utf-8-sig")
+        return len(frame)
+
+    def import_csv(self, path):
+        """기존 reels_info_*.csv 스냅샷을 가져옵니다 (transcript 열은 raw_transcript로 저장)."""
+        import pandas as pd
+
+        frame = pd.read_csv(path, encoding="utf-8-sig").rename(columns={"transcript": "raw_transcript"})
+        frame = frame.astype(object).where(frame.notna(), None)
+        infos = [
+            {column: record.get(column) for column in REEL_COLUMNS}
+            for record in frame.to_dict("records")
+        ]
+        self.upsert_reels(infos)
+        return len(infos)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_results_store():
+    """프로세스 전역 결과 저장소"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultsStore()
+        return _store
+
+def get_stored_analysis(cache_key):
+    """분석 캐시의 영구 계층 - 캐시가 만료되어도 같은 입력의 분석은 저장소에서 불러옵니다.
+
+    저장소는 선택 사항이므로 DB를 열 수 없으면(쓰기 불가 data/ 디렉터리 등) None을 반환합니다.
+    """
+    try:
+        return get_results_store().get_analysis(cache_key)
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ 결과 저장소 조회 실패: {str(e)}")
+        return None
+
+def save_analysis_result(reels_info, input_data, analysis):
+    """파이프라인 결과(릴스 정보 + 분석)를 저장합니다. 저장에 실패해도 분석 결과는 그대로 반환됩니다."""
+    try:
+        store = get_results_store()
+        store.upsert_reel(reels_info)
+        store.upsert_analysis(analysis_key(reels_info, input_data), reels_info["shortcode"], input_data, analysis)
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ 결과 저장 실패: {str(e)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="CSV/Parquet으로 내보내기")
+    export_parser.add_argument("output", help="저장 경로 (.csv 또는 .parquet)")
+    export_parser.add_argument("--table", choices=["reels", "analyses"], default="reels")
+    import_parser = subparsers.add_parser("import", help="기존 CSV 스냅샷 가져오기")
+    import_parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    store = get_results_store()
+    if args.command == "export":
+        count = store.export(args.output, args.table)
+        print(f"✅ {count}개 행을 {args.output}에 저장했습니다.")
+    else:
+        for path in args.paths:
+            count = store.import_csv(path)
+            print(f"✅ {path}: {count}개 릴스를 가져왔습니다.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""진행 중인 같은 작업 합치기 (single-flight)
+
+같은 릴스를 여러 세션이 동시에 분석하면 단계 캐시가 채워지기 전이라 다운로드/ffmpeg/Whisper/GPT 호출이
+요청 수만큼 실행됩니다. 단계와 키(숏코드 등)가 같은 호출이 이미 진행 중이면 새로 실행하지 않고
+그 결과를 함께 기다립니다. 끝난 호출은 바로 목록에서 빠지므로 결과 재사용은 단계 캐시가 담당합니다.
+
+    metadata, shared = single_flight("metadata").do(shortcode, fetch, shortcode)
+    text, shared = await single_flight("whisper").do_async(shortcode, transcribe, media)
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+
+class SingleFlight:
+    """키별로 진행 중인 호출 하나만 실행하고 나머지 호출자는 그 결과(또는 예외)를 공유합니다.
+
+    스레드와 이벤트 루프(async) 호출자가 같은 진행 목록을 씁니다.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {"leaders": 0, "shared": 0}
+
+    def claim(self, key):
+        """(Future, 직접 실행해야 하는지). 실행자는 끝나면 반드시 resolve()를 호출해야 합니다."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._stats["shared"] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._stats["leaders"] += 1
+            return future, True
+
+    def resolve(self, key, future, value=None, error=None):
+        """결과를 기다리던 호출자에게 전달하고 진행 목록에서 뺍니다."""
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def do(self, key, fn, *args, **kwargs):
+        """fn(*args, **kwargs)의 (결과, 다른 호출의 결과를 공유했는지)"""
+        future, leader = self.claim(key)
+        if not leader:
+            return future.result(), True
+        try:
+            value = fn(*args, **kwargs)
+        except BaseException as e:
+            self.resolve(key, future, error=e)
+            raise
+        self.resolve(key, future, value)
+        return value, False
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """do()의 비동기 버전 - fn은 코루틴 함수"""
+        future, leader = self.claim(key)
+        if not leader:
+            return await asyncio.wrap_future(future), True
+        try:
+            value = await fn(*args, **kwargs)
+        except BaseException as e:
+            self.resolve(key, future, error=e)
+            raise
+        self.resolve(key, future, value)
+        return value, False
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+def single_flight(stage):
+    """단계별 SingleFlight (프로세스 전역)"""
+    with _groups_lock:
+        if stage not in _groups:
+            _groups[stage] = SingleFlight(stage)
+        return _groups[stage]
+
+def get_single_flight_stats():
+    """단계별 실행 수(leaders) / 합류 수(shared) / 진행 중 수"""
+    with _groups_lock:
+        groups = dict(_groups)
+    return {stage: group.get_stats() for stage, group in groups.items()}
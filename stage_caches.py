@@ -0,0 +1,47 @@
+import os
+from cache_utils import TieredCache, make_cache_key
+from post_cache import get_post_cache_stats
+from transcript_cache import get_transcript_cache_stats
+from visual_analysis import get_visual_cache_stats
+
+# 단계별 캐시 - 각 단계는 실제 입력값만으로 키를 만듭니다.
+#   메타데이터: 숏코드 (post_cache)
+#   전사: 숏코드 + 오디오 해시 (transcript_cache)
+#   화면 분석: 숏코드 + 샘플링 설정 (visual_analysis)
+#   정제: 스크립트 + 캡션 + 영상 분석 입력 (+ 화면 분석)
+#   분석: 정제된 스크립트/캡션 + 영상 분석 입력 + 주제 (+ 화면 분석)
+REFINEMENT_CACHE_TTL = int(os.getenv("REFINEMENT_CACHE_TTL", 7 * 24 * 3600))
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", 24 * 3600))
+
+# 정제 프롬프트에 실제로 들어가는 영상 분석 항목
+REFINEMENT_FIELDS = ("intro_copy", "intro_structure", "narration")
+
+refinement_cache = TieredCache("refinements", maxsize=256, ttl=REFINEMENT_CACHE_TTL)
+analysis_cache = TieredCache("analyses", maxsize=256, ttl=ANALYSIS_CACHE_TTL)
+
+def refinement_key(transcript, caption, video_analysis, visual=None):
+    fields = {name: (video_analysis or {}).get(name, '') for name in REFINEMENT_FIELDS}
+    # 화면 분석이 없으면 기존과 같은 키 (이미 저장된 결과 재사용)
+    extra = [visual] if visual else []
+    return make_cache_key("refinement", transcript, caption, fields, *extra)
+
+def analysis_key(info, input_data):
+    extra = [info['visual']] if info.get('visual') else []
+    return make_cache_key(
+        "analysis",
+        info['refined_transcript'],
+        info['caption'],
+        input_data['video_analysis'],
+        input_data['content_info']['topic'],
+        *extra,
+    )
+
+def get_stage_cache_stats():
+    """모든 단계 캐시의 적중/미스 통계"""
+    return {
+        "metadata": get_post_cache_stats(),
+        "transcript": get_transcript_cache_stats(),
+        "visual": get_visual_cache_stats(),
+        "refinement": refinement_cache.get_stats(),
+        "analysis": analysis_cache.get_stats(),
+    }
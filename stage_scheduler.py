@@ -0,0 +1,56 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrency import submit_with_context
+from instrumentation import measure
+
+class StageScheduler:
+    """파이프라인 단계를 스레드 풀에서 동시에 실행하고 단계별 시간을 기록합니다.
+
+    submit()으로 띄운 단계는 즉시 백그라운드에서 시작되고, run()은 현재 스레드에서 실행됩니다.
+    단계마다 instrumentation 기록 하나("<pipeline>.<단계>")를 남기며, run_id/start/thread로
+    같은 실행의 단계들이 어떻게 겹쳤는지(임계 경로) 다시 맞춰볼 수 있습니다.
+    with 블록을 나오면 남은 단계를 기다립니다.
+    """
+
+    def __init__(self, pipeline, key=None, max_workers=4):
+        self.pipeline = pipeline
+        self.key = key
+        self.run_id = uuid.uuid4().hex[:12]
+        self._futures = {}
+        self._started_at = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=pipeline)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _timed(self, stage, fn, args, kwargs):
+        with measure(
+            f"{self.pipeline}.{stage}",
+            run_id=self.run_id,
+            key=self.key,
+            start=round(time.perf_counter() - self._started_at, 4),
+            thread=threading.current_thread().name,
+        ):
+            return fn(*args, **kwargs)
+
+    def submit(self, stage, fn, *args, **kwargs):
+        """단계를 백그라운드에서 시작합니다 (호출한 쪽의 scoped_limits가 그대로 적용됨)."""
+        future = submit_with_context(self._executor, self._timed, stage, fn, args, kwargs)
+        self._futures[stage] = future
+        return future
+
+    def result(self, stage, timeout=None):
+        """submit()한 단계의 결과를 기다립니다."""
+        return self._futures[stage].result(timeout=timeout)
+
+    def run(self, stage, fn, *args, **kwargs):
+        """단계를 현재 스레드에서 실행합니다 (임계 경로)."""
+        return self._timed(stage, fn, args, kwargs)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,49 @@
+import os
+import hashlib
+from cache_utils import TieredCache, MISS
+
+# 전사 결과는 오디오가 같으면 바뀌지 않으므로 길게 보관하고, 용량으로 제한
+TRANSCRIPT_CACHE_TTL = int(os.getenv("TRANSCRIPT_CACHE_TTL", 30 * 24 * 3600))
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+
+_transcript_cache = TieredCache(
+    "transcripts",
+    maxsize=256,
+    ttl=TRANSCRIPT_CACHE_TTL,
+    max_disk_bytes=TRANSCRIPT_CACHE_MAX_BYTES,
+)
+
+# 숏코드 → 마지막으로 추출한 오디오 해시 (게시물 오디오는 바뀌지 않으므로
+# 재분석 시 ffmpeg 추출 없이 전사 캐시를 바로 찾을 수 있음)
+_fingerprint_index = TieredCache("audio_fingerprints", maxsize=1024, ttl=TRANSCRIPT_CACHE_TTL)
+
+def audio_fingerprint(audio):
+    """추출된 오디오 바이트의 sha256 해시"""
+    return hashlib.sha256(audio.read()).hexdigest()
+
+def transcript_key(shortcode, fingerprint):
+    return f"{shortcode or '-'}:{fingerprint}"
+
+def get_known_fingerprint(shortcode):
+    """숏코드에 대해 이전에 추출한 오디오 해시를 반환합니다. 없으면 None."""
+    if not shortcode:
+        return None
+    fingerprint = _fingerprint_index.get(shortcode)
+    return None if fingerprint is MISS else fingerprint
+
+def remember_fingerprint(shortcode, fingerprint):
+    if shortcode:
+        _fingerprint_index.set(shortcode, fingerprint)
+
+def get_cached_transcript(shortcode, fingerprint):
+    """캐시된 전사 결과를 반환합니다. 없으면 None."""
+    transcript = _transcript_cache.get(transcript_key(shortcode, fingerprint))
+    return None if transcript is MISS else transcript
+
+def store_transcript(shortcode, fingerprint, transcript):
+    # 실패(빈 결과)는 캐시하지 않음
+    if transcript:
+        _transcript_cache.set(transcript_key(shortcode, fingerprint), transcript)
+
+def get_transcript_cache_stats():
+    return _transcript_cache.get_stats()
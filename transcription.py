@@ -0,0 +1,385 @@
+"""전사(음성 → 텍스트) 백엔드
+
+TRANSCRIPTION_BACKEND 환경 변수로 선택합니다.
+- openai (기본): Whisper API (whisper-1)
+- whisper: 로컬 CPU openai-whisper (requirements의 torch + whisper)
+- faster-whisper: 로컬 CTranslate2 int8 (pip install faster-whisper)
+
+로컬 모델은 프로세스당 한 번만 로드해 계속 띄워 둡니다.
+로컬 백엔드 호출은 TranscriptionBatcher가 모아서 한 번에 처리하므로,
+여러 릴스를 동시에 분석하면 오디오가 배치로 묶여 모델에 들어갑니다.
+"""
+import os
+import re
+import queue
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from client_registry import get_openai_client
+from concurrency import limit, submit_with_context
+from media_pipeline import detect_silences, encode_audio_segment
+
+TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "openai")
+TRANSCRIPTION_LANGUAGE = os.getenv("TRANSCRIPTION_LANGUAGE", "ko")
+# 로컬 모델 이름 (whisper: tiny/base/small/medium, faster-whisper: 같은 이름 또는 CTranslate2 경로)
+LOCAL_WHISPER_MODEL = os.getenv("LOCAL_WHISPER_MODEL", "small")
+LOCAL_WHISPER_DEVICE = os.getenv("LOCAL_WHISPER_DEVICE", "cpu")
+# 한 번에 모델에 넣을 최대 오디오 수와, 배치를 채우려고 기다리는 최대 시간(초)
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", 8))
+WHISPER_BATCH_WAIT = float(os.getenv("WHISPER_BATCH_WAIT", 0.2))
+
+# 긴 오디오 청크 분할 전사: auto(기본, 긴 오디오만) 또는 off
+TRANSCRIPTION_CHUNKING = os.getenv("TRANSCRIPTION_CHUNKING", "auto")
+# 청크 목표 길이(초) - 이보다 1.5배 이상 긴 오디오만 나눔
+TRANSCRIPTION_CHUNK_SECONDS = float(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", 30))
+# 무음을 찾지 못해 강제로 자를 때 다음 청크와 겹치게 할 길이(초)
+TRANSCRIPTION_CHUNK_OVERLAP = float(os.getenv("TRANSCRIPTION_CHUNK_OVERLAP", 1.5))
+# 동시에 전사할 최대 청크 수 (원격 API는 openai 동시 실행 한도도 함께 적용)
+TRANSCRIPTION_CHUNK_WORKERS = int(os.getenv("TRANSCRIPTION_CHUNK_WORKERS", 8))
+# Whisper API 업로드 한도(25MB)보다 여유 있게
+MAX_UPLOAD_BYTES = 24 * 1024 * 1024
+# 형식별 대략적인 초당 바이트 (오디오 길이 추정용, 컨테이너 오버헤드 포함)
+ESTIMATED_BYTES_PER_SECOND = {"opus": 3000, "mp3": 4000, "wav": 32000}
+# 겹친 구간 중복 제거 시 비교할 최대 단어 수
+OVERLAP_MAX_WORDS = 12
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30  # Whisper 입력 창 길이
+# 로컬 모델 청크 목표 길이 - plan_chunks는 목표의 1.5배까지 늘어나므로 창(30초)을 넘지 않게 함
+LOCAL_CHUNK_SECONDS = WINDOW_SECONDS / 1.5
+
+def decode_pcm(audio):
+    """EncodedAudio를 16kHz 모노 float32 배열로 디코딩합니다 (ffmpeg 파이프)."""
+    import numpy as np
+
+    command = [
+        'ffmpeg', '-i', 'pipe:0',
+        '-f', 's16le', '-ac', '1', '-ar', str(SAMPLE_RATE),
+        'pipe:1'
+    ]
+    with limit("ffmpeg"):
+        result = subprocess.run(command, input=audio.read(), check=True, capture_output=True)
+    return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
+
+class TranscriptionBackend(ABC):
+    """전사 백엔드 인터페이스 (transcribe_many를 구현하지 않은 백엔드는 만들 때 TypeError)"""
+    name = "base"
+    # True면 원격 API (동시 호출 가능), False면 로컬 모델 (배치 워커 하나가 처리)
+    remote = False
+
+    def warm_up(self):
+        """모델 로드 등 준비 작업 (기본: 없음)"""
+
+    def transcribe(self, audio):
+        """오디오 하나 (기본: transcribe_many로 처리)"""
+        return self.transcribe_many([audio])[0]
+
+    @abstractmethod
+    def transcribe_many(self, audios):
+        """오디오 여러 개를 입력 순서대로 전사합니다. 모든 백엔드가 구현해야 합니다."""
+
+class OpenAITranscriptionBackend(TranscriptionBackend):
+    name = "openai"
+    remote = True
+
+    def transcribe(self, audio):
+        # 공유 클라이언트 - 커넥션 재사용
+        client = get_openai_client()
+        with limit("openai"):
+            transcript = client.audio.transcriptions.create(
+                model="whisper-1",
+                file=audio.as_upload(),
+                language=TRANSCRIPTION_LANGUAGE
+            )
+        return transcript.text
+
+    def transcribe_many(self, audios):
+        return [self.transcribe(audio) for audio in audios]
+
+_models = {}
+_models_lock = threading.Lock()
+
+def get_whisper_model(name=None, backend="whisper"):
+    """로컬 Whisper 모델을 프로세스당 한 번만 로드합니다."""
+    name = name or LOCAL_WHISPER_MODEL
+    key = (backend, name)
+    with _models_lock:
+        if key not in _models:
+            print(f"🧠 로컬 Whisper 모델 로드 중 ({backend}: {name})...")
+            if backend == "faster-whisper":
+                try:
+                    from faster_whisper import WhisperModel
+                except ImportError:
+                    raise RuntimeError("faster-whisper가 설치되어 있지 않습니다. pip install faster-whisper")
+                _models[key] = WhisperModel(name, device=LOCAL_WHISPER_DEVICE, compute_type="int8")
+            else:
+                try:
+                    import whisper
+                except ImportError:
+                    raise RuntimeError("openai-whisper가 설치되어 있지 않습니다. requirements.txt를 확인해주세요.")
+                _models[key] = whisper.load_model(name, device=LOCAL_WHISPER_DEVICE)
+            print("✅ 로컬 Whisper 모델 로드 완료")
+        return _models[key]
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """openai-whisper 로컬 백엔드.
+
+    30초 창보다 긴 오디오는 업로드 경로와 같은 방식(plan_chunks)으로 무음 경계에서 나누고,
+    무음이 없으면 겹치게 잘라 창 경계의 단어가 끊기지 않게 합니다.
+    여러 릴스의 창을 한 번의 decode 호출로 배치 처리합니다.
+    """
+    name = "whisper"
+
+    def warm_up(self):
+        get_whisper_model(backend=self.name)
+
+    def transcribe_many(self, audios):
+        import torch
+        import whisper
+
+        model = get_whisper_model(backend=self.name)
+        mels, owners, overlaps = [], [], []
+        for index, audio in enumerate(audios):
+            samples = decode_pcm(audio)
+            duration = len(samples) / SAMPLE_RATE
+            silences = detect_silences(audio)[1] if duration > WINDOW_SECONDS else []
+            for start, end, overlapped in plan_chunks(duration, silences, target=LOCAL_CHUNK_SECONDS):
+                segment = samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+                segment = whisper.pad_or_trim(torch.from_numpy(segment.copy()))
+                mels.append(whisper.log_mel_spectrogram(segment, n_mels=model.dims.n_mels))
+                owners.append(index)
+                overlaps.append(overlapped)
+
+        options = whisper.DecodingOptions(language=TRANSCRIPTION_LANGUAGE, fp16=False, without_timestamps=True)
+        texts = [[] for _ in audios]
+        flags = [[] for _ in audios]
+        with torch.no_grad():
+            results = whisper.decode(model, torch.stack(mels).to(model.device), options)
+        for owner, overlapped, result in zip(owners, overlaps, results):
+            texts[owner].append(result.text)
+            flags[owner].append(overlapped)
+        return [stitch_transcripts(parts, chunk_overlaps) for parts, chunk_overlaps in zip(texts, flags)]
+
+class FasterWhisperBackend(TranscriptionBackend):
+    """faster-whisper(CTranslate2) 로컬 백엔드 - int8 CPU 추론"""
+    name = "faster-whisper"
+
+    def warm_up(self):
+        get_whisper_model(backend=self.name)
+
+    def transcribe_many(self, audios):
+        model = get_whisper_model(backend=self.name)
+        texts = []
+        for audio in audios:
+            segments, _ = model.transcribe(decode_pcm(audio), language=TRANSCRIPTION_LANGUAGE, beam_size=1)
+            texts.append(" ".join(segment.text.strip() for segment in segments if segment.text.strip()))
+        return texts
+
+BACKENDS = {
+    "openai": OpenAITranscriptionBackend,
+    "whisper": LocalWhisperBackend,
+    "faster-whisper": FasterWhisperBackend,
+}
+
+class TranscriptionBatcher:
+    """여러 스레드의 전사 요청을 모아 backend.transcribe_many로 한 번에 처리합니다.
+
+    워커 스레드 하나만 모델을 사용하므로 로컬 모델의 스레드 안전성 문제도 피할 수 있습니다.
+    close()하면 그 전에 들어온 요청까지 처리한 뒤 워커 스레드가 끝납니다.
+    """
+
+    _STOP = object()
+
+    def __init__(self, backend, batch_size=WHISPER_BATCH_SIZE, max_wait=WHISPER_BATCH_WAIT):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"transcribe-{backend.name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, audio):
+        future = Future()
+        self._queue.put((audio, future))
+        return future
+
+    def transcribe(self, audio):
+        return self.submit(audio).result()
+
+    def close(self):
+        self._queue.put(self._STOP)
+
+    def _next_batch(self):
+        """(배치, 종료 요청 여부)"""
+        item = self._queue.get()
+        if item is self._STOP:
+            return [], True
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=self.max_wait)
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if not batch:
+                continue
+            try:
+                texts = self.backend.transcribe_many([audio for audio, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), text in zip(batch, texts):
+                future.set_result(text)
+
+_backend = None
+_batcher = None
+_backend_lock = threading.Lock()
+
+def get_transcription_backend(name=None):
+    """설정된 전사 백엔드 (프로세스당 하나)"""
+    global _backend
+    name = name or TRANSCRIPTION_BACKEND
+    with _backend_lock:
+        if _backend is None or _backend.name != name:
+            if name not in BACKENDS:
+                raise ValueError(f"지원하지 않는 전사 백엔드입니다: {name}")
+            _backend = BACKENDS[name]()
+        return _backend
+
+def plan_chunks(duration, silences, target=TRANSCRIPTION_CHUNK_SECONDS, overlap=TRANSCRIPTION_CHUNK_OVERLAP):
+    """[(시작, 끝, 앞 청크와 겹침 여부), ...] 청크 계획을 만듭니다.
+
+    목표 길이 근처(0.5~1.5배)의 무음 한가운데에서 자르고,
+    무음이 없으면 목표 길이에서 자르되 다음 청크를 overlap초 앞에서 시작합니다.
+    """
+    midpoints = [(start + end) / 2 for start, end in silences]
+    chunks = []
+    start, overlapped = 0.0, False
+    while duration - start > target * 1.5:
+        candidates = [point for point in midpoints if start + target * 0.5 <= point <= start + target * 1.5]
+        if candidates:
+            cut = min(candidates, key=lambda point: abs(point - (start + target)))
+            chunks.append((start, cut, overlapped))
+            start, overlapped = cut, False
+        else:
+            cut = start + target
+            chunks.append((start, cut, overlapped))
+            start, overlapped = cut - overlap, True
+    chunks.append((start, duration, overlapped))
+    return chunks
+
+def _normalize_word(word):
+    return re.sub(r"[^\w]", "", word).lower()
+
+def merge_overlap(previous, current, max_words=OVERLAP_MAX_WORDS):
+    """previous 끝과 current 앞에 똑같이 나오는 단어들(겹친 구간)을 current에서 뺍니다."""
+    previous_words = [_normalize_word(word) for word in previous.split()]
+    current_words = current.split()
+    normalized = [_normalize_word(word) for word in current_words]
+    for size in range(min(max_words, len(previous_words), len(current_words)), 0, -1):
+        if previous_words[-size:] == normalized[:size]:
+            return " ".join(current_words[size:])
+    return current
+
+def stitch_transcripts(texts, overlaps):
+    """청크 전사 결과를 순서대로 잇습니다. 겹쳐 자른 청크는 중복 단어를 제거합니다."""
+    stitched = ""
+    for text, overlapped in zip(texts, overlaps):
+        text = text.strip()
+        if overlapped and stitched:
+            text = merge_overlap(stitched, text)
+        if text:
+            stitched = f"{stitched} {text}" if stitched else text
+    return stitched
+
+def estimate_duration(audio):
+    """크기로 추정한 오디오 길이(초). 컨테이너 오버헤드 때문에 실제보다 약간 길게 나올 수 있습니다."""
+    bytes_per_second = ESTIMATED_BYTES_PER_SECOND.get(audio.audio_format, ESTIMATED_BYTES_PER_SECOND["wav"])
+    return audio.size / bytes_per_second
+
+def should_chunk(audio):
+    """청크 분할을 검토할 만큼 긴 오디오인지 크기로 추정합니다 (짧은 릴스는 무음 감지도 생략)."""
+    if TRANSCRIPTION_CHUNKING == "off":
+        return False
+    return audio.size > MAX_UPLOAD_BYTES or estimate_duration(audio) > TRANSCRIPTION_CHUNK_SECONDS
+
+def transcribe_chunked(audio, backend=None):
+    """무음 경계로 나눈 청크를 동시에 전사하고 순서대로 이어 붙입니다.
+
+    청크가 하나뿐이면 그대로 한 번에 전사합니다. (전사 결과, 청크 수)를 반환합니다.
+    ffmpeg가 길이를 알려주지 않으면 크기로 길이를 추정해 고정 길이(겹침 포함)로 나누고,
+    추정이 빗나가도 뒷부분이 빠지지 않게 마지막 청크는 파일 끝까지 읽습니다.
+    """
+    backend = backend or get_transcription_backend()
+    duration, silences = detect_silences(audio)
+    open_ended = duration <= 0
+    if open_ended:
+        # 추정치를 약간 짧게 잡아 마지막 청크가 실제 끝을 넘어서 시작하지 않도록 함
+        duration, silences = estimate_duration(audio) * 0.9, []
+    chunks = plan_chunks(duration, silences)
+    if len(chunks) == 1 and audio.size <= MAX_UPLOAD_BYTES:
+        return _transcribe_one(backend, audio), 1
+    if open_ended:
+        start, _, overlapped = chunks[-1]
+        chunks[-1] = (start, None, overlapped)
+
+    def transcribe_chunk(chunk):
+        start, end, _ = chunk
+        return _transcribe_one(backend, encode_audio_segment(audio, start, end))
+
+    with ThreadPoolExecutor(max_workers=min(TRANSCRIPTION_CHUNK_WORKERS, len(chunks)), thread_name_prefix="chunk") as executor:
+        futures = [submit_with_context(executor, transcribe_chunk, chunk) for chunk in chunks]
+        texts = [future.result() for future in futures]
+    return stitch_transcripts(texts, [overlapped for _, _, overlapped in chunks]), len(chunks)
+
+def _transcribe_one(backend, audio):
+    if backend.remote:
+        return backend.transcribe(audio)
+    return _get_batcher(backend).transcribe(audio)
+
+def _get_batcher(backend):
+    global _batcher
+    with _backend_lock:
+        if _batcher is None or _batcher.backend is not backend:
+            if _batcher is not None:
+                # 백엔드가 바뀌면 이전 배처는 남은 요청을 처리하고 종료
+                _batcher.close()
+            _batcher = TranscriptionBatcher(backend)
+        return _batcher
+
+def transcribe_audio(audio):
+    """오디오 하나를 전사합니다.
+
+    긴 오디오는 청크로 나눠 동시에 전사하고, 로컬 백엔드는 다른 요청과 배치로 묶일 수 있습니다.
+    """
+    backend = get_transcription_backend()
+    if should_chunk(audio):
+        text, _ = transcribe_chunked(audio, backend)
+        return text
+    return _transcribe_one(backend, audio)
+
+def transcribe_audios(audios):
+    """여러 오디오를 한 번에 전사합니다 (오프라인 일괄 처리용). 결과 순서는 입력 순서와 같습니다."""
+    backend = get_transcription_backend()
+    if backend.remote:
+        return [backend.transcribe(audio) for audio in audios]
+    batcher = _get_batcher(backend)
+    futures = [batcher.submit(audio) for audio in audios]
+    return [future.result() for future in futures]
+
+def warm_up_transcription_backend():
+    """로컬 백엔드면 모델을 미리 로드합니다. 실패해도 첫 전사 때 다시 시도합니다."""
+    try:
+        get_transcription_backend().warm_up()
+    except Exception as e:
+        print(f"전사 백엔드 준비 실패: {e}")
@@ -0,0 +1,260 @@
+"""영상 프레임 샘플링 기반 화면 분석
+
+초반 3초 카피/구성/폰트 판단에 쓰도록 받은 MP4에서 적은 수의 저해상도 프레임만 디코딩합니다.
+
+- 초반 N초: 입력 옵션 -t로 읽는 범위를 제한하고 fps 필터로 초당 몇 장만 샘플링
+- 이후 장면 전환: 입력 앞 -ss로 초반 구간을 건너뛰고, -skip_frame nokey로 키프레임만 디코딩하고 scene 점수가 높은 프레임만 선택
+- 프레임은 흑백 PGM으로 파이프에서 바로 받아 디스크를 거치지 않고, 장 수와 해상도를 고정해 메모리 사용을 제한
+- 화면 텍스트: pytesseract(로컬 Tesseract)가 있으면 OCR, 없으면 장면 전환 정보만 사용
+
+결과는 숏코드별로 캐시합니다 (게시물 영상은 바뀌지 않음).
+"""
+import os
+import re
+import subprocess
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from cache_utils import TieredCache, MISS, make_cache_key
+from concurrency import limit
+from instrumentation import measure
+from singleflight import single_flight
+from lazy_imports import lazy_import
+
+pytesseract = lazy_import("pytesseract")
+
+# 화면 분석 사용 여부
+VISUAL_ANALYSIS = os.getenv("VISUAL_ANALYSIS", "1") == "1"
+# 초반 구간 길이(초)와 초당 샘플 프레임 수
+VISUAL_INTRO_SECONDS = float(os.getenv("VISUAL_INTRO_SECONDS", 3))
+VISUAL_INTRO_FPS = float(os.getenv("VISUAL_INTRO_FPS", 2))
+# 디코딩 출력 프레임 너비 (높이는 비율 유지)
+VISUAL_FRAME_WIDTH = int(os.getenv("VISUAL_FRAME_WIDTH", 360))
+# ffmpeg scene 점수 기준 (0~1, 높을수록 큰 변화만 장면 전환으로 봄)
+VISUAL_SCENE_THRESHOLD = float(os.getenv("VISUAL_SCENE_THRESHOLD", 0.3))
+VISUAL_MAX_KEYFRAMES = int(os.getenv("VISUAL_MAX_KEYFRAMES", 12))
+# ffmpeg 한 번에 허용하는 최대 시간(초)
+VISUAL_FFMPEG_TIMEOUT = float(os.getenv("VISUAL_FFMPEG_TIMEOUT", 30))
+VISUAL_OCR_LANG = os.getenv("VISUAL_OCR_LANG", "kor+eng")
+VISUAL_OCR_WORKERS = int(os.getenv("VISUAL_OCR_WORKERS", 4))
+# 직전에 OCR한 프레임과 이 값(평균 밝기 차이/100)보다 덜 다르면 같은 화면으로 보고 OCR 생략
+VISUAL_OCR_SKIP_DIFF = float(os.getenv("VISUAL_OCR_SKIP_DIFF", 0.03))
+VISUAL_CACHE_TTL = int(os.getenv("VISUAL_CACHE_TTL", 30 * 24 * 3600))
+
+_visual_cache = TieredCache("visual", maxsize=256, ttl=VISUAL_CACHE_TTL)
+
+# 프레임 차이 계산 시 건너뛰는 픽셀 간격 (360px 폭 기준 약 3만 픽셀만 비교)
+_DIFF_STRIDE = 8
+_PGM_HEADER = re.compile(rb"P5\s+(\d+)\s+(\d+)\s+(\d+)\s")
+_SHOWINFO_PTS = re.compile(r"\[Parsed_showinfo[^\]]*\].*?pts_time:\s*([\d.]+)")
+
+@dataclass
+class Frame:
+    """흑백 프레임 한 장 (time: 영상 내 위치(초), pixels: width*height 바이트)"""
+    time: float
+    width: int
+    height: int
+    pixels: bytes
+
+def frame_diff(a, b):
+    """두 프레임의 평균 밝기 차이를 ffmpeg scene 점수와 비슷한 0~1 척도로 반환합니다."""
+    if a.width != b.width or a.height != b.height:
+        return 1.0
+    x, y = a.pixels[::_DIFF_STRIDE], b.pixels[::_DIFF_STRIDE]
+    return min(sum(abs(p - q) for p, q in zip(x, y)) / max(len(x), 1) / 100, 1.0)
+
+def parse_pgm_stream(data):
+    """image2pipe로 이어 붙은 PGM 이미지들을 (width, height, pixels) 목록으로 나눕니다."""
+    frames = []
+    offset = 0
+    while offset < len(data):
+        match = _PGM_HEADER.match(data, offset)
+        if not match:
+            break
+        width, height = int(match.group(1)), int(match.group(2))
+        start = match.end()
+        end = start + width * height
+        if end > len(data):
+            break
+        frames.append((width, height, data[start:end]))
+        offset = end
+    return frames
+
+def build_intro_command(source, seconds=None, fps=None, width=None):
+    """초반 seconds초만 읽어 fps로 샘플링하는 ffmpeg 명령어"""
+    seconds = VISUAL_INTRO_SECONDS if seconds is None else seconds
+    fps = fps or VISUAL_INTRO_FPS
+    width = width or VISUAL_FRAME_WIDTH
+    return [
+        'ffmpeg', '-hide_banner', '-nostdin',
+        '-t', f"{seconds:g}",  # 입력 옵션으로 두어 필요한 구간만 읽고 디코딩
+        '-i', source,
+        '-an', '-sn',
+        '-vf', f"fps={fps:g},scale={width}:-2,format=gray,showinfo",
+        '-frames:v', str(max(int(seconds * fps), 1)),
+        '-c:v', 'pgm', '-f', 'image2pipe', 'pipe:1'
+    ]
+
+def build_keyframe_command(source, start=None, threshold=None, max_frames=None, width=None):
+    """start초 이후의 키프레임 중 장면 전환 프레임만 고르는 ffmpeg 명령어"""
+    start = VISUAL_INTRO_SECONDS if start is None else start
+    threshold = threshold or VISUAL_SCENE_THRESHOLD
+    max_frames = max_frames or VISUAL_MAX_KEYFRAMES
+    width = width or VISUAL_FRAME_WIDTH
+    return [
+        'ffmpeg', '-hide_banner', '-nostdin',
+        '-skip_frame', 'nokey',  # 키프레임만 디코딩
+        '-ss', f"{start:g}",
+        '-i', source,
+        '-an', '-sn',
+        '-vf', f"select='gt(scene,{threshold:g})',scale={width}:-2,format=gray,showinfo",
+        '-vsync', '0',  # 선택된 프레임만 출력 (복제 없음)
+        '-frames:v', str(max_frames),
+        '-c:v', 'pgm', '-f', 'image2pipe', 'pipe:1'
+    ]
+
+def decode_frames(command, op, offset=0.0):
+    """ffmpeg를 실행해 Frame 목록을 반환합니다. 시각은 showinfo 로그의 pts_time + offset."""
+    with measure("ffmpeg", op=op) as m:
+        with limit("ffmpeg"):
+            result = subprocess.run(command, check=True, capture_output=True, timeout=VISUAL_FFMPEG_TIMEOUT)
+        m.add_bytes(len(result.stdout))
+        images = parse_pgm_stream(result.stdout)
+        m.set(frames=len(images))
+    times = [float(value) for value in _SHOWINFO_PTS.findall(result.stderr.decode("utf-8", errors="ignore"))]
+    frames = []
+    for index, (width, height, pixels) in enumerate(images):
+        # -ss를 입력 앞에 두면 출력 시각이 0부터 다시 시작하므로 시작 위치를 더함
+        time = times[index] + offset if index < len(times) else offset
+        frames.append(Frame(round(time, 2), width, height, pixels))
+    return frames
+
+_ocr_available = None
+
+def ocr_available():
+    """pytesseract와 Tesseract 실행 파일이 모두 있는지 (한 번만 확인)"""
+    global _ocr_available
+    if _ocr_available is None:
+        try:
+            pytesseract.get_tesseract_version()
+            _ocr_available = True
+        except Exception as e:
+            print(f"⚠️ 화면 텍스트 인식(OCR)을 사용할 수 없습니다 - 장면 전환 정보만 사용합니다: {e}")
+            _ocr_available = False
+    return _ocr_available
+
+def ocr_frame(frame):
+    """프레임의 화면 텍스트 (두 글자 미만 줄은 잡음으로 보고 제외)"""
+    from PIL import Image
+
+    image = Image.frombytes("L", (frame.width, frame.height), frame.pixels)
+    # 자막/오버레이처럼 흩어진 텍스트를 찾는 모드
+    text = pytesseract.image_to_string(image, lang=VISUAL_OCR_LANG, config="--psm 11")
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    return "\n".join(line for line in lines if len(line) >= 2)
+
+def ocr_frames(frames):
+    """프레임별 화면 텍스트 목록. 직전 OCR 프레임과 거의 같은 프레임은 그 결과를 재사용합니다."""
+    if not frames or not ocr_available():
+        return [""] * len(frames)
+
+    # 같은 화면이 이어지는 프레임은 대표 프레임 하나만 OCR
+    representatives = []
+    owner = []
+    for frame in frames:
+        if not representatives or frame_diff(frames[representatives[-1]], frame) >= VISUAL_OCR_SKIP_DIFF:
+            representatives.append(len(owner))
+        owner.append(len(representatives) - 1)
+
+    with measure("ocr", frames=len(frames), ocr_frames=len(representatives)):
+        # Tesseract는 별도 프로세스로 실행되므로 스레드로 동시에 처리
+        with ThreadPoolExecutor(max_workers=VISUAL_OCR_WORKERS) as executor:
+            texts = list(executor.map(ocr_frame, (frames[index] for index in representatives)))
+    return [texts[index] for index in owner]
+
+def _unique_lines(texts):
+    """여러 프레임의 텍스트를 등장 순서대로 중복 없이 합칩니다."""
+    seen = []
+    for text in texts:
+        for line in text.splitlines():
+            if line not in seen:
+                seen.append(line)
+    return "\n".join(seen)
+
+def count_cuts(frames, threshold=None):
+    """연속 프레임 사이의 장면 전환 수"""
+    threshold = threshold or VISUAL_SCENE_THRESHOLD
+    return sum(1 for a, b in zip(frames, frames[1:]) if frame_diff(a, b) >= threshold)
+
+def analyze_video_frames(source):
+    """로컬 영상 파일에서 초반 구간과 장면 전환 프레임을 샘플링해 화면 분석 결과를 만듭니다.
+
+    반환값 (JSON 직렬화 가능):
+        intro_text: 초반 구간 화면 텍스트
+        intro_cuts: 초반 구간 장면 전환 수
+        scenes: [{"time": 초, "text": 화면 텍스트}, ...] (초반 이후 장면 전환)
+        frames: 디코딩한 프레임 수
+        ocr: OCR 사용 여부
+    """
+    intro = decode_frames(build_intro_command(source), "frames_intro")
+    keyframes = decode_frames(build_keyframe_command(source), "frames_scene", offset=VISUAL_INTRO_SECONDS)
+
+    texts = ocr_frames(intro + keyframes)
+    intro_texts, scene_texts = texts[:len(intro)], texts[len(intro):]
+    return {
+        "intro_text": _unique_lines(intro_texts),
+        "intro_cuts": count_cuts(intro),
+        "scenes": [{"time": frame.time, "text": text} for frame, text in zip(keyframes, scene_texts)],
+        "frames": len(intro) + len(keyframes),
+        "ocr": bool(ocr_available()),
+    }
+
+def visual_cache_key(shortcode):
+    # 샘플링 설정이나 OCR 사용 여부가 바뀌면 다시 분석
+    return make_cache_key(
+        "visual", shortcode, bool(ocr_available()), VISUAL_INTRO_SECONDS, VISUAL_INTRO_FPS,
+        VISUAL_FRAME_WIDTH, VISUAL_SCENE_THRESHOLD, VISUAL_MAX_KEYFRAMES, VISUAL_OCR_LANG,
+    )
+
+def get_cached_visual_summary(shortcode):
+    """캐시된 화면 분석 결과. 없으면 None."""
+    visual = _visual_cache.get(visual_cache_key(shortcode))
+    return None if visual is MISS else visual
+
+def get_visual_summary(shortcode, video_path):
+    """숏코드의 화면 분석 결과를 반환합니다 (캐시 → 프레임 분석). 실패해도 파이프라인은 계속되도록 None을 반환합니다."""
+    cache_key = visual_cache_key(shortcode)
+    with measure("visual", shortcode=shortcode) as m:
+        visual = _visual_cache.get(cache_key)
+        if visual is not MISS:
+            m.cache_hit()
+            return visual
+        m.cache_miss()
+        try:
+            # 같은 숏코드를 이미 분석 중이면 그 결과를 함께 사용
+            visual, shared = single_flight("visual").do(cache_key, analyze_video_frames, video_path)
+        except Exception as e:
+            print(f"화면 분석 실패: {e}")
+            return None
+        m.set(shared=shared, frames=visual["frames"], ocr=visual["ocr"])
+        if not shared:
+            _visual_cache.set(cache_key, visual)
+        return visual
+
+def format_visual_summary(visual):
+    """프롬프트에 넣을 화면 분석 요약 (없으면 빈 문자열)"""
+    if not visual:
+        return ""
+    intro_text = visual["intro_text"].replace("\n", " / ")
+    lines = [
+        f"- 초반 {VISUAL_INTRO_SECONDS:g}초 화면 텍스트: {intro_text or '(인식된 텍스트 없음)'}",
+        f"- 초반 {VISUAL_INTRO_SECONDS:g}초 장면 전환: {visual['intro_cuts']}회",
+        f"- 이후 장면 전환: {len(visual['scenes'])}회",
+    ]
+    for scene in visual["scenes"]:
+        if scene["text"]:
+            text = scene["text"].replace("\n", " / ")
+            lines.append(f"  - {scene['time']:.1f}초: {text}")
+    return "\n".join(lines)
+
+def get_visual_cache_stats():
+    return _visual_cache.get_stats()